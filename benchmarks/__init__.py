@@ -0,0 +1,5 @@
+"""
+Throughput, latency and allocation benchmarks for the crypto services and routes.
+
+Run with `python -m benchmarks --help`.
+"""
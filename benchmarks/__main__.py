@@ -0,0 +1,162 @@
+"""
+Command line entry point.
+
+    python -m benchmarks run --target services --output results.json
+    python -m benchmarks run --target inprocess --shapes flat wide
+    python -m benchmarks run --target inprocess inprocess-raw --shapes wide
+    python -m benchmarks run --target uvicorn --iterations 500
+    python -m benchmarks run --target startup
+    python -m benchmarks run --target uvicorn grpc websocket --shapes flat
+    python -m benchmarks compare baseline.json results.json --tolerance 0.1
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+from typing import Any
+
+from .harness import BenchmarkResult, compare
+from .payloads import PAYLOAD_SHAPES
+from .suites import (
+    PROJECT_ROOT,
+    inprocess_transport,
+    run_grpc_suite,
+    run_http_suite,
+    run_service_suite,
+    run_startup_suite,
+    uvicorn_transport,
+    websocket_transport,
+)
+
+# the "-raw" targets serve the raw-body crypto routes (CRYPTO_RAW_BODY), to
+# compare against the default routes in the same run
+TARGETS = (
+    "services",
+    "inprocess",
+    "inprocess-raw",
+    "uvicorn",
+    "uvicorn-raw",
+    "grpc",
+    "websocket",
+    "startup",
+)
+
+
+def run(
+    targets: list[str], shapes: list[str], iterations: int
+) -> list[BenchmarkResult]:
+    """Run the selected suites and return their results in order."""
+    results: list[BenchmarkResult] = []
+    for target in targets:
+        if target == "services":
+            results += run_service_suite(shapes, iterations)
+        elif target in ("inprocess", "inprocess-raw"):
+            raw_body = target == "inprocess-raw"
+            with inprocess_transport(raw_body=raw_body) as transport:
+                results += run_http_suite(target, transport, shapes, iterations)
+        elif target in ("uvicorn", "uvicorn-raw"):
+            with uvicorn_transport(raw_body=target == "uvicorn-raw") as transport:
+                results += run_http_suite(
+                    target, transport, shapes, iterations, alloc_samples=0
+                )
+        elif target == "websocket":
+            with websocket_transport() as transport:
+                results += run_http_suite(
+                    target, transport, shapes, iterations, alloc_samples=0
+                )
+        elif target == "grpc":
+            results += run_grpc_suite(shapes, iterations)
+        elif target == "startup":
+            # each sample starts interpreters and servers, a few are enough
+            results += run_startup_suite(samples=min(iterations, 5))
+    return results
+
+
+def build_report(results: list[BenchmarkResult]) -> dict[str, Any]:
+    """Wrap results with enough context to compare runs across commits."""
+    return {
+        "commit": _git_commit(),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": [result.to_dict() for result in results],
+    }
+
+
+def format_table(results: list[BenchmarkResult]) -> str:
+    lines = [
+        f"{'case':<40} {'ops/sec':>10} {'MB/s':>8} {'p50 ms':>9} {'p99 ms':>9}"
+        f" {'peak KiB':>9} {'blocks':>8}"
+    ]
+    for result in results:
+        lines.append(
+            f"{result.name:<40} {result.ops_per_sec:>10.1f}"
+            f" {result.megabytes_per_sec:>8.1f}"
+            f" {result.p50_seconds * 1e3:>9.3f} {result.p99_seconds * 1e3:>9.3f}"
+            f" {result.alloc_peak_bytes / 1024:>9.1f} {result.alloc_blocks:>8}"
+        )
+    return "\n".join(lines)
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=PROJECT_ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run benchmarks")
+    run_parser.add_argument(
+        "--target", nargs="+", choices=TARGETS, default=["services", "inprocess"]
+    )
+    run_parser.add_argument(
+        "--shapes",
+        nargs="+",
+        choices=list(PAYLOAD_SHAPES),
+        default=list(PAYLOAD_SHAPES),
+    )
+    run_parser.add_argument("--iterations", type=int, default=200)
+    run_parser.add_argument("--output", help="write JSON results to this file")
+
+    compare_parser = commands.add_parser(
+        "compare", help="exit with status 1 if results regressed against a baseline"
+    )
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--tolerance", type=float, default=0.10)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        results = run(args.target, args.shapes, args.iterations)
+        print(format_table(results))
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(build_report(results), f, indent=2)
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    regressions = compare(baseline, current, args.tolerance)
+    for regression in regressions:
+        print(regression)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
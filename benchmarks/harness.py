@@ -0,0 +1,155 @@
+import gc
+import statistics
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from typing import Any, Callable
+
+
+@dataclass(frozen=True)
+class BenchmarkResult:
+    """Measurements of one benchmark case, in seconds and bytes."""
+
+    name: str
+    iterations: int
+    ops_per_sec: float
+    p50_seconds: float
+    p99_seconds: float
+    alloc_peak_bytes: int
+    alloc_blocks: int
+    # size of the payload processed per call, for throughput figures
+    payload_bytes: int = 0
+
+    @property
+    def megabytes_per_sec(self) -> float:
+        return self.ops_per_sec * self.payload_bytes / 1e6
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+def measure(
+    name: str,
+    func: Callable[[], Any],
+    iterations: int = 200,
+    warmup: int = 10,
+    alloc_samples: int = 5,
+    payload_bytes: int = 0,
+) -> BenchmarkResult:
+    """
+    Time `func` over `iterations` calls, then sample its allocations.
+    `payload_bytes`, the size of the data processed per call, is only
+    recorded to report throughput.
+
+    Allocations are measured in a separate pass because tracemalloc slows
+    every allocation down and would skew the latency figures. They only cover
+    the current process, so pass `alloc_samples=0` when the work happens
+    elsewhere (e.g. in a server subprocess).
+    """
+    for _ in range(warmup):
+        func()
+
+    durations: list[float] = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(iterations):
+            start = time.perf_counter()
+            func()
+            durations.append(time.perf_counter() - start)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    peak_bytes, blocks = _measure_allocations(func, alloc_samples)
+    return summarize(name, durations, peak_bytes, blocks, payload_bytes)
+
+
+def summarize(
+    name: str,
+    durations: list[float],
+    alloc_peak_bytes: int = 0,
+    alloc_blocks: int = 0,
+    payload_bytes: int = 0,
+) -> BenchmarkResult:
+    """Build the result of a case from the duration of each of its runs."""
+    durations = sorted(durations)
+    total = sum(durations)
+    return BenchmarkResult(
+        name=name,
+        iterations=len(durations),
+        ops_per_sec=len(durations) / total if total else float("inf"),
+        p50_seconds=statistics.median(durations),
+        p99_seconds=_percentile(durations, 0.99),
+        alloc_peak_bytes=alloc_peak_bytes,
+        alloc_blocks=alloc_blocks,
+        payload_bytes=payload_bytes,
+    )
+
+
+def _measure_allocations(func: Callable[[], Any], samples: int) -> tuple[int, int]:
+    """Median peak traced memory and allocated blocks of a single call."""
+    if samples <= 0:
+        return 0, 0
+    peaks: list[int] = []
+    blocks: list[int] = []
+    tracemalloc.start()
+    try:
+        for _ in range(samples):
+            before = tracemalloc.take_snapshot()
+            tracemalloc.reset_peak()
+            baseline, _ = tracemalloc.get_traced_memory()
+            func()
+            _, peak = tracemalloc.get_traced_memory()
+            after = tracemalloc.take_snapshot()
+
+            peaks.append(peak - baseline)
+            blocks.append(
+                sum(
+                    max(stat.count_diff, 0)
+                    for stat in after.compare_to(before, "filename")
+                )
+            )
+    finally:
+        tracemalloc.stop()
+    return int(statistics.median(peaks)), int(statistics.median(blocks))
+
+
+def _percentile(sorted_values: list[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[index]
+
+
+def compare(
+    baseline: dict[str, Any], current: dict[str, Any], tolerance: float = 0.10
+) -> list[str]:
+    """
+    Compare two result files and describe every regression beyond `tolerance`.
+
+    A case regresses when its throughput drops, or its p99 latency or peak
+    allocation grows, by more than the tolerated fraction. Cases present in
+    only one of the files are ignored.
+    """
+    baseline_cases = {case["name"]: case for case in baseline["results"]}
+    regressions: list[str] = []
+    for case in current["results"]:
+        previous = baseline_cases.get(case["name"])
+        if previous is None:
+            continue
+        if case["ops_per_sec"] < previous["ops_per_sec"] * (1 - tolerance):
+            regressions.append(
+                f"{case['name']}: ops/sec {previous['ops_per_sec']:.1f}"
+                f" -> {case['ops_per_sec']:.1f}"
+            )
+        if case["p99_seconds"] > previous["p99_seconds"] * (1 + tolerance):
+            regressions.append(
+                f"{case['name']}: p99 {previous['p99_seconds'] * 1e3:.3f}ms"
+                f" -> {case['p99_seconds'] * 1e3:.3f}ms"
+            )
+        if case["alloc_peak_bytes"] > previous["alloc_peak_bytes"] * (1 + tolerance):
+            regressions.append(
+                f"{case['name']}: peak allocation {previous['alloc_peak_bytes']}B"
+                f" -> {case['alloc_peak_bytes']}B"
+            )
+    return regressions
@@ -0,0 +1,99 @@
+from typing import Any, Callable
+
+# payloads sized to be realistic API bodies while keeping a full suite run
+# within a couple of minutes
+
+
+def flat_payload() -> dict[str, Any]:
+    """A typical small record: a dozen scalar fields of mixed types."""
+    return {
+        "name": "John Doe",
+        "age": 30,
+        "email": "john@example.com",
+        "active": True,
+        "balance": 1234.56,
+        "tags": None,
+        "city": "Paris",
+        "country": "FR",
+        "zip": "75001",
+        "phone": "+33 1 23 45 67 89",
+        "score": 98,
+        "verified": False,
+    }
+
+
+def deep_payload(depth: int = 32) -> dict[str, Any]:
+    """A few keys whose values are deeply nested objects and arrays."""
+    node: Any = {"leaf": "value", "numbers": [1, 2, 3]}
+    for level in range(depth):
+        node = {f"level_{level}": node, "items": [level, "x" * level]}
+    return {"id": 1, "tree": node, "meta": {"depth": depth}}
+
+
+def wide_payload(keys: int = 2000) -> dict[str, Any]:
+    """Many small top-level keys."""
+    return {f"field_{index:05d}": index for index in range(keys)}
+
+
+def repetitive_payload(keys: int = 2000) -> dict[str, Any]:
+    """Many keys sharing a few enums, flags and small nested objects."""
+    values: list[Any] = [
+        "ACTIVE",
+        "PENDING",
+        "CLOSED",
+        True,
+        False,
+        None,
+        0,
+        {"currency": "EUR", "precision": 2},
+        {"currency": "USD", "precision": 2},
+        ["read", "write"],
+    ]
+    return {f"field_{index:05d}": values[index % len(values)] for index in range(keys)}
+
+
+def large_strings_payload(size: int = 256 * 1024) -> dict[str, Any]:
+    """A handful of very long ASCII strings."""
+    return {
+        "document": "lorem ipsum dolor sit amet " * (size // 27),
+        "attachment": "A" * size,
+        "note": "short",
+    }
+
+
+def unicode_payload() -> dict[str, Any]:
+    """Strings dominated by non-ASCII text, including astral-plane characters."""
+    return {
+        "greeting": "こんにちは世界 " * 200,
+        "cyrillic": "Съешь же ещё этих мягких французских булок " * 50,
+        "emoji": "🔐🚀✨🎉" * 300,
+        "mixed": {"ключ": "значение", "키": "값", "κλειδί": ["τιμή", "值"]},
+    }
+
+
+def records_payload(count: int = 3000) -> dict[str, Any]:
+    """A few hundred kilobytes of small nested records, like a list export."""
+    return {
+        "page": 1,
+        "items": [
+            {
+                "id": index,
+                "name": f"customer {index}",
+                "email": f"customer{index}@example.com",
+                "tags": ["retail", "eu"],
+                "address": {"city": "Paris", "zip": "75001"},
+            }
+            for index in range(count)
+        ],
+    }
+
+
+PAYLOAD_SHAPES: dict[str, Callable[[], dict[str, Any]]] = {
+    "flat": flat_payload,
+    "deep": deep_payload,
+    "wide": wide_payload,
+    "repetitive": repetitive_payload,
+    "large_strings": large_strings_payload,
+    "unicode": unicode_payload,
+    "records": records_payload,
+}
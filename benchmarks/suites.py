@@ -0,0 +1,548 @@
+import contextlib
+import os
+import queue
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Iterator
+
+import httpx
+
+from src.core.settings import settings
+from src.services.aead_encryption import AESGCM, AEADEncryptionService
+from src.services.base64_encryption import Base64EncryptionService
+from src.services.encryption_service import EncryptionService
+from src.services.hmac_signing import HMACSigningService
+from src.services.rot13_encryption import ROT13EncryptionService
+from src.services.signing_service import SigningService
+from src.utils import to_compact_json
+
+from .harness import BenchmarkResult, measure, summarize
+from .payloads import PAYLOAD_SHAPES
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+ROUTES = ("encrypt", "decrypt", "sign", "verify")
+
+# callable performing one HTTP request: (path, body, headers) -> status code
+Transport = Callable[[str, bytes, dict[str, str]], int]
+
+# servers compared by the startup suite: uvicorn's workers each import the
+# app in a fresh interpreter, the preforking server imports it once
+SERVER_COMMANDS = {
+    "uvicorn": ["-m", "uvicorn", "src.main:app"],
+    "preload": ["-m", "src.server"],
+}
+
+# packages whose import time is reported on its own, the rest is "other"
+IMPORT_GROUPS = (
+    "fastapi",
+    "starlette",
+    "pydantic",
+    "pydantic_core",
+    "pydantic_settings",
+    "src",
+)
+
+
+def run_service_suite(
+    shapes: list[str], iterations: int, alloc_samples: int = 5
+) -> list[BenchmarkResult]:
+    """
+    Benchmark the services directly, without any HTTP overhead.
+    The AEAD ciphers are included when the cryptography package is installed,
+    with a random key, to compare against the Base64 path.
+    """
+    # configured like the application's services
+    memo = {
+        "memo_max_entries": settings.ENCRYPTION_MEMO_MAX_ENTRIES,
+        "memo_max_bytes": settings.ENCRYPTION_MEMO_MAX_BYTES,
+    }
+    encryption_services = {
+        "base64": EncryptionService(Base64EncryptionService(), **memo),
+        "rot13": EncryptionService(ROT13EncryptionService(), **memo),
+    }
+    if AESGCM is not None:
+        key = os.urandom(32)
+        for cipher in ("aes-gcm", "chacha20-poly1305"):
+            encryption_services[cipher] = EncryptionService(
+                AEADEncryptionService(key, cipher), **memo
+            )
+    signing = SigningService(HMACSigningService(settings.HMAC_SECRET_KEY))
+
+    results: list[BenchmarkResult] = []
+    for shape in shapes:
+        payload = PAYLOAD_SHAPES[shape]()
+        payload_bytes = len(to_compact_json(payload).encode())
+        cases: dict[str, Callable[[], Any]] = {}
+        for algorithm, service in encryption_services.items():
+            encrypted = service.encrypt_payload(payload)
+            cases[f"service/{algorithm}/encrypt/{shape}"] = (
+                lambda service=service: service.encrypt_payload(payload)
+            )
+            cases[f"service/{algorithm}/decrypt/{shape}"] = (
+                lambda service=service, encrypted=encrypted: service.decrypt_payload(
+                    encrypted
+                )
+            )
+            # mostly-plaintext payloads exercise the rejection path
+            cases[f"service/{algorithm}/decrypt_plaintext/{shape}"] = (
+                lambda service=service: service.decrypt_payload(payload)
+            )
+        signature = signing.sign_payload(payload)["signature"]
+        cases[f"service/hmac/sign/{shape}"] = lambda: signing.sign_payload(payload)
+        cases[f"service/hmac/verify/{shape}"] = lambda: signing.verify_payload(
+            payload, signature
+        )
+
+        for name, func in cases.items():
+            results.append(
+                measure(
+                    name,
+                    func,
+                    iterations,
+                    alloc_samples=alloc_samples,
+                    payload_bytes=payload_bytes,
+                )
+            )
+    return results
+
+
+def run_http_suite(
+    target: str,
+    transport: Transport,
+    shapes: list[str],
+    iterations: int,
+    alloc_samples: int = 5,
+) -> list[BenchmarkResult]:
+    """
+    Benchmark the four crypto routes through `transport`.
+
+    Request bodies are serialized up front so only the request itself is
+    timed, not the client-side JSON encoding.
+    """
+    results: list[BenchmarkResult] = []
+    for shape in shapes:
+        payload = PAYLOAD_SHAPES[shape]()
+        encrypted = EncryptionService(Base64EncryptionService()).encrypt_payload(
+            payload
+        )
+        signature = HMACSigningService(settings.HMAC_SECRET_KEY).sign(payload)
+        bodies = {
+            "encrypt": to_compact_json(payload).encode(),
+            "decrypt": to_compact_json(encrypted).encode(),
+            "sign": to_compact_json(payload).encode(),
+            "verify": to_compact_json(
+                {"signature": signature, "data": payload}
+            ).encode(),
+        }
+        headers = {"Content-Type": "application/json"}
+
+        for route in ROUTES:
+            path, body = f"/{route}", bodies[route]
+            status_code = transport(path, body, headers)
+            if not 200 <= status_code < 300:
+                raise RuntimeError(f"POST {path} ({shape}) returned {status_code}")
+            results.append(
+                measure(
+                    f"{target}/{route}/{shape}",
+                    lambda path=path, body=body: transport(path, body, headers),
+                    iterations,
+                    alloc_samples=alloc_samples,
+                    payload_bytes=len(body),
+                )
+            )
+    return results
+
+
+def run_grpc_suite(
+    shapes: list[str], iterations: int, alloc_samples: int = 0
+) -> list[BenchmarkResult]:
+    """
+    Benchmark the gRPC service on a local server started for the run, for
+    comparison with the HTTP routes of the uvicorn target.
+
+    - grpc/<route>/<shape>: one unary call per operation;
+    - grpc-stream/<route>/<shape>: one message per operation on a stream kept
+      open for the whole case, each reply awaited before the next message.
+    """
+    import grpc
+
+    from src.rpc.crypto_pb2 import PayloadRequest, VerifyRequest
+    from src.rpc.service import CryptoStub
+
+    results: list[BenchmarkResult] = []
+    with grpc_server() as address, grpc.insecure_channel(address) as channel:
+        stub = CryptoStub(channel)
+        for shape in shapes:
+            payload = PAYLOAD_SHAPES[shape]()
+            encrypted = EncryptionService(Base64EncryptionService()).encrypt_payload(
+                payload
+            )
+            body = to_compact_json(payload).encode()
+            signature = HMACSigningService(settings.HMAC_SECRET_KEY).sign(payload)
+            calls = {
+                "encrypt": (
+                    stub.Encrypt,
+                    stub.EncryptStream,
+                    PayloadRequest(payload=body),
+                ),
+                "decrypt": (
+                    stub.Decrypt,
+                    stub.DecryptStream,
+                    PayloadRequest(payload=to_compact_json(encrypted).encode()),
+                ),
+                "sign": (stub.Sign, stub.SignStream, PayloadRequest(payload=body)),
+                "verify": (
+                    stub.Verify,
+                    stub.VerifyStream,
+                    VerifyRequest(payload=body, signature=signature),
+                ),
+            }
+
+            for route in ROUTES:
+                unary, streaming, request = calls[route]
+                if route == "verify" and not unary(request).valid:
+                    raise RuntimeError(f"grpc Verify ({shape}) rejected the signature")
+                results.append(
+                    measure(
+                        f"grpc/{route}/{shape}",
+                        lambda unary=unary, request=request: unary(request),
+                        iterations,
+                        alloc_samples=alloc_samples,
+                        payload_bytes=len(request.payload),
+                    )
+                )
+                with _open_stream(streaming) as send:
+                    results.append(
+                        measure(
+                            f"grpc-stream/{route}/{shape}",
+                            lambda send=send, request=request: send(request),
+                            iterations,
+                            alloc_samples=alloc_samples,
+                            payload_bytes=len(request.payload),
+                        )
+                    )
+    return results
+
+
+def run_startup_suite(samples: int = 5, workers: int = 2) -> list[BenchmarkResult]:
+    """
+    Measure how fast the application starts and what its workers cost.
+
+    - startup/import/<package>: time spent importing `src.main` in a fresh
+      interpreter, by top-level package, and in total;
+    - startup/first_request/<server>: time from launching the server with
+      `workers` workers to its first response, for each of SERVER_COMMANDS.
+      Their allocation figure is the proportional set size (PSS) of the whole
+      server once every worker is up, so memory shared between workers
+      counts once (Linux only, 0 elsewhere).
+    """
+    import_times: dict[str, list[float]] = {}
+    for _ in range(samples):
+        for group, seconds in measure_import_time().items():
+            import_times.setdefault(group, []).append(seconds)
+    results = [
+        summarize(f"startup/import/{group}", durations)
+        for group, durations in import_times.items()
+    ]
+
+    for server in SERVER_COMMANDS:
+        durations: list[float] = []
+        memory: list[int] = []
+        for _ in range(samples):
+            first_request, pss = measure_server_start(server, workers)
+            durations.append(first_request)
+            memory.append(pss)
+        results.append(
+            summarize(
+                f"startup/first_request/{server}",
+                durations,
+                alloc_peak_bytes=int(statistics.median(memory)),
+            )
+        )
+    return results
+
+
+def measure_import_time() -> dict[str, float]:
+    """
+    Seconds spent importing `src.main` in a fresh interpreter, by top-level
+    package (summing the self time of its modules), and in total.
+    """
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import src.main"],
+        cwd=PROJECT_ROOT,
+        env={**os.environ, "PYTHONPATH": str(PROJECT_ROOT)},
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stderr
+
+    # (nesting level, module, self time, cumulative time), in microseconds
+    entries: list[tuple[int, str, int, int]] = []
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_time, cumulative, name = line.removeprefix("import time:").split("|")
+        if not self_time.strip().isdigit():
+            continue  # header
+        level = (len(name) - len(name.lstrip()) - 1) // 2
+        entries.append((level, name.strip(), int(self_time), int(cumulative)))
+
+    # modules are listed after those they import: the imports of src.main are
+    # the entries between the previous top-level one and src.main itself
+    end = next(i for i, entry in enumerate(entries) if entry[1] == "src.main")
+    start = end
+    while start > 0 and entries[start - 1][0] > 0:
+        start -= 1
+
+    times = {"total": entries[end][3] / 1e6}
+    for _, name, self_time, _ in entries[start : end + 1]:
+        package = name.split(".")[0]
+        group = package if package in IMPORT_GROUPS else "other"
+        times[group] = times.get(group, 0.0) + self_time / 1e6
+    return times
+
+
+def measure_server_start(
+    server: str, workers: int, timeout: float = 30.0
+) -> tuple[float, int]:
+    """
+    Launch `server` with `workers` workers and return the seconds until its
+    first response, and its PSS in bytes once every worker has started.
+    """
+    port = _free_port()
+    with tempfile.TemporaryFile("w+") as log:
+        start = time.perf_counter()
+        process = subprocess.Popen(
+            [
+                sys.executable,
+                *SERVER_COMMANDS[server],
+                "--host",
+                "127.0.0.1",
+                "--port",
+                str(port),
+                "--workers",
+                str(workers),
+                "--no-access-log",
+            ],
+            cwd=PROJECT_ROOT,
+            env={**os.environ, "PYTHONPATH": str(PROJECT_ROOT)},
+            stderr=log,
+        )
+        try:
+            with httpx.Client(base_url=f"http://127.0.0.1:{port}") as client:
+                _wait_until_healthy(client, process, timeout, interval=0.005)
+            first_request = time.perf_counter() - start
+
+            deadline = time.monotonic() + timeout
+            while _count_in_file(log, "Application startup complete") < workers:
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"{server} workers did not all start")
+                time.sleep(0.01)
+            return first_request, _process_tree_pss(process.pid)
+        finally:
+            _stop(process)
+
+
+@contextlib.contextmanager
+def inprocess_transport(raw_body: bool = False) -> Iterator[Transport]:
+    """
+    Transport calling the app in-process through Starlette's TestClient.
+    `raw_body` serves the raw-body variant of the crypto routes.
+    """
+    from fastapi.testclient import TestClient
+
+    from src.main import create_app
+
+    with TestClient(create_app(raw_body=raw_body)) as client:
+        yield lambda path, body, headers: client.post(
+            path, content=body, headers=headers
+        ).status_code
+
+
+@contextlib.contextmanager
+def uvicorn_transport(
+    workers: int = 1, startup_timeout: float = 30.0, raw_body: bool = False
+) -> Iterator[Transport]:
+    """Transport talking to a local uvicorn server started for the run."""
+    with uvicorn_server(workers, startup_timeout, raw_body) as base_url:
+        with httpx.Client(base_url=base_url) as client:
+            yield lambda path, body, headers: client.post(
+                path, content=body, headers=headers
+            ).status_code
+
+
+@contextlib.contextmanager
+def websocket_transport(startup_timeout: float = 30.0) -> Iterator[Transport]:
+    """
+    Transport sending each request as a frame of a single WebSocket session
+    (`/session`) on a local uvicorn server, and waiting for its reply. Frames
+    answered with an error count as 400s.
+    """
+    from websockets.sync.client import connect
+
+    with uvicorn_server(startup_timeout=startup_timeout) as base_url:
+        url = base_url.replace("http://", "ws://") + "/session"
+        with connect(url, max_size=None) as websocket:
+
+            def send(path: str, body: bytes, headers: dict[str, str]) -> int:
+                op = path.lstrip("/").encode()
+                websocket.send(
+                    b'{"id":0,"op":"' + op + b'","payload":' + body + b"}", text=True
+                )
+                reply = websocket.recv(decode=False)
+                return 200 if reply.endswith(b',"error":null}') else 400
+
+            yield send
+
+
+@contextlib.contextmanager
+def uvicorn_server(
+    workers: int = 1, startup_timeout: float = 30.0, raw_body: bool = False
+) -> Iterator[str]:
+    """Base URL of a local uvicorn server started for the run."""
+    port = _free_port()
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "src.main:app",
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(port),
+            "--workers",
+            str(workers),
+            "--log-level",
+            "warning",
+            "--no-access-log",
+        ],
+        cwd=PROJECT_ROOT,
+        env={
+            **os.environ,
+            "PYTHONPATH": str(PROJECT_ROOT),
+            "CRYPTO_RAW_BODY": str(raw_body).lower(),
+        },
+    )
+    try:
+        base_url = f"http://127.0.0.1:{port}"
+        with httpx.Client(base_url=base_url) as client:
+            _wait_until_healthy(client, server, startup_timeout)
+        yield base_url
+    finally:
+        _stop(server)
+
+
+@contextlib.contextmanager
+def grpc_server(startup_timeout: float = 30.0) -> Iterator[str]:
+    """Address of a local gRPC server (`src.rpc.server`) started for the run."""
+    import grpc
+
+    address = f"127.0.0.1:{_free_port()}"
+    port = address.rpartition(":")[2]
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "src.rpc.server",
+            "--port",
+            port,
+            "--log-level",
+            "warning",
+        ],
+        cwd=PROJECT_ROOT,
+        env={**os.environ, "PYTHONPATH": str(PROJECT_ROOT)},
+    )
+    try:
+        with grpc.insecure_channel(address) as channel:
+            try:
+                grpc.channel_ready_future(channel).result(timeout=startup_timeout)
+            except grpc.FutureTimeoutError:
+                raise RuntimeError(
+                    f"gRPC server did not start within {startup_timeout}s"
+                ) from None
+        yield address
+    finally:
+        _stop(server)
+
+
+@contextlib.contextmanager
+def _open_stream(
+    method: Callable[[Iterator[Any]], Iterator[Any]],
+) -> Iterator[Callable[[Any], Any]]:
+    """
+    Open a bidirectional stream and yield a function sending one request on
+    it and returning its reply.
+    """
+    requests: queue.SimpleQueue[Any] = queue.SimpleQueue()
+    replies = method(iter(requests.get, None))
+
+    def send(request: Any) -> Any:
+        requests.put(request)
+        reply = next(replies)
+        if reply.error:
+            raise RuntimeError(reply.error)
+        return reply
+
+    try:
+        yield send
+    finally:
+        requests.put(None)
+        for _ in replies:
+            pass
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _stop(process: subprocess.Popen) -> None:
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def _count_in_file(file: Any, text: str) -> int:
+    file.seek(0)
+    return file.read().count(text)
+
+
+def _process_tree_pss(pid: int) -> int:
+    """Proportional set size of a process and its descendants, in bytes."""
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            pss = next(int(line.split()[1]) for line in f if line.startswith("Pss:"))
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            children = [int(child) for child in f.read().split()]
+    except (OSError, StopIteration):
+        return 0
+    return pss * 1024 + sum(_process_tree_pss(child) for child in children)
+
+
+def _wait_until_healthy(
+    client: httpx.Client,
+    server: subprocess.Popen,
+    timeout: float,
+    interval: float = 0.1,
+) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"server exited with code {server.returncode}")
+        try:
+            if client.get("/health/").status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(interval)
+    raise RuntimeError(f"server did not become healthy within {timeout}s")
@@ -0,0 +1,206 @@
+from typing import Any, Callable
+
+from fastapi import APIRouter, Body, Depends, HTTPException, Request, status
+from fastapi.responses import Response
+from pydantic import ValidationError
+
+from src.core.dependencies import (
+    get_encryption_service,
+    get_offloader,
+    get_signing_service,
+)
+from src.core.offload import CPUOffloader, request_body_size
+from src.core.settings import settings
+from src.core.wire import render_json
+from src.schemas.crypto import BatchResponse, VerificationRequest
+from src.services.encryption_service import EncryptionService
+from src.services.signing_service import SigningService
+from src.services.value_memo import ValueMemo
+from src.utils import format_validation_error
+
+router = APIRouter(prefix="/batch", tags=["batch"])
+
+BatchPayload = Body(
+    ...,
+    description="Array of JSON objects, each processed independently",
+    examples=[[{"message": "Hello World"}, {"message": "Goodbye World"}]],
+)
+
+
+async def _run_batch(
+    request: Request,
+    offloader: CPUOffloader,
+    items: list[Any],
+    operation: Callable[..., Any],
+    *args: Any,
+) -> Response:
+    """
+    Apply `operation(*args, item)` to every item of a batch.
+
+    The whole batch is processed and rendered in one call through the
+    offloader, like the crypto routes, so it runs off the event loop and is
+    subject to admission control. Rendering the response there also keeps
+    FastAPI from validating the results on the event loop.
+    """
+    if len(items) > settings.BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Batch exceeds the maximum of {settings.BATCH_MAX_ITEMS} items",
+        )
+    body = await offloader.run(
+        request_body_size(request), _process_batch, items, operation, *args
+    )
+    return Response(content=body, media_type="application/json")
+
+
+def _process_batch(
+    items: list[Any], operation: Callable[..., Any], *args: Any
+) -> bytes:
+    """
+    Apply an operation to every item of a batch and render the response.
+
+    Items that are not JSON objects are reported as per-item errors instead of
+    failing the whole batch, so one bad record never costs the caller a retry
+    of the thousands of valid ones. Results are rendered one by one like the
+    single-item routes render theirs: a result that is not valid JSON
+    (NaN/Infinity) is reported as the error of its item.
+    """
+    results: list[bytes] = []
+    for item in items:
+        if not isinstance(item, dict):
+            results.append(_render_error("Item must be a JSON object"))
+            continue
+        try:
+            results.append(
+                render_json({"result": operation(*args, item), "error": None})
+            )
+        except ValidationError as e:
+            results.append(_render_error(format_validation_error(e)))
+        except ValueError as e:
+            results.append(_render_error(str(e)))
+    return b'{"results":[' + b",".join(results) + b"]}"
+
+
+def _render_error(error: Any) -> bytes:
+    return render_json({"result": None, "error": error})
+
+
+# operations run through the offloader: module-level, so that they can be
+# sent to a process pool along with their service
+
+
+def _encrypt(
+    service: EncryptionService, memo: ValueMemo | None, payload: dict[str, Any]
+) -> dict[str, Any]:
+    return service.encrypt_payload(payload, memo=memo)
+
+
+def _decrypt(
+    service: EncryptionService, memo: ValueMemo | None, payload: dict[str, Any]
+) -> dict[str, Any]:
+    return service.decrypt_payload(payload, memo=memo)
+
+
+def _sign(service: SigningService, payload: dict[str, Any]) -> dict[str, str]:
+    return service.sign_payload(payload)
+
+
+def _verify(service: SigningService, item: dict[str, Any]) -> dict[str, bool]:
+    request = VerificationRequest.model_validate(item)
+    return {"valid": service.verify_payload(request.data, request.signature)}
+
+
+@router.post(
+    "/encrypt",
+    response_model=BatchResponse,
+    summary="Encrypt a batch of JSON payloads",
+    description="Encrypts all properties at depth 1 of every payload in the array.",
+    response_description="Per-item encrypted payloads or errors, in input order",
+)
+async def encrypt_batch(
+    request: Request,
+    payloads: list[Any] = BatchPayload,
+    encryption_service: EncryptionService = Depends(get_encryption_service),
+    offloader: CPUOffloader = Depends(get_offloader),
+) -> Response:
+    """
+    Encrypt every payload of the batch with a single service instance.
+    Values repeated across items are encrypted once.
+    """
+    return await _run_batch(
+        request,
+        offloader,
+        payloads,
+        _encrypt,
+        encryption_service,
+        encryption_service.create_memo(),
+    )
+
+
+@router.post(
+    "/decrypt",
+    response_model=BatchResponse,
+    summary="Decrypt a batch of JSON payloads",
+    description="Decrypts the properties that can be decrypted in every payload.",
+    response_description="Per-item decrypted payloads or errors, in input order",
+)
+async def decrypt_batch(
+    request: Request,
+    payloads: list[Any] = BatchPayload,
+    encryption_service: EncryptionService = Depends(get_encryption_service),
+    offloader: CPUOffloader = Depends(get_offloader),
+) -> Response:
+    """
+    Decrypt every payload of the batch with a single service instance.
+    Ciphertexts repeated across items are decrypted once.
+    """
+    return await _run_batch(
+        request,
+        offloader,
+        payloads,
+        _decrypt,
+        encryption_service,
+        encryption_service.create_memo(),
+    )
+
+
+@router.post(
+    "/sign",
+    response_model=BatchResponse,
+    summary="Sign a batch of JSON payloads",
+    description="Generates a signature for every payload in the array.",
+    response_description="Per-item signatures or errors, in input order",
+)
+async def sign_batch(
+    request: Request,
+    payloads: list[Any] = BatchPayload,
+    signing_service: SigningService = Depends(get_signing_service),
+    offloader: CPUOffloader = Depends(get_offloader),
+) -> Response:
+    """Sign every payload of the batch with a single service instance."""
+    return await _run_batch(request, offloader, payloads, _sign, signing_service)
+
+
+@router.post(
+    "/verify",
+    response_model=BatchResponse,
+    summary="Verify a batch of signatures",
+    description="Verifies every {signature, data} object in the array.",
+    response_description="Per-item verification outcome or errors, in input order",
+)
+async def verify_batch(
+    request: Request,
+    requests: list[Any] = Body(
+        ...,
+        description="Array of objects with 'signature' and 'data' properties",
+    ),
+    signing_service: SigningService = Depends(get_signing_service),
+    offloader: CPUOffloader = Depends(get_offloader),
+) -> Response:
+    """
+    Verify every signature of the batch.
+
+    Unlike `/verify`, an invalid signature does not fail the request: each item
+    reports `{"valid": bool}`, and malformed items report an error.
+    """
+    return await _run_batch(request, offloader, requests, _verify, signing_service)
@@ -1,55 +1,133 @@
 from typing import Any
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.responses import Response
 
-from src.core.dependencies import get_encryption_service, get_signing_service
+from src.api.session import crypto_session
+from src.core.dependencies import (
+    encryption_algorithm_names,
+    get_encryption_service,
+    get_offloader,
+    get_signing_service,
+)
+from src.core.offload import CPUOffloader, request_body_size
+from src.core.wire import (
+    MSGPACK_RESPONSE,
+    MsgPackRoute,
+    WireFormat,
+    get_response_format,
+    pack,
+    render_json,
+)
 from src.schemas.crypto import SignatureResponse, VerificationRequest
 from src.services.encryption_service import EncryptionService
 from src.services.signing_service import SigningService
+from src.utils import render_json_object
+
+router = APIRouter(tags=["crypto"], route_class=MsgPackRoute)
+
+
+def _encrypt_msgpack(
+    encryption_service: EncryptionService, payload: dict[str, Any]
+) -> bytes:
+    return pack(encryption_service.encrypt_payload_raw(payload))
+
 
-router = APIRouter(tags=["crypto"])
+def _decrypt(
+    encryption_service: EncryptionService,
+    payload: dict[str, Any],
+    response_format: WireFormat,
+) -> bytes:
+    decrypted = encryption_service.decrypt_payload(payload)
+    if response_format is WireFormat.MSGPACK:
+        return pack(decrypted)
+    return render_json(decrypted)
+
+
+def _sign(
+    signing_service: SigningService,
+    payload: dict[str, Any],
+    response_format: WireFormat,
+) -> bytes:
+    result = signing_service.sign_payload(payload)
+    if response_format is WireFormat.MSGPACK:
+        return pack(result)
+    return render_json_object(("signature",), (result["signature"].encode("utf-8"),))
 
 
 @router.post(
     "/encrypt",
+    response_model=dict[str, Any],
     summary="Encrypt JSON payload",
     description="Encrypts all properties at depth 1 of the input JSON payload. "
-    "Algorithm can be selected via X-Encryption-Algorithm header (base64|rot13).",
+    "Algorithm can be selected via X-Encryption-Algorithm header "
+    f"({encryption_algorithm_names()}).",
     response_description="JSON object with all top-level properties encrypted as strings",
+    responses=MSGPACK_RESPONSE,
 )
-def encrypt_payload(
+async def encrypt_payload(
+    request: Request,
     payload: dict[str, Any],
     encryption_service: EncryptionService = Depends(get_encryption_service),
-) -> dict[str, Any]:
+    offloader: CPUOffloader = Depends(get_offloader),
+    response_format: WireFormat = Depends(get_response_format),
+) -> Response:
     """
     Encrypt all properties at depth 1 of the input payload.
 
     The endpoint encrypts each top-level property individually, so nested objects
     are encrypted as complete units. Returns a new JSON object where all values
     are Base64-encoded strings.
+
+    The response body is rendered by the service directly from the ciphertext
+    bytes, skipping FastAPI's serialization of the result. msgpack responses
+    carry the ciphertexts as binary values instead of text.
     """
-    return encryption_service.encrypt_payload(payload)
+    if response_format is WireFormat.MSGPACK:
+        body = await offloader.run(
+            request_body_size(request), _encrypt_msgpack, encryption_service, payload
+        )
+    else:
+        body = await offloader.run(
+            request_body_size(request), encryption_service.encrypt_payload_json, payload
+        )
+    return Response(content=body, media_type=response_format)
 
 
 @router.post(
     "/decrypt",
+    response_model=dict[str, Any],
     summary="Decrypt JSON payload",
     description="Decrypts properties that can be decrypted, leaves others unchanged. "
     "Algorithm auto-detected or can be specified via X-Encryption-Algorithm header.",
     response_description="JSON object with decrypted values where possible",
+    responses=MSGPACK_RESPONSE,
 )
-def decrypt_payload(
+async def decrypt_payload(
+    request: Request,
     payload: dict[str, Any],
     encryption_service: EncryptionService = Depends(get_encryption_service),
-) -> dict[str, Any]:
+    offloader: CPUOffloader = Depends(get_offloader),
+    response_format: WireFormat = Depends(get_response_format),
+) -> Response:
     """
     Decrypt properties in the payload that can be decrypted.
 
-    Only attempts to decrypt string values that are valid Base64-encoded JSON.
+    Only attempts to decrypt string values that are valid Base64-encoded JSON,
+    or binary values sent in a msgpack body.
     Non-encrypted properties remain unchanged, allowing for mixed content.
+
+    The response body is rendered in the offloaded call, so FastAPI does not
+    serialize a large decrypted payload on the event loop.
     """
-    return encryption_service.decrypt_payload(payload)
+    body = await offloader.run(
+        request_body_size(request),
+        _decrypt,
+        encryption_service,
+        payload,
+        response_format,
+    )
+    return Response(content=body, media_type=response_format)
 
 
 @router.post(
@@ -58,19 +136,25 @@ def decrypt_payload(
     summary="Generate signature",
     description="Generates an HMAC-SHA256 signature for the input data.",
     response_description="Object containing the generated signature",
+    responses=MSGPACK_RESPONSE,
 )
-def sign_payload(
+async def sign_payload(
+    request: Request,
     payload: dict[str, Any],
     signing_service: SigningService = Depends(get_signing_service),
-) -> SignatureResponse:
+    offloader: CPUOffloader = Depends(get_offloader),
+    response_format: WireFormat = Depends(get_response_format),
+) -> Response:
     """
     Generate a signature for the input payload.
 
     Uses HMAC-SHA256 with deterministic JSON serialization to ensure the same
     signature is generated regardless of property order in the input object.
     """
-    result = signing_service.sign_payload(payload)
-    return SignatureResponse(**result)
+    body = await offloader.run(
+        request_body_size(request), _sign, signing_service, payload, response_format
+    )
+    return Response(content=body, media_type=response_format)
 
 
 @router.post(
@@ -82,9 +166,11 @@ def sign_payload(
         400: {"description": "Signature is invalid or malformed"},
     },
 )
-def verify_signature(
-    request: VerificationRequest,
+async def verify_signature(
+    request: Request,
+    verification: VerificationRequest,
     signing_service: SigningService = Depends(get_signing_service),
+    offloader: CPUOffloader = Depends(get_offloader),
 ) -> Response:
     """
     Verify a signature against the provided data.
@@ -95,8 +181,18 @@ def verify_signature(
     The verification is order-independent - the same signature will validate
     regardless of the order of properties in the data object.
     """
-    if not signing_service.verify_payload(request.data, request.signature):
+    is_valid = await offloader.run(
+        request_body_size(request),
+        signing_service.verify_payload,
+        verification.data,
+        verification.signature,
+    )
+    if not is_valid:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid signature"
         )
     return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+# encrypt/decrypt/sign/verify frames over one connection, see src.api.session
+router.add_api_websocket_route("/session", crypto_session)
@@ -0,0 +1,286 @@
+import json
+from typing import Any
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import Response
+from pydantic import ValidationError
+
+from src.api.session import crypto_session
+from src.core.dependencies import (
+    encryption_algorithm_names,
+    get_encryption_service,
+    get_offloader,
+    get_signing_service,
+)
+from src.core.offload import CPUOffloader
+from src.core.wire import (
+    MSGPACK_RESPONSE,
+    WireFormat,
+    get_request_format,
+    get_response_format,
+    pack,
+    render_json,
+    unpack,
+)
+from src.schemas.crypto import SignatureResponse, VerificationRequest
+from src.services.encryption_service import EncryptionService
+from src.services.signing_service import SigningService
+from src.utils import from_json, render_json_object
+
+# Raw-body variant of the crypto routes, served instead of `src.api.crypto`
+# when CRYPTO_RAW_BODY is enabled. Bodies are read as bytes and parsed once
+# with the configured JSON backend, and responses are rendered to bytes by the
+# handlers, so FastAPI neither validates the payload into a model nor walks the
+# result with `jsonable_encoder`. Status codes and error bodies are the same as
+# with the default routes, and so is the msgpack negotiation (`src.core.wire`).
+router = APIRouter(tags=["crypto"])
+
+JSON_OBJECT_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "application/json": {
+                "schema": {"type": "object", "additionalProperties": True},
+                "example": {"message": "Hello World"},
+            }
+        },
+    }
+}
+
+VERIFICATION_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "application/json": {"schema": VerificationRequest.model_json_schema()}
+        },
+    }
+}
+
+
+def _parse_body(
+    body: bytes, body_format: WireFormat = WireFormat.JSON, allow_binary: bool = False
+) -> Any:
+    """
+    Parse a JSON (or msgpack) request body, failing like FastAPI's own body
+    parsing. `allow_binary` lets msgpack bodies carry binary values.
+
+    Exceptions are built from positional arguments only, so they survive the
+    trip back from a process pool worker.
+    """
+    if not body:
+        raise RequestValidationError([_missing_body_error()])
+    if body_format is WireFormat.MSGPACK:
+        payload = unpack(body, allow_binary)
+    else:
+        payload = _parse_json(body)
+    if payload is None:
+        raise RequestValidationError([_missing_body_error()])
+    return payload
+
+
+def _parse_json(body: bytes) -> Any:
+    try:
+        payload = from_json(body)
+    except json.JSONDecodeError as e:
+        raise RequestValidationError(
+            [
+                {
+                    "type": "json_invalid",
+                    "loc": ("body", e.pos),
+                    "msg": "JSON decode error",
+                    "input": {},
+                    "ctx": {"error": e.msg},
+                }
+            ]
+        ) from e
+    except ValueError as e:  # e.g. invalid UTF-8
+        raise HTTPException(
+            status.HTTP_400_BAD_REQUEST, "There was an error parsing the body"
+        ) from e
+    return payload
+
+
+def _parse_object(
+    body: bytes, body_format: WireFormat, allow_binary: bool = False
+) -> dict[str, Any]:
+    """Parse a request body that must be an object."""
+    payload = _parse_body(body, body_format, allow_binary)
+    if not isinstance(payload, dict):
+        raise RequestValidationError(
+            [
+                {
+                    "type": "dict_type",
+                    "loc": ("body",),
+                    "msg": "Input should be a valid dictionary",
+                    "input": payload,
+                }
+            ]
+        )
+    return payload
+
+
+def _missing_body_error() -> dict[str, Any]:
+    return {"type": "missing", "loc": ("body",), "msg": "Field required", "input": None}
+
+
+def _encrypt(
+    encryption_service: EncryptionService,
+    body: bytes,
+    body_format: WireFormat,
+    response_format: WireFormat,
+) -> bytes:
+    payload = _parse_object(body, body_format)
+    if response_format is WireFormat.MSGPACK:
+        return pack(encryption_service.encrypt_payload_raw(payload))
+    return encryption_service.encrypt_payload_json(payload)
+
+
+def _decrypt(
+    encryption_service: EncryptionService,
+    body: bytes,
+    body_format: WireFormat,
+    response_format: WireFormat,
+) -> bytes:
+    payload = _parse_object(body, body_format, allow_binary=True)
+    decrypted = encryption_service.decrypt_payload(payload)
+    if response_format is WireFormat.MSGPACK:
+        return pack(decrypted)
+    return render_json(decrypted)
+
+
+def _sign(
+    signing_service: SigningService,
+    body: bytes,
+    body_format: WireFormat,
+    response_format: WireFormat,
+) -> bytes:
+    result = signing_service.sign_payload(_parse_object(body, body_format))
+    if response_format is WireFormat.MSGPACK:
+        return pack(result)
+    return render_json_object(("signature",), (result["signature"].encode("utf-8"),))
+
+
+def _verify(
+    signing_service: SigningService, body: bytes, body_format: WireFormat
+) -> bool:
+    try:
+        # from_attributes, like FastAPI's own body validation
+        verification = VerificationRequest.model_validate(
+            _parse_body(body, body_format), from_attributes=True
+        )
+    except ValidationError as e:
+        raise RequestValidationError(
+            [
+                {**error, "loc": ("body", *error["loc"])}
+                for error in e.errors(include_url=False)
+            ]
+        ) from e
+    return signing_service.verify_payload(verification.data, verification.signature)
+
+
+@router.post(
+    "/encrypt",
+    response_model=dict[str, Any],
+    summary="Encrypt JSON payload",
+    description="Encrypts all properties at depth 1 of the input JSON payload. "
+    "Algorithm can be selected via X-Encryption-Algorithm header "
+    f"({encryption_algorithm_names()}).",
+    response_description="JSON object with all top-level properties encrypted as strings",
+    responses=MSGPACK_RESPONSE,
+    openapi_extra=JSON_OBJECT_BODY,
+)
+async def encrypt_payload(
+    request: Request,
+    encryption_service: EncryptionService = Depends(get_encryption_service),
+    offloader: CPUOffloader = Depends(get_offloader),
+    body_format: WireFormat = Depends(get_request_format),
+    response_format: WireFormat = Depends(get_response_format),
+) -> Response:
+    """Encrypt all properties at depth 1 of the raw JSON body."""
+    body = await request.body()
+    content = await offloader.run(
+        len(body), _encrypt, encryption_service, body, body_format, response_format
+    )
+    return Response(content=content, media_type=response_format)
+
+
+@router.post(
+    "/decrypt",
+    response_model=dict[str, Any],
+    summary="Decrypt JSON payload",
+    description="Decrypts properties that can be decrypted, leaves others unchanged. "
+    "Algorithm auto-detected or can be specified via X-Encryption-Algorithm header.",
+    response_description="JSON object with decrypted values where possible",
+    responses=MSGPACK_RESPONSE,
+    openapi_extra=JSON_OBJECT_BODY,
+)
+async def decrypt_payload(
+    request: Request,
+    encryption_service: EncryptionService = Depends(get_encryption_service),
+    offloader: CPUOffloader = Depends(get_offloader),
+    body_format: WireFormat = Depends(get_request_format),
+    response_format: WireFormat = Depends(get_response_format),
+) -> Response:
+    """Decrypt the properties of the raw JSON body that can be decrypted."""
+    body = await request.body()
+    content = await offloader.run(
+        len(body), _decrypt, encryption_service, body, body_format, response_format
+    )
+    return Response(content=content, media_type=response_format)
+
+
+@router.post(
+    "/sign",
+    response_model=SignatureResponse,
+    summary="Generate signature",
+    description="Generates an HMAC-SHA256 signature for the input data.",
+    response_description="Object containing the generated signature",
+    responses=MSGPACK_RESPONSE,
+    openapi_extra=JSON_OBJECT_BODY,
+)
+async def sign_payload(
+    request: Request,
+    signing_service: SigningService = Depends(get_signing_service),
+    offloader: CPUOffloader = Depends(get_offloader),
+    body_format: WireFormat = Depends(get_request_format),
+    response_format: WireFormat = Depends(get_response_format),
+) -> Response:
+    """Generate a signature for the raw JSON body."""
+    body = await request.body()
+    content = await offloader.run(
+        len(body), _sign, signing_service, body, body_format, response_format
+    )
+    return Response(content=content, media_type=response_format)
+
+
+@router.post(
+    "/verify",
+    summary="Verify signature",
+    description="Verifies if a signature matches the provided data.",
+    responses={
+        204: {"description": "Signature is valid"},
+        400: {"description": "Signature is invalid or malformed"},
+    },
+    openapi_extra=VERIFICATION_BODY,
+)
+async def verify_signature(
+    request: Request,
+    signing_service: SigningService = Depends(get_signing_service),
+    offloader: CPUOffloader = Depends(get_offloader),
+    body_format: WireFormat = Depends(get_request_format),
+) -> Response:
+    """Verify the signature of the raw `{signature, data}` body."""
+    body = await request.body()
+    is_valid = await offloader.run(
+        len(body), _verify, signing_service, body, body_format
+    )
+    if not is_valid:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid signature"
+        )
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+# encrypt/decrypt/sign/verify frames over one connection, see src.api.session
+router.add_api_websocket_route("/session", crypto_session)
@@ -0,0 +1,195 @@
+from typing import Any, Callable
+
+from fastapi import WebSocket, status
+from pydantic import ValidationError
+from starlette.exceptions import HTTPException
+
+from src.core.algorithms import EncryptionAlgorithm, SigningAlgorithm
+from src.core.dependencies import (
+    get_encryption_service,
+    get_offloader,
+    get_signing_service,
+)
+from src.core.limits import BodyLimitExceeded, JSONShapeScanner
+from src.core.offload import CPUOffloader
+from src.core.settings import settings
+from src.schemas.crypto import VerificationRequest
+from src.services.encryption_service import EncryptionService
+from src.services.signing_service import SigningService
+from src.utils import format_validation_error, from_json, to_compact_json_bytes
+
+# WebSocket session of the crypto routes, registered on both variants of the
+# crypto router (`src.api.crypto` and `src.api.crypto_raw`)
+
+# limit of the protocol on close reasons
+MAX_CLOSE_REASON_BYTES = 123
+
+_VALID = b'{"valid":true}'
+_INVALID = b'{"valid":false}'
+
+
+class FrameError(Exception):
+    """A frame that cannot be processed, answered with an error."""
+
+
+async def crypto_session(websocket: WebSocket) -> None:
+    """
+    Serve encrypt/decrypt/sign/verify over a single WebSocket connection.
+
+    The algorithms are negotiated once, at the handshake, with the usual
+    `X-Encryption-Algorithm` / `X-Signing-Algorithm` headers or the
+    `encryption_algorithm` / `signing_algorithm` query parameters (browsers
+    cannot set headers), and their services are resolved for the whole
+    session. Every frame is then a JSON object
+    `{"id": ..., "op": "encrypt", "payload": {...}}` answered with
+    `{"id": ..., "result": ..., "error": null}`, in the order frames were
+    received, so clients may pipeline them. For `verify`, the payload is a
+    `/verify` body and the result is `{"valid": bool}`, like `/batch/verify`.
+    Frames that cannot be processed are answered with an error instead of
+    ending the session; unsupported algorithms close it with code 1008.
+    """
+    await websocket.accept()
+    try:
+        encryption_service = get_encryption_service(
+            _negotiated(websocket, "encryption", EncryptionAlgorithm.BASE64)
+        )
+        signing_service = get_signing_service(
+            _negotiated(websocket, "signing", SigningAlgorithm.HMAC)
+        )
+    except HTTPException as e:
+        reason = e.detail.encode()[:MAX_CLOSE_REASON_BYTES].decode(errors="ignore")
+        await websocket.close(status.WS_1008_POLICY_VIOLATION, reason)
+        return
+
+    services = {
+        "encrypt": encryption_service,
+        "decrypt": encryption_service,
+        "sign": signing_service,
+        "verify": signing_service,
+    }
+    offloader = get_offloader()
+    while True:
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            return
+        frame = message.get("text")
+        if frame is None:
+            frame = message.get("bytes") or b""
+        reply = await _answer(frame, services, offloader)
+        await websocket.send_text(reply.decode())
+
+
+def _negotiated(websocket: WebSocket, kind: str, default: str) -> str:
+    """Algorithm of `kind` chosen at the handshake, header first."""
+    return (
+        websocket.headers.get(f"x-{kind}-algorithm")
+        or websocket.query_params.get(f"{kind}_algorithm")
+        or default
+    )
+
+
+async def _answer(
+    frame: str | bytes,
+    services: dict[str, EncryptionService | SigningService],
+    offloader: CPUOffloader,
+) -> bytes:
+    """Process one frame and render its reply."""
+    frame_id = None
+    try:
+        request = _parse_frame(frame)
+        frame_id = request.get("id")
+        op = request.get("op")
+        if op not in _OPERATIONS:
+            raise FrameError(
+                f"Unsupported operation: {op!r}. Supported: {', '.join(_OPERATIONS)}"
+            )
+        payload = request.get("payload")
+        if not isinstance(payload, dict):
+            raise FrameError("Payload must be a JSON object")
+        if settings.MAX_TOP_LEVEL_KEYS and len(payload) > settings.MAX_TOP_LEVEL_KEYS:
+            raise FrameError(
+                f"Payload has more than {settings.MAX_TOP_LEVEL_KEYS} top-level keys"
+            )
+
+        if op == "verify":
+            # validated here, so that errors never come back from a worker
+            verification = VerificationRequest.model_validate(payload)
+            args: tuple[Any, ...] = (verification.data, verification.signature)
+        else:
+            args = (payload,)
+        result = await offloader.run(len(frame), _OPERATIONS[op], services[op], *args)
+    except FrameError as e:
+        return _reply(frame_id, error=str(e))
+    except ValidationError as e:
+        return _reply(frame_id, error=format_validation_error(e))
+    except HTTPException as e:
+        # shed by the admission gate
+        return _reply(frame_id, error=e.detail)
+    return _reply(frame_id, result=result)
+
+
+def _parse_frame(frame: str | bytes) -> dict[str, Any]:
+    """Parse a frame within the limits on request bodies."""
+    if settings.MAX_BODY_BYTES and len(frame) > settings.MAX_BODY_BYTES:
+        raise FrameError(
+            f"Frame exceeds the maximum of {settings.MAX_BODY_BYTES} bytes"
+        )
+    if settings.MAX_JSON_DEPTH:
+        # the payload is one level below the frame
+        scanner = JSONShapeScanner(settings.MAX_JSON_DEPTH + 1, 0)
+        try:
+            scanner.feed(frame.encode() if isinstance(frame, str) else frame)
+        except BodyLimitExceeded as e:
+            raise FrameError(
+                f"Payload is nested deeper than {settings.MAX_JSON_DEPTH} levels"
+            ) from e
+    try:
+        request = from_json(frame)
+    except ValueError as e:
+        raise FrameError("Frame is not valid JSON") from e
+    if not isinstance(request, dict):
+        raise FrameError("Frame must be a JSON object")
+    return request
+
+
+def _reply(frame_id: Any, result: bytes = b"null", error: str | None = None) -> bytes:
+    """Render a reply, inlining the result already serialized by the services."""
+    return b"".join(
+        (
+            b'{"id":',
+            to_compact_json_bytes(frame_id),
+            b',"result":',
+            result,
+            b',"error":',
+            to_compact_json_bytes(error),
+            b"}",
+        )
+    )
+
+
+# operations run through the offloader: module-level, so that they can be
+# sent to a process pool along with their service
+
+
+def _encrypt(service: EncryptionService, payload: dict[str, Any]) -> bytes:
+    return service.encrypt_payload_json(payload)
+
+
+def _decrypt(service: EncryptionService, payload: dict[str, Any]) -> bytes:
+    return to_compact_json_bytes(service.decrypt_payload(payload))
+
+
+def _sign(service: SigningService, payload: dict[str, Any]) -> bytes:
+    return to_compact_json_bytes(service.sign_payload(payload))
+
+
+def _verify(service: SigningService, data: dict[str, Any], signature: str) -> bytes:
+    return _VALID if service.verify_payload(data, signature) else _INVALID
+
+
+_OPERATIONS: dict[str, Callable[..., bytes]] = {
+    "encrypt": _encrypt,
+    "decrypt": _decrypt,
+    "sign": _sign,
+    "verify": _verify,
+}
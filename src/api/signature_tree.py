@@ -0,0 +1,90 @@
+from typing import Any
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import Response
+
+from src.core.dependencies import get_offloader, get_tree_signing_service
+from src.core.offload import CPUOffloader, request_body_size
+from src.schemas.crypto import TreeSignatureResponse, TreeVerificationRequest
+from src.services.signing_service import TreeSigningService
+
+# Per-key variants of /sign and /verify, always served by the hmac-tree
+# algorithm: signing also returns the digest of each top-level property, and
+# verifying against those digests reports which properties were changed.
+router = APIRouter(tags=["crypto"])
+
+
+@router.post(
+    "/sign/tree",
+    response_model=TreeSignatureResponse,
+    summary="Generate per-key signature",
+    description="Generates an hmac-tree signature for the input data, along with "
+    "the digest of each top-level property.",
+    response_description="Object containing the signature and per-key digests",
+)
+async def sign_tree(
+    request: Request,
+    payload: dict[str, Any],
+    tree_signing_service: TreeSigningService = Depends(get_tree_signing_service),
+    offloader: CPUOffloader = Depends(get_offloader),
+) -> TreeSignatureResponse:
+    """
+    Generate an hmac-tree signature and its per-key digests.
+
+    The signature is the same as /sign returns with
+    `X-Signing-Algorithm: hmac-tree`, so it verifies with /verify as well.
+    """
+    result = await offloader.run(
+        request_body_size(request), tree_signing_service.sign_payload, payload
+    )
+    return TreeSignatureResponse(**result)
+
+
+@router.post(
+    "/verify/tree",
+    summary="Verify per-key signature",
+    description="Verifies an hmac-tree signature and reports the properties that "
+    "do not match their digests.",
+    responses={
+        204: {"description": "Signature is valid"},
+        400: {
+            "description": "Signature is invalid, with the failing properties",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "detail": {
+                            "message": "Invalid signature",
+                            "failing_keys": ["message"],
+                        }
+                    }
+                }
+            },
+        },
+    },
+)
+async def verify_tree(
+    request: Request,
+    verification: TreeVerificationRequest,
+    tree_signing_service: TreeSigningService = Depends(get_tree_signing_service),
+    offloader: CPUOffloader = Depends(get_offloader),
+) -> Response:
+    """
+    Verify an hmac-tree signature against the data and per-key digests.
+
+    Returns HTTP 204 (No Content) if the signature is valid, or HTTP 400 with
+    the failing top-level properties. When the digests themselves do not match
+    the signature, every property is reported.
+    """
+    failing_keys = await offloader.run(
+        request_body_size(request),
+        tree_signing_service.failing_keys,
+        verification.data,
+        verification.signature,
+        verification.leaves,
+    )
+    if failing_keys:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"message": "Invalid signature", "failing_keys": failing_keys},
+        )
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,230 @@
+from typing import Any, AsyncIterator, Callable
+
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import StreamingResponse
+from starlette.exceptions import HTTPException
+from starlette.types import Receive, Scope, Send
+
+from src.core.dependencies import get_encryption_service, get_offloader
+from src.core.offload import CPUOffloader
+from src.core.settings import settings
+from src.services.encryption_service import EncryptionService
+from src.services.value_memo import ValueMemo
+from src.utils import from_json, to_compact_json
+
+router = APIRouter(prefix="/stream", tags=["stream"])
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+NDJSON_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            NDJSON_MEDIA_TYPE: {
+                "schema": {"type": "string"},
+                "example": '{"message": "Hello World"}\n{"message": "Goodbye World"}\n',
+            }
+        },
+    }
+}
+
+
+class DuplexStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse whose body iterator consumes the request body itself.
+
+    The stock implementation may watch for client disconnects by reading
+    `receive` concurrently, which would steal request body chunks from the
+    iterator. Here a disconnect surfaces through the iterator's own reads.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
+async def iter_ndjson_batches(
+    chunks: AsyncIterator[bytes], max_line_bytes: int
+) -> AsyncIterator[list[bytes | None]]:
+    """
+    Split an incoming byte stream into NDJSON lines, batched by chunk.
+
+    Each batch holds the lines completed by one chunk of the stream. Only the
+    current partial line is buffered, so memory is bounded by the chunk size
+    and `max_line_bytes` regardless of the total body size. Oversized lines
+    are skipped and reported in place as `None`.
+    """
+    buffer = bytearray()
+    skipping = False
+    async for chunk in chunks:
+        batch: list[bytes | None] = []
+        start = 0
+        while (end := chunk.find(b"\n", start)) != -1:
+            if skipping:
+                skipping = False
+            else:
+                buffer += chunk[start:end]
+                if len(buffer) > max_line_bytes:
+                    batch.append(None)
+                else:
+                    batch.append(bytes(buffer))
+            buffer.clear()
+            start = end + 1
+
+        if not skipping:
+            buffer += chunk[start:]
+            if len(buffer) > max_line_bytes:
+                # drop the partial line now rather than buffering it whole
+                batch.append(None)
+                buffer.clear()
+                skipping = True
+        if batch:
+            yield batch
+
+    if buffer and not skipping:
+        yield [bytes(buffer)]
+
+
+async def iter_ndjson_lines(
+    chunks: AsyncIterator[bytes], max_line_bytes: int
+) -> AsyncIterator[bytes | None]:
+    """Split an incoming byte stream into NDJSON lines, see `iter_ndjson_batches`."""
+    async for batch in iter_ndjson_batches(chunks, max_line_bytes):
+        for line in batch:
+            yield line
+
+
+async def _transform_ndjson(
+    request: Request,
+    offloader: CPUOffloader,
+    operation: Callable[..., dict[str, Any]],
+    *args: Any,
+) -> AsyncIterator[str]:
+    """
+    Apply `operation(*args, payload)` to every JSON object line of the body.
+
+    The lines completed by each received chunk are parsed and transformed in
+    one call through the offloader, so the work stays off the event loop as
+    the execution mode requires, and is subject to admission control. The
+    response has already started once the first line is written, so
+    malformed lines, and lines shed by the admission gate, are reported in
+    place as `{"error": ...}` lines instead of failing the whole stream.
+    """
+    batches = iter_ndjson_batches(request.stream(), settings.STREAM_MAX_LINE_BYTES)
+    async for batch in batches:
+        size = sum(len(line) for line in batch if line is not None)
+        try:
+            yield await offloader.run(size, _transform_lines, batch, operation, *args)
+        except HTTPException as e:
+            error = to_compact_json({"error": e.detail}) + "\n"
+            yield "".join(error for line in batch if line is None or line.strip())
+
+
+def _transform_lines(
+    lines: list[bytes | None], operation: Callable[..., dict[str, Any]], *args: Any
+) -> str:
+    """Transform a batch of NDJSON lines into the lines of the response."""
+    output: list[str] = []
+    for line in lines:
+        if line is None:
+            error = (
+                f"Line exceeds the maximum of {settings.STREAM_MAX_LINE_BYTES} bytes"
+            )
+            output.append(to_compact_json({"error": error}))
+            continue
+        if not line.strip():
+            continue
+
+        try:
+            payload = from_json(line)
+        except ValueError:
+            output.append(to_compact_json({"error": "Line is not valid JSON"}))
+            continue
+        if not isinstance(payload, dict):
+            output.append(to_compact_json({"error": "Line must be a JSON object"}))
+            continue
+
+        output.append(to_compact_json(operation(*args, payload)))
+    return "".join(line + "\n" for line in output)
+
+
+# operations run through the offloader: module-level, so that they can be
+# sent to a process pool along with their service
+
+
+def _encrypt(
+    service: EncryptionService, memo: ValueMemo | None, payload: dict[str, Any]
+) -> dict[str, Any]:
+    return service.encrypt_payload(payload, memo=memo)
+
+
+def _decrypt(
+    service: EncryptionService, memo: ValueMemo | None, payload: dict[str, Any]
+) -> dict[str, Any]:
+    return service.decrypt_payload(payload, memo=memo)
+
+
+@router.post(
+    "/encrypt",
+    summary="Encrypt an NDJSON stream",
+    description="Encrypts all properties at depth 1 of every line of an "
+    "application/x-ndjson body, streaming results back as they are produced.",
+    response_description="NDJSON stream of encrypted objects, one per input line",
+    response_class=DuplexStreamingResponse,
+    openapi_extra=NDJSON_REQUEST_BODY,
+)
+async def encrypt_stream(
+    request: Request,
+    encryption_service: EncryptionService = Depends(get_encryption_service),
+    offloader: CPUOffloader = Depends(get_offloader),
+) -> DuplexStreamingResponse:
+    """
+    Encrypt every line of an NDJSON body.
+
+    The body is read incrementally and the lines of each received chunk are
+    written back as soon as they are encrypted, so memory stays constant
+    whatever the input size. Values repeated across lines are encrypted once,
+    through a bounded memo (per chunk when offloaded to a process pool).
+    """
+    return DuplexStreamingResponse(
+        _transform_ndjson(
+            request,
+            offloader,
+            _encrypt,
+            encryption_service,
+            encryption_service.create_memo(),
+        ),
+        media_type=NDJSON_MEDIA_TYPE,
+    )
+
+
+@router.post(
+    "/decrypt",
+    summary="Decrypt an NDJSON stream",
+    description="Decrypts the properties that can be decrypted on every line of an "
+    "application/x-ndjson body, streaming results back as they are produced.",
+    response_description="NDJSON stream of decrypted objects, one per input line",
+    response_class=DuplexStreamingResponse,
+    openapi_extra=NDJSON_REQUEST_BODY,
+)
+async def decrypt_stream(
+    request: Request,
+    encryption_service: EncryptionService = Depends(get_encryption_service),
+    offloader: CPUOffloader = Depends(get_offloader),
+) -> DuplexStreamingResponse:
+    """
+    Decrypt every line of an NDJSON body.
+
+    Non-encrypted properties remain unchanged, exactly as with `/decrypt`.
+    """
+    return DuplexStreamingResponse(
+        _transform_ndjson(
+            request,
+            offloader,
+            _decrypt,
+            encryption_service,
+            encryption_service.create_memo(),
+        ),
+        media_type=NDJSON_MEDIA_TYPE,
+    )
@@ -0,0 +1,610 @@
+"""
+Offline bulk processing of JSON files, without the web server.
+
+    python -m src.bulk encrypt records.ndjson -o encrypted.ndjson
+    python -m src.bulk sign export.json --algorithm hmac-tree --workers 8
+
+The input is memory-mapped and split into chunks of about `--chunk-bytes`,
+which a process pool encrypts, decrypts, signs or verifies with the services
+of the DependencyContainer, configured like the application. Workers map the
+file themselves and only receive byte offsets; they also scan the ranges of
+a JSON array for the offsets of its elements. Results are written in input
+order, as the chunks complete, and progress and throughput are reported on
+stderr. Values are only deduplicated with `--memo` (see "Value
+Deduplication" in the README), once per chunk.
+
+Supported inputs, detected from the extension and first byte or forced with
+`--format`:
+- ndjson: one JSON object per line (.ndjson, .jsonl);
+- array: a JSON array of objects;
+- json: a single JSON object.
+The output has the same format. Records that cannot be processed are
+replaced by `{"error": "..."}` in place, and the exit status is then 1.
+"""
+
+import argparse
+import mmap
+import os
+import re
+import sys
+import time
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from dataclasses import dataclass, replace
+from typing import IO, Any, Callable, Iterator
+
+from src.services.value_memo import ValueMemo
+from src.utils import from_json, to_compact_json_bytes
+
+FORMATS = ("ndjson", "array", "json")
+OPERATIONS = ("encrypt", "decrypt", "sign", "verify")
+NDJSON_EXTENSIONS = (".ndjson", ".jsonl")
+
+DEFAULT_CHUNK_BYTES = 4 * 1024 * 1024
+# chunks submitted ahead of the one being written, per worker
+CHUNKS_IN_FLIGHT_PER_WORKER = 2
+PROGRESS_INTERVAL_SECONDS = 1.0
+
+# strings and structural characters of a JSON document, to find the elements
+# of a top-level array without parsing them. A string still open at the end
+# of the scanned range matches up to there.
+_ARRAY_TOKENS = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*(?:"|\Z)|[\[\]{},]', re.DOTALL)
+_STRING = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+# the rest of a string a range starts in, up to its closing quote
+_STRING_REST = re.compile(rb'[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+_ARRAY_START = re.compile(rb"\s*\[")
+_OPENING = frozenset(b"[{")
+_CLOSING = frozenset(b"]}")
+_COMMA = ord(",")
+_QUOTE = ord('"')
+_BACKSLASH = ord("\\")
+
+# operation of the worker process: (record, memo) -> compact JSON result
+RecordOperation = Callable[[Any, ValueMemo | None], bytes]
+_operation: RecordOperation | None = None
+# memo shared by the records of a chunk, with --memo
+_create_memo: Callable[[], ValueMemo | None] | None = None
+_buffer: mmap.mmap | None = None
+
+
+class InputError(Exception):
+    """An input file that is not in the expected format."""
+
+
+@dataclass(frozen=True)
+class Chunk:
+    """
+    A slice of the input for one worker: the records of an NDJSON file
+    between two offsets, or the spans of array elements (one span for a
+    single JSON object).
+    """
+
+    start: int
+    end: int
+    spans: tuple[tuple[int, int], ...] | None = None
+
+
+@dataclass(frozen=True)
+class ChunkResult:
+    output: list[bytes]
+    records: int
+    errors: int
+
+
+@dataclass(frozen=True)
+class RangeScan:
+    """
+    Structure of a byte range of a JSON array, scanned assuming it starts
+    inside a string or not. Depths are relative to the start of the range,
+    which is all a worker can know of it.
+    """
+
+    start: int
+    end: int
+    in_string: bool
+    ends_in_string: bool
+    # depth at the end of the range
+    depth: int
+    # lowest depth of a comma, and the commas at that depth
+    comma_depth: int
+    commas: list[int]
+    # (position, depth) of the closing brackets reaching a new lowest depth
+    lows: list[tuple[int, int]]
+
+
+def detect_format(path: str, buffer: mmap.mmap | bytes) -> str:
+    """Format of an input file, from its extension, then its first byte."""
+    if path.endswith(NDJSON_EXTENSIONS):
+        return "ndjson"
+    head = buffer[:64].lstrip()
+    if head.startswith(b"["):
+        return "array"
+    if path.endswith(".json"):
+        return "json"
+    return "ndjson"
+
+
+def iter_chunks(
+    buffer: mmap.mmap | bytes,
+    input_format: str,
+    chunk_bytes: int,
+    pool: Executor | None = None,
+    scans_in_flight: int = 1,
+) -> Iterator[Chunk]:
+    """
+    Split the input into chunks of whole records of about `chunk_bytes`.
+    The elements of an array are found by scanning ranges of the input on
+    `pool` (whose workers map it with `init_worker`), up to
+    `scans_in_flight` at a time, or in this process without one.
+    """
+    if not len(buffer):
+        return
+    if input_format == "ndjson":
+        yield from _ndjson_chunks(buffer, chunk_bytes)
+    elif input_format == "array":
+        spans = _array_spans(buffer, chunk_bytes, pool, scans_in_flight)
+        yield from _array_chunks(spans, chunk_bytes)
+    else:
+        yield Chunk(0, len(buffer), ((0, len(buffer)),))
+
+
+def _ndjson_chunks(buffer: mmap.mmap | bytes, chunk_bytes: int) -> Iterator[Chunk]:
+    start, size = 0, len(buffer)
+    while start < size:
+        end = start + chunk_bytes
+        if end >= size:
+            end = size
+        else:
+            newline = buffer.find(b"\n", end)
+            end = size if newline == -1 else newline + 1
+        yield Chunk(start, end)
+        start = end
+
+
+def _array_chunks(
+    spans: Iterator[tuple[int, int]], chunk_bytes: int
+) -> Iterator[Chunk]:
+    chunk_spans: list[tuple[int, int]] = []
+    for span in spans:
+        chunk_spans.append(span)
+        if span[1] - chunk_spans[0][0] >= chunk_bytes:
+            yield Chunk(chunk_spans[0][0], span[1], tuple(chunk_spans))
+            chunk_spans = []
+    if chunk_spans:
+        yield Chunk(chunk_spans[0][0], chunk_spans[-1][1], tuple(chunk_spans))
+
+
+def _array_spans(
+    buffer: mmap.mmap | bytes,
+    range_bytes: int,
+    pool: Executor | None,
+    scans_in_flight: int,
+) -> Iterator[tuple[int, int]]:
+    """
+    Offsets of the elements of a top-level JSON array. Only strings and
+    structural characters are visited, by a regex; elements are not
+    validated, parsing them does.
+
+    Ranges of about `range_bytes` are scanned independently (see
+    `scan_range`), then stitched in order: the depth and string state at the
+    start of a range follow from the ranges before it, which tells which of
+    its commas separate elements. Ranges end after a newline when there is
+    one, which valid JSON strings cannot hold, so they start outside a
+    string; a range guessed wrong is scanned again.
+    """
+    start = _ARRAY_START.match(buffer)
+    if start is None:
+        raise InputError("Input is not a JSON array")
+
+    ranges = _scan_ranges(buffer, range_bytes)
+    pending: deque[Future[RangeScan]] = deque()
+
+    def submit_scan() -> None:
+        bounds = next(ranges, None)
+        if bounds is not None:
+            pending.append(_submit_scan(buffer, pool, *bounds, False))
+
+    for _ in range(max(1, scans_in_flight)):
+        submit_scan()
+
+    depth, in_string = 0, False
+    element_start = start.end()
+    while pending:
+        scan = pending.popleft().result()
+        submit_scan()
+        if scan.in_string != in_string:
+            scan = scan_range(buffer, scan.start, scan.end, in_string)
+
+        end = next((pos for pos, low in scan.lows if depth + low == 0), None)
+        if depth + scan.comma_depth == 1:
+            for comma in scan.commas:
+                if end is not None and comma > end:
+                    break
+                yield element_start, comma
+                element_start = comma + 1
+        if end is not None:
+            if buffer[element_start:end].strip():
+                yield element_start, end
+            if buffer[end + 1 :].strip():
+                raise InputError("Unexpected data after the JSON array")
+            return
+        depth += scan.depth
+        in_string = scan.ends_in_string
+    raise InputError("Input is not a complete JSON array")
+
+
+def _scan_ranges(
+    buffer: mmap.mmap | bytes, range_bytes: int
+) -> Iterator[tuple[int, int]]:
+    """Cut the input into ranges, ending after a newline when possible."""
+    start, size = 0, len(buffer)
+    while start < size:
+        end = start + range_bytes
+        if end >= size:
+            end = size
+        else:
+            newline = buffer.find(b"\n", end, end + range_bytes)
+            if newline != -1:
+                end = newline + 1
+            # never cut an escape sequence in two
+            while end < size and buffer[end - 1] == _BACKSLASH:
+                end += 1
+        yield start, end
+        start = end
+
+
+def _submit_scan(
+    buffer: mmap.mmap | bytes,
+    pool: Executor | None,
+    start: int,
+    end: int,
+    in_string: bool,
+) -> Future[RangeScan]:
+    if pool is not None:
+        return pool.submit(scan_worker_range, start, end, in_string)
+    future: Future[RangeScan] = Future()
+    future.set_result(scan_range(buffer, start, end, in_string))
+    return future
+
+
+def scan_range(
+    buffer: mmap.mmap | bytes, start: int, end: int, in_string: bool
+) -> RangeScan:
+    """Scan a range of a JSON array, starting inside a string or not."""
+    position = start
+    if in_string:
+        string_end = _STRING_REST.match(buffer, start, end)
+        if string_end is None:
+            return RangeScan(start, end, True, True, 0, sys.maxsize, [], [])
+        position = string_end.end()
+
+    depth = 0
+    # the first range starts before the array, which its end brings back to 0
+    low = 1
+    comma_depth = sys.maxsize
+    commas: list[int] = []
+    lows: list[tuple[int, int]] = []
+    match = None
+    for match in _ARRAY_TOKENS.finditer(buffer, position, end):
+        position = match.start()
+        char = buffer[position]
+        if char == _QUOTE:
+            continue
+        if char in _OPENING:
+            depth += 1
+        elif char in _CLOSING:
+            depth -= 1
+            if depth < low:
+                low = depth
+                lows.append((position, depth))
+        elif depth < comma_depth:
+            comma_depth = depth
+            commas = [position]
+        elif depth == comma_depth:
+            commas.append(position)
+    # only the last string can still be open at the end of the range
+    ends_in_string = (
+        match is not None
+        and buffer[position] == _QUOTE
+        and _STRING.match(buffer, position, end) is None
+    )
+    return RangeScan(
+        start, end, in_string, ends_in_string, depth, comma_depth, commas, lows
+    )
+
+
+def scan_worker_range(start: int, end: int, in_string: bool) -> RangeScan:
+    """`scan_range` on the input mapped by the worker."""
+    assert _buffer is not None
+    return scan_range(_buffer, start, end, in_string)
+
+
+def process_chunk(chunk: Chunk) -> ChunkResult:
+    """Run the worker's operation on every record of a chunk."""
+    assert _buffer is not None and _operation is not None and _create_memo
+    if chunk.spans is None:
+        records = _buffer[chunk.start : chunk.end].split(b"\n")
+    else:
+        records = [_buffer[start:end] for start, end in chunk.spans]
+
+    output: list[bytes] = []
+    errors = 0
+    memo = _create_memo()
+    for record in records:
+        if not record.strip():
+            continue
+        try:
+            payload = from_json(record)
+        except ValueError:
+            payload = None
+            error = "Record is not valid JSON"
+        else:
+            error = (
+                None if isinstance(payload, dict) else "Record must be a JSON object"
+            )
+        if error is None:
+            try:
+                output.append(_operation(payload, memo))
+                continue
+            except ValueError as e:
+                error = str(e)
+        output.append(to_compact_json_bytes({"error": error}))
+        errors += 1
+    return ChunkResult(output, len(output), errors)
+
+
+def init_worker(
+    path: str, operation: str, algorithm: str | None, memo: bool = False
+) -> None:
+    """Map the input and resolve the service of the operation, once per worker."""
+    global _buffer, _operation, _create_memo
+    with open(path, "rb") as f:
+        _buffer = _map(f)
+    _operation, _create_memo = build_operation(operation, algorithm, memo)
+
+
+def build_operation(
+    operation: str, algorithm: str | None, memo: bool = False
+) -> tuple[RecordOperation, Callable[[], ValueMemo | None]]:
+    """
+    The operation on one record, with the container's service for it, and
+    the factory of the memo shared by the records of a chunk. Encryption
+    and decryption only deduplicate values with `memo`: records are
+    usually too small to pay for a memo of their own.
+    """
+    from src.core.algorithms import EncryptionAlgorithm, SigningAlgorithm
+    from src.core.dependencies import container
+
+    if operation in ("encrypt", "decrypt"):
+        name = algorithm or EncryptionAlgorithm.BASE64
+        services: dict[str, Any] = container.encryption_services
+    else:
+        name = algorithm or SigningAlgorithm.HMAC
+        services = container.signing_services
+    service = services.get(name)
+    if service is None:
+        raise InputError(
+            f"Unsupported algorithm for {operation}: {name!r}. "
+            f"Supported: {', '.join(services)}"
+        )
+    if operation in ("encrypt", "decrypt"):
+        if not memo:
+            service = replace(service, memo_max_entries=0)
+        create_memo = service.create_memo
+        if operation == "encrypt":
+            return service.encrypt_payload_json, create_memo
+        return (
+            lambda payload, memo: to_compact_json_bytes(
+                service.decrypt_payload(payload, memo=memo)
+            ),
+            create_memo,
+        )
+    if operation == "sign":
+        return (
+            lambda payload, memo: to_compact_json_bytes(service.sign_payload(payload)),
+            _no_memo,
+        )
+
+    def verify(payload: dict[str, Any], memo: ValueMemo | None) -> bytes:
+        signature, data = payload.get("signature"), payload.get("data")
+        if not isinstance(signature, str) or not isinstance(data, dict):
+            raise ValueError(
+                "Record must have a string 'signature' and an object 'data'"
+            )
+        valid = service.verify_payload(data, signature)
+        return b'{"valid":true}' if valid else b'{"valid":false}'
+
+    return verify, _no_memo
+
+
+def _no_memo() -> None:
+    return None
+
+
+class OutputWriter:
+    """Writes chunk results in the format of the input."""
+
+    def __init__(self, output: IO[bytes], output_format: str):
+        self.output = output
+        self.format = output_format
+        self.records = 0
+
+    def write(self, result: ChunkResult) -> None:
+        if not result.output:
+            return
+        if self.format == "ndjson":
+            self.output.write(b"\n".join(result.output) + b"\n")
+        else:
+            separator = b",\n" if self.records else b"[\n"
+            if self.format == "json":
+                separator = b""
+            self.output.write(separator + b",\n".join(result.output))
+        self.records += result.records
+
+    def close(self) -> None:
+        if self.format == "array":
+            self.output.write(b"\n]\n" if self.records else b"[]\n")
+        elif self.format == "json" and self.records:
+            self.output.write(b"\n")
+        self.output.flush()
+
+
+class ProgressReporter:
+    """Reports progress and throughput on a text stream."""
+
+    def __init__(self, stream: IO[str] | None, total_bytes: int):
+        self.stream = stream
+        self.total_bytes = total_bytes
+        self.bytes = 0
+        self.records = 0
+        self.errors = 0
+        self.started = time.perf_counter()
+        self._reported = self.started
+
+    def update(self, chunk: Chunk, result: ChunkResult) -> None:
+        self.bytes += chunk.end - chunk.start
+        self.records += result.records
+        self.errors += result.errors
+        now = time.perf_counter()
+        if now - self._reported >= PROGRESS_INTERVAL_SECONDS:
+            self._reported = now
+            self._print(
+                f"{self.bytes / self.total_bytes:.0%} "
+                f"({_mib(self.bytes):.1f}/{_mib(self.total_bytes):.1f} MiB), "
+                f"{self.records:,} records, {self._rate(now):.1f} MiB/s"
+            )
+
+    def finish(self, operation: str) -> None:
+        now = time.perf_counter()
+        elapsed = now - self.started
+        self._print(
+            f"{operation}: {self.records:,} records ({_mib(self.bytes):.1f} MiB) "
+            f"in {elapsed:.2f} s, {self._rate(now):.1f} MiB/s, "
+            f"{self.records / elapsed if elapsed else 0:,.0f} records/s, "
+            f"{self.errors:,} errors"
+        )
+
+    def _rate(self, now: float) -> float:
+        elapsed = now - self.started
+        return _mib(self.bytes) / elapsed if elapsed else 0.0
+
+    def _print(self, line: str) -> None:
+        if self.stream is not None:
+            print(line, file=self.stream, flush=True)
+
+
+def run(
+    operation: str,
+    path: str,
+    output: IO[bytes],
+    input_format: str | None = None,
+    algorithm: str | None = None,
+    workers: int | None = None,
+    chunk_bytes: int = DEFAULT_CHUNK_BYTES,
+    progress: IO[str] | None = None,
+    memo: bool = False,
+) -> ProgressReporter:
+    """
+    Process the file at `path` into `output` and return the final counts.
+    Raises InputError on inputs that cannot be split into records.
+    """
+    # fail on a bad algorithm before starting any worker
+    build_operation(operation, algorithm)
+    with open(path, "rb") as f:
+        buffer = _map(f)
+    try:
+        input_format = input_format or detect_format(path, buffer)
+        writer = OutputWriter(output, input_format)
+        reporter = ProgressReporter(progress, len(buffer))
+
+        workers = workers or os.cpu_count() or 1
+        in_flight = workers * CHUNKS_IN_FLIGHT_PER_WORKER
+        with ProcessPoolExecutor(
+            workers,
+            initializer=init_worker,
+            initargs=(path, operation, algorithm, memo),
+        ) as pool:
+            chunks = iter_chunks(buffer, input_format, chunk_bytes, pool, in_flight)
+            pending: deque[tuple[Chunk, Future[ChunkResult]]] = deque()
+            for chunk in chunks:
+                pending.append((chunk, pool.submit(process_chunk, chunk)))
+                if len(pending) >= in_flight:
+                    _write_next(pending, writer, reporter)
+            while pending:
+                _write_next(pending, writer, reporter)
+        writer.close()
+    finally:
+        if isinstance(buffer, mmap.mmap):
+            buffer.close()
+    reporter.finish(operation)
+    return reporter
+
+
+def _write_next(
+    pending: deque[tuple[Chunk, Future[ChunkResult]]],
+    writer: OutputWriter,
+    reporter: ProgressReporter,
+) -> None:
+    chunk, future = pending.popleft()
+    result = future.result()
+    writer.write(result)
+    reporter.update(chunk, result)
+
+
+def _map(f: IO[bytes]) -> mmap.mmap | bytes:
+    """Map a file read-only; empty files cannot be mapped."""
+    if os.fstat(f.fileno()).st_size == 0:
+        return b""
+    return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _mib(size: int) -> float:
+    return size / (1024 * 1024)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m src.bulk",
+        description="Encrypt, decrypt, sign or verify the records of a file.",
+    )
+    parser.add_argument("operation", choices=OPERATIONS)
+    parser.add_argument("input", help="JSON, NDJSON or JSON array file")
+    parser.add_argument("-o", "--output", help="output file, stdout by default")
+    parser.add_argument("--format", choices=FORMATS, help="detected by default")
+    parser.add_argument(
+        "--algorithm", help="as in the X-*-Algorithm headers, the default if unset"
+    )
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-bytes", type=int, default=DEFAULT_CHUNK_BYTES)
+    parser.add_argument("--quiet", action="store_true", help="no progress report")
+    parser.add_argument(
+        "--memo",
+        action="store_true",
+        help="deduplicate the values of each chunk (encrypt and decrypt)",
+    )
+    args = parser.parse_args(argv)
+
+    output = open(args.output, "wb") if args.output else sys.stdout.buffer
+    try:
+        reporter = run(
+            args.operation,
+            args.input,
+            output,
+            input_format=args.format,
+            algorithm=args.algorithm,
+            workers=args.workers,
+            chunk_bytes=args.chunk_bytes,
+            progress=None if args.quiet else sys.stderr,
+            memo=args.memo,
+        )
+    except (InputError, OSError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if args.output:
+            output.close()
+    return 1 if reporter.errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
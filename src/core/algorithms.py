@@ -4,7 +4,9 @@ from enum import StrEnum
 class EncryptionAlgorithm(StrEnum):
     BASE64 = "base64"
     ROT13 = "rot13"
+    AEAD = "aead"
 
 
 class SigningAlgorithm(StrEnum):
     HMAC = "hmac"
+    HMAC_TREE = "hmac-tree"
@@ -1,34 +1,153 @@
+import binascii
 from typing import Annotated
 
-from fastapi import Header
+from fastapi import Header, HTTPException, status
 
 from src.core.algorithms import EncryptionAlgorithm, SigningAlgorithm
+from src.core.metrics import StageObserver, metrics
+from src.core.offload import AdmissionGate, CPUOffloader, LazyExecutor
 from src.core.settings import settings
 from src.services.base64_encryption import Base64EncryptionService
 from src.services.encryption_service import EncryptionService
 from src.services.hmac_signing import HMACSigningService
+from src.services.hmac_tree_signing import HMACTreeSigningService
+from src.services.protocols import EncryptionProtocol, SigningProtocol
 from src.services.rot13_encryption import ROT13EncryptionService
-from src.services.signing_service import SigningService
+from src.services.signing_service import SigningService, TreeSigningService
 
 
 class DependencyContainer:
+    """
+    Registry of preconstructed services, keyed by algorithm name.
+
+    Services are built once at startup and shared by every request, so they
+    must be thread-safe (the built-in ones are stateless). Third-party
+    algorithms can be added at startup with `register_encryption_algorithm`
+    and `register_signing_algorithm`, then selected through the usual headers.
+
+    Optional algorithms are only imported when configured, and worker pools
+    only start on first use, so the container can be built before the server
+    forks its workers.
+    """
+
     def __init__(self):
-        # Initialize algorithm implementations
-        self.encryption_algorithm = Base64EncryptionService()
-        self.signing_algorithm = HMACSigningService(settings.HMAC_SECRET_KEY)
+        self.encryption_services: dict[str, EncryptionService] = {}
+        self.signing_services: dict[str, SigningService] = {}
+        self.encryption_executor = self._build_encryption_executor()
+
+        self.register_encryption_algorithm(
+            EncryptionAlgorithm.BASE64, Base64EncryptionService()
+        )
+        self.register_encryption_algorithm(
+            EncryptionAlgorithm.ROT13, ROT13EncryptionService()
+        )
+        if settings.AEAD_KEY:
+            self._register_aead()
+
+        hmac_algorithm = HMACSigningService(
+            settings.HMAC_SECRET_KEY,
+            keys=settings.HMAC_KEYS,
+            active_key_id=settings.HMAC_ACTIVE_KEY_ID,
+        )
+        hmac_signing: SigningProtocol = hmac_algorithm
+        if settings.SIGNATURE_CACHE_ENABLED:
+            from src.services.signature_cache import CachedSigningService
+
+            hmac_signing = CachedSigningService(
+                hmac_algorithm,
+                max_entries=settings.SIGNATURE_CACHE_MAX_ENTRIES,
+                max_bytes=settings.SIGNATURE_CACHE_MAX_BYTES,
+                ttl_seconds=settings.SIGNATURE_CACHE_TTL_SECONDS,
+            )
+        self.register_signing_algorithm(SigningAlgorithm.HMAC, hmac_signing)
+
+        hmac_tree = HMACTreeSigningService(
+            hmac_algorithm,
+            settings.HMAC_SECRET_KEY,
+            max_entries=settings.SIGNATURE_TREE_CACHE_MAX_ENTRIES,
+            max_bytes=settings.SIGNATURE_TREE_CACHE_MAX_BYTES,
+        )
+        self.register_signing_algorithm(SigningAlgorithm.HMAC_TREE, hmac_tree)
+        self.tree_signing_service = TreeSigningService(
+            hmac_tree, observer=self._observer(SigningAlgorithm.HMAC_TREE)
+        )
+
+        self.offloader = CPUOffloader(
+            mode=settings.EXECUTION_MODE,
+            executor=settings.OFFLOAD_EXECUTOR,
+            threshold_bytes=settings.OFFLOAD_THRESHOLD_BYTES,
+            max_workers=settings.OFFLOAD_MAX_WORKERS,
+            gate=self._build_admission_gate(),
+        )
+
+    def register_encryption_algorithm(
+        self, name: str, algorithm: EncryptionProtocol
+    ) -> None:
+        """Register (or replace) the encryption algorithm served under `name`."""
+        self.encryption_services[name] = EncryptionService(
+            algorithm,
+            executor=self.encryption_executor,
+            parallel_min_keys=settings.PARALLEL_ENCRYPTION_MIN_KEYS,
+            chunk_size=settings.PARALLEL_ENCRYPTION_CHUNK_SIZE,
+            observer=self._observer(name),
+            memo_max_entries=settings.ENCRYPTION_MEMO_MAX_ENTRIES,
+            memo_max_bytes=settings.ENCRYPTION_MEMO_MAX_BYTES,
+        )
+
+    def register_signing_algorithm(self, name: str, algorithm: SigningProtocol) -> None:
+        """Register (or replace) the signing algorithm served under `name`."""
+        self.signing_services[name] = SigningService(
+            algorithm, observer=self._observer(name)
+        )
+
+    def shutdown(self) -> None:
+        """Stop the worker pools owned by the container."""
+        self.offloader.shutdown()
+        if self.encryption_executor is not None:
+            self.encryption_executor.shutdown(wait=True, cancel_futures=True)
+
+    def _register_aead(self) -> None:
+        """Serve the AEAD algorithm, if the cryptography package is installed."""
+        from src.services.aead_encryption import AESGCM, AEADEncryptionService
 
-        # Initialize services
-        self.encryption_service = EncryptionService(self.encryption_algorithm)
-        self.signing_service = SigningService(self.signing_algorithm)
+        if AESGCM is not None:
+            self.register_encryption_algorithm(
+                EncryptionAlgorithm.AEAD,
+                AEADEncryptionService(
+                    binascii.a2b_base64(settings.AEAD_KEY), settings.AEAD_CIPHER
+                ),
+            )
+
+    def _observer(self, name: str) -> StageObserver | None:
+        """Stage timing hook for the services registered under `name`."""
+        return metrics.observer(name) if settings.METRICS_ENABLED else None
+
+    def _build_admission_gate(self) -> AdmissionGate | None:
+        """Admission control of the CPU work, if enabled."""
+        if settings.ADMISSION_MAX_IN_FLIGHT <= 0:
+            return None
+        return AdmissionGate(
+            settings.ADMISSION_MAX_IN_FLIGHT,
+            max_queued=settings.ADMISSION_MAX_QUEUED,
+            queue_timeout=settings.ADMISSION_QUEUE_TIMEOUT_SECONDS,
+            shed_status=settings.ADMISSION_SHED_STATUS,
+        )
+
+    def _build_encryption_executor(self) -> LazyExecutor | None:
+        """Worker pool for parallel per-key encryption, if enabled."""
+        workers = settings.PARALLEL_ENCRYPTION_WORKERS
+        if workers <= 0:
+            return None
+        return LazyExecutor(
+            settings.PARALLEL_ENCRYPTION_EXECUTOR, workers, "encryption"
+        )
 
 
 container = DependencyContainer()
 
 
 def get_encryption_service(
-    x_encryption_algorithm: Annotated[
-        EncryptionAlgorithm, Header()
-    ] = EncryptionAlgorithm.BASE64,
+    x_encryption_algorithm: Annotated[str, Header()] = EncryptionAlgorithm.BASE64,
 ) -> EncryptionService:
     """
     Get encryption service based on algorithm specified in header.
@@ -36,18 +155,52 @@ def get_encryption_service(
     Supports:
     - base64: Base64 encoding (default)
     - rot13: ROT13 encoding (demo purpose 🧪)
+    - aead: AES-GCM / ChaCha20-Poly1305, when AEAD_KEY is configured
+    - any algorithm registered on the container at startup
     """
+    service = container.encryption_services.get(x_encryption_algorithm)
+    if service is None:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Unsupported encryption algorithm: {x_encryption_algorithm!r}. "
+            f"Supported: {', '.join(container.encryption_services)}",
+        )
+    return service
 
-    match x_encryption_algorithm:
-        case EncryptionAlgorithm.ROT13:
-            algorithm = ROT13EncryptionService()
-        case EncryptionAlgorithm.BASE64:
-            algorithm = Base64EncryptionService()
 
-    return EncryptionService(algorithm)
+def encryption_algorithm_names() -> str:
+    """
+    Names accepted in X-Encryption-Algorithm, for the route docs: the built-in
+    algorithms (aead once AEAD_KEY is configured) and any registered so far.
+    """
+    names = dict.fromkeys([*EncryptionAlgorithm, *container.encryption_services])
+    return "|".join(names)
 
 
 def get_signing_service(
-    x_signing_algorithm: Annotated[SigningAlgorithm, Header()] = SigningAlgorithm.HMAC,
+    x_signing_algorithm: Annotated[str, Header()] = SigningAlgorithm.HMAC,
 ) -> SigningService:
-    return container.signing_service
+    """
+    Get signing service based on algorithm specified in header.
+
+    Supports:
+    - hmac: HMAC-SHA256 (default)
+    - hmac-tree: HMAC-SHA256 over per-key HMAC-SHA256 digests
+    - any algorithm registered on the container at startup
+    """
+    service = container.signing_services.get(x_signing_algorithm)
+    if service is None:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Unsupported signing algorithm: {x_signing_algorithm!r}. "
+            f"Supported: {', '.join(container.signing_services)}",
+        )
+    return service
+
+
+def get_tree_signing_service() -> TreeSigningService:
+    return container.tree_signing_service
+
+
+def get_offloader() -> CPUOffloader:
+    return container.offloader
@@ -0,0 +1,95 @@
+from itertools import accumulate, compress, repeat
+from operator import eq, sub
+
+from fastapi import status
+from starlette.exceptions import HTTPException
+
+_OPEN = b"{["
+_CLOSE = b"}]"
+_COLON = ord(":")
+_STRUCTURAL = b"{}[]:"
+_NOT_STRUCTURAL = bytes(set(range(256)) - set(_STRUCTURAL))
+# depth change of each structural byte, shifted by one to stay unsigned
+_DEPTH_DELTA = bytes.maketrans(_OPEN + _CLOSE + b":", b"\x02\x02\x00\x00\x01")
+
+
+class BodyLimitExceeded(HTTPException):
+    """
+    Raised while reading a request body that breaks one of the limits.
+
+    An `HTTPException`, so that FastAPI re-raises it from its own body
+    parsing instead of turning it into a generic 400.
+    """
+
+    def __init__(self, detail: str):
+        super().__init__(status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail)
+
+
+class JSONShapeScanner:
+    """
+    Incremental check of the nesting depth and top-level key count of a JSON
+    document, fed with the body chunks as they arrive.
+
+    Only structural characters outside of strings are looked at, with
+    C-level `bytes` operations: nothing is parsed or buffered
+    beyond the current chunk. The input is not validated, the parser still
+    rejects malformed documents; the scanner only stops oversized ones
+    before they are buffered whole.
+    """
+
+    def __init__(self, max_depth: int, max_top_level_keys: int):
+        self.max_depth = max_depth
+        self.max_top_level_keys = max_top_level_keys
+        self.depth = 0
+        self.top_level_keys = 0
+        self._in_string = False
+        self._escape_pending = False
+
+    def feed(self, chunk: bytes) -> None:
+        """Scan the next chunk; raises BodyLimitExceeded on a broken limit."""
+        if self._escape_pending:
+            if not chunk:
+                return
+            # escaped by the backslash that ended the previous chunk
+            chunk = chunk[1:]
+            self._escape_pending = False
+        if b"\\" in chunk:
+            # drop escaped backslashes, then escaped quotes: the quotes left
+            # all open or close a string
+            chunk = chunk.replace(b"\\\\", b"").replace(b'\\"', b"")
+            if chunk.endswith(b"\\"):
+                self._escape_pending = True
+                chunk = chunk[:-1]
+
+        parts = chunk.split(b'"')
+        outside = b"".join(parts[self._in_string :: 2])
+        self._in_string ^= len(parts) % 2 == 0
+
+        structure = outside.translate(None, _NOT_STRUCTURAL)
+        if structure:
+            self._scan_structure(structure)
+
+    def _scan_structure(self, structure: bytes) -> None:
+        # depth after each structural character
+        depths = list(
+            accumulate(
+                map(sub, structure.translate(_DEPTH_DELTA), repeat(1)),
+                initial=self.depth,
+            )
+        )
+        del depths[0]
+        self.depth = depths[-1]
+
+        if self.max_depth and max(depths) > self.max_depth:
+            raise BodyLimitExceeded(
+                f"Request body is nested deeper than {self.max_depth} levels"
+            )
+        if self.max_top_level_keys and structure.count(_COLON):
+            # colons at depth 1 separate the keys and values of the top level
+            colon_depths = compress(depths, map(eq, structure, repeat(_COLON)))
+            self.top_level_keys += list(colon_depths).count(1)
+            if self.top_level_keys > self.max_top_level_keys:
+                raise BodyLimitExceeded(
+                    "Request body has more than "
+                    f"{self.max_top_level_keys} top-level keys"
+                )
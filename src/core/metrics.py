@@ -0,0 +1,226 @@
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar, Token
+from typing import Any, Iterable
+
+# Prometheus histogram buckets, in seconds: the crypto routes take tens of
+# microseconds for small bodies and up to seconds for very large ones
+DEFAULT_BUCKETS = (
+    0.00005,
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+# label of requests that did not match any route, so that scanners hitting
+# random paths cannot grow the number of series
+UNMATCHED_ROUTE = "unmatched"
+
+
+class Histogram:
+    """
+    Thread-safe Prometheus histogram with a fixed set of label names.
+
+    Series are created on first observation. Only bounded values (route
+    templates, registered algorithm names, stage names) should be used as
+    label values.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: tuple[str, ...],
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        # per series: one count per bucket (non-cumulative, +Inf last), sum
+        self._series: dict[tuple[str, ...], tuple[list[int], list[float]]] = {}
+
+    def observe(self, labels: tuple[str, ...], value: float) -> None:
+        """Record a value for the series identified by `labels`."""
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = ([0] * (len(self.buckets) + 1), [0.0])
+            series[0][index] += 1
+            series[1][0] += value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+    def render(self) -> Iterable[str]:
+        """Yield the histogram in the Prometheus text exposition format."""
+        with self._lock:
+            series = {
+                labels: (list(counts), total[0])
+                for labels, (counts, total) in self._series.items()
+            }
+
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+        bounds = [_format_float(bound) for bound in self.buckets] + ["+Inf"]
+        for labels, (counts, total) in sorted(series.items()):
+            label_text = ",".join(
+                f'{name}="{_escape_label(value)}"'
+                for name, value in zip(self.label_names, labels)
+            )
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                yield f'{self.name}_bucket{{{label_text},le="{bound}"}} {cumulative}'
+            yield f"{self.name}_sum{{{label_text}}} {_format_float(total)}"
+            yield f"{self.name}_count{{{label_text}}} {cumulative}"
+
+
+class RequestTiming:
+    """
+    Timing state of the request being served, shared between the metrics
+    middleware and the service hooks through a context variable.
+    """
+
+    __slots__ = (
+        "scope",
+        "start",
+        "first_stage_start",
+        "last_stage_end",
+        "algorithm",
+        "token",
+    )
+
+    def __init__(self, scope: dict[str, Any], start: float):
+        self.scope = scope
+        self.start = start
+        self.first_stage_start: float | None = None
+        self.last_stage_end: float | None = None
+        self.algorithm = ""
+        self.token: Token[RequestTiming | None] | None = None
+
+    @property
+    def route(self) -> str:
+        route = self.scope.get("route")
+        return getattr(route, "path", UNMATCHED_ROUTE)
+
+
+_current_request: ContextVar[RequestTiming | None] = ContextVar(
+    "current_request", default=None
+)
+
+
+class MetricsRegistry:
+    """
+    Per-stage request timings, labeled by stage, route and algorithm.
+
+    Stages recorded for every request:
+    - request: from the first byte received to the last byte sent;
+    - parse: from the start of the request to the first service stage, i.e.
+      reading and validating the body, resolving dependencies and handing the
+      work to a thread or worker;
+    - response: from the end of the last service stage to the last byte sent,
+      i.e. response validation, serialization and sending.
+
+    Services report their own stages (encrypt, decrypt, sign, verify,
+    render...) through `observer`. Work sent to a process pool is not
+    reported, it shows up in the parse stage instead.
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.stage_seconds = Histogram(
+            "crypto_stage_duration_seconds",
+            "Time spent in each stage of a request.",
+            ("stage", "route", "algorithm"),
+            buckets,
+        )
+
+    def observer(self, algorithm: str) -> "StageObserver":
+        """Build the hook a service registered under `algorithm` reports to."""
+        return StageObserver(self, algorithm)
+
+    def start_request(self, scope: dict[str, Any]) -> RequestTiming:
+        """Start timing a request, to be ended with `end_request`."""
+        timing = RequestTiming(scope, time.perf_counter())
+        timing.token = _current_request.set(timing)
+        return timing
+
+    def end_request(self, timing: RequestTiming) -> None:
+        """Record the request-level stages of a request started here."""
+        end = time.perf_counter()
+        if timing.token is not None:
+            _current_request.reset(timing.token)
+        route, algorithm = timing.route, timing.algorithm
+        observe = self.stage_seconds.observe
+        observe(("request", route, algorithm), end - timing.start)
+        if timing.first_stage_start is not None:
+            observe(
+                ("parse", route, algorithm), timing.first_stage_start - timing.start
+            )
+            observe(("response", route, algorithm), end - timing.last_stage_end)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        return "\n".join(self.stage_seconds.render()) + "\n"
+
+    def clear(self) -> None:
+        self.stage_seconds.clear()
+
+
+class StageObserver:
+    """Hook a service reports its stage timings to (`StageObserverProtocol`)."""
+
+    __slots__ = ("registry", "algorithm")
+
+    def __init__(self, registry: MetricsRegistry, algorithm: str):
+        self.registry = registry
+        self.algorithm = algorithm
+
+    def __reduce__(self):
+        # worker processes have no request to attach timings to
+        return (_no_observer, ())
+
+    def observe(self, stage: str, start: float, end: float) -> None:
+        timing = _current_request.get()
+        if timing is None:
+            # service used outside of an instrumented request
+            route = ""
+        else:
+            if timing.first_stage_start is None:
+                timing.first_stage_start = start
+            timing.last_stage_end = end
+            timing.algorithm = self.algorithm
+            route = timing.route
+        self.registry.stage_seconds.observe((stage, route, self.algorithm), end - start)
+
+
+def _no_observer() -> None:
+    return None
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_float(value: float) -> str:
+    return repr(float(value))
+
+
+metrics = MetricsRegistry()
@@ -1,19 +1,303 @@
-from typing import Callable
+import zlib
 
-from fastapi import HTTPException, Request, status
-from fastapi.responses import Response
+from fastapi import FastAPI, Request, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import ValidationError
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
+from src.core.limits import BodyLimitExceeded, JSONShapeScanner
+from src.core.metrics import MetricsRegistry, metrics
+from src.core.settings import settings
+from src.core.wire import is_msgpack
+from src.services.exceptions import DecryptionError
 
-def value_error_handler(
-    request: Request, call_next: Callable[[Request], Response]
-) -> Response:
+try:
+    import zstandard
+except ImportError:  # optional response encoding, see README
+    zstandard = None
+
+# bodies streamed line by line, bounded per line by the streaming routes
+NDJSON_MEDIA_TYPE = b"application/x-ndjson"
+STREAM_PATH_PREFIX = "/stream/"
+
+
+def register_error_handlers(app: FastAPI) -> None:
+    """
+    Convert errors raised by endpoints and services to HTTP 400 responses,
+    which eliminates the need for try-catch blocks in every endpoint.
+
+    The handlers are dispatched by the exception middleware Starlette wraps
+    around the router of every application, so unlike an
+    `app.middleware("http")` middleware they add no layer to the stack: a
+    request that does not fail pays nothing, and responses are streamed
+    straight through. Request validation errors keep their 422 responses.
+    """
+    app.add_exception_handler(DecryptionError, decryption_error_handler)
+    app.add_exception_handler(ValidationError, validation_error_handler)
+    app.add_exception_handler(ValueError, value_error_handler)
+
+
+async def decryption_error_handler(
+    request: Request, exc: DecryptionError
+) -> JSONResponse:
+    return _bad_request(exc.message)
+
+
+async def validation_error_handler(
+    request: Request, exc: ValidationError
+) -> JSONResponse:
+    """Validation of data built by the application, not of the request body."""
+    return _bad_request(jsonable_encoder(exc.errors(include_url=False)))
+
+
+async def value_error_handler(request: Request, exc: ValueError) -> JSONResponse:
+    return _bad_request(str(exc))
+
+
+def _bad_request(detail: object) -> JSONResponse:
+    # same body as `HTTPException(400, detail)`
+    return JSONResponse({"detail": detail}, status_code=status.HTTP_400_BAD_REQUEST)
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware timing every HTTP request into a metrics registry.
+
+    Unlike `app.middleware("http")` middlewares, it neither wraps the request
+    in a task nor buffers the response stream: the only per-request work is
+    two clock readings and the histogram updates.
+    """
+
+    def __init__(self, app: ASGIApp, registry: MetricsRegistry = metrics):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        timing = self.registry.start_request(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.registry.end_request(timing)
+
+
+class BodyLimitMiddleware:
+    """
+    Pure ASGI middleware enforcing the request body limits of the settings
+    (MAX_BODY_BYTES, MAX_JSON_DEPTH and MAX_TOP_LEVEL_KEYS) while the body
+    streams in, so an oversized body is rejected with a 413 before it is
+    buffered, parsed or handed to a service.
+
+    A Content-Length above the limit is answered right away. Otherwise the
+    chunks are counted and scanned as the application reads them, and the
+    first chunk breaking a limit raises `BodyLimitExceeded`. NDJSON bodies
+    sent to the streaming routes are only held to STREAM_MAX_BODY_BYTES:
+    those routes bound each line instead. msgpack bodies are only held to
+    the size limit, the JSON shape scan does not apply to them.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        max_bytes = settings.MAX_BODY_BYTES
+        content_length: int | None = None
+        json_body = True
+        for name, value in scope["headers"]:
+            if name == b"content-type":
+                if value.startswith(NDJSON_MEDIA_TYPE) and scope["path"].startswith(
+                    STREAM_PATH_PREFIX
+                ):
+                    max_bytes = settings.STREAM_MAX_BODY_BYTES
+                    json_body = False
+                else:
+                    json_body = not is_msgpack(value.decode("latin-1"))
+            elif name == b"content-length" and value.isdigit():
+                content_length = int(value)
+
+        if max_bytes and content_length is not None and content_length > max_bytes:
+            response = JSONResponse(
+                {"detail": _body_size_detail(max_bytes)},
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            )
+            await response(scope, receive, send)
+            return
+
+        scanner = None
+        if json_body and (settings.MAX_JSON_DEPTH or settings.MAX_TOP_LEVEL_KEYS):
+            scanner = JSONShapeScanner(
+                settings.MAX_JSON_DEPTH, settings.MAX_TOP_LEVEL_KEYS
+            )
+        if not max_bytes and scanner is None:
+            await self.app(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                body = message.get("body", b"")
+                received += len(body)
+                if max_bytes and received > max_bytes:
+                    raise BodyLimitExceeded(_body_size_detail(max_bytes))
+                if scanner is not None:
+                    scanner.feed(body)
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+def _body_size_detail(max_bytes: int) -> str:
+    return f"Request body exceeds the maximum of {max_bytes} bytes"
+
+
+class CompressionMiddleware:
     """
-    Middleware to catch ValueError exceptions and convert them to HTTP 400 responses.
-    This eliminates the need for try-catch blocks in every endpoint.
+    Pure ASGI middleware compressing response bodies of at least
+    COMPRESSION_MIN_BYTES with zstd or gzip, as negotiated with the
+    Accept-Encoding header. zstd is preferred when the zstandard package is
+    installed. Smaller bodies are sent as-is, the framing would eat the gain.
+
+    Streamed responses are compressed chunk by chunk, with a flush after each
+    chunk so NDJSON lines still reach the client as they are produced. Bodies
+    of at least OFFLOAD_THRESHOLD_BYTES are compressed in the threadpool, off
+    the event loop: both compressors release the GIL.
     """
-    try:
-        return call_next(request)
-    except ValueError as e:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)
-        ) from e
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        encoding = None
+        if scope["type"] == "http":
+            encoding = _accepted_encoding(scope["headers"])
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await self.app(scope, receive, _CompressingSender(send, encoding).send)
+
+
+class _CompressingSender:
+    """`send` of a response compressed by `CompressionMiddleware`."""
+
+    def __init__(self, send: Send, encoding: str):
+        self.next_send = send
+        self.encoding = encoding
+        self.start: Message | None = None
+        self.compressor: _Compressor | None = None
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            # held back until the first body chunk tells whether to compress
+            self.start = message
+            return
+        if message["type"] != "http.response.body":
+            await self._send_start()
+        elif self.start is not None:
+            await self._send_first_body(message)
+            return
+        elif self.compressor is not None:
+            more_body = message.get("more_body", False)
+            body = self.compressor.compress(message.get("body", b""), not more_body)
+            message = {
+                "type": "http.response.body",
+                "body": body,
+                "more_body": more_body,
+            }
+        await self.next_send(message)
+
+    async def _send_first_body(self, message: Message) -> None:
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        headers = MutableHeaders(raw=self.start["headers"])
+        if "content-encoding" in headers or (
+            not more_body and len(body) < settings.COMPRESSION_MIN_BYTES
+        ):
+            await self._send_start()
+            await self.next_send(message)
+            return
+
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        self.compressor = _Compressor(self.encoding)
+        if more_body:
+            # streamed: the total size is unknown
+            del headers["Content-Length"]
+            body = self.compressor.compress(body)
+        else:
+            if len(body) >= settings.OFFLOAD_THRESHOLD_BYTES:
+                body = await run_in_threadpool(self.compressor.compress, body, True)
+            else:
+                body = self.compressor.compress(body, True)
+            headers["Content-Length"] = str(len(body))
+        await self._send_start()
+        await self.next_send(
+            {"type": "http.response.body", "body": body, "more_body": more_body}
+        )
+
+    async def _send_start(self) -> None:
+        if self.start is not None:
+            start, self.start = self.start, None
+            await self.next_send(start)
+
+
+class _Compressor:
+    """Incremental gzip or zstd compressor for one response body."""
+
+    def __init__(self, encoding: str):
+        if encoding == "zstd":
+            compressor = zstandard.ZstdCompressor(level=settings.COMPRESSION_ZSTD_LEVEL)
+            self._compressobj = compressor.compressobj()
+            self._flush_mode = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        else:
+            self._compressobj = zlib.compressobj(
+                settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, _GZIP_WBITS
+            )
+            self._flush_mode = zlib.Z_SYNC_FLUSH
+
+    def compress(self, data: bytes, final: bool = False) -> bytes:
+        """Compress a chunk, flushed so the client can decode it right away."""
+        compressed = self._compressobj.compress(data)
+        if final:
+            return compressed + self._compressobj.flush()
+        return compressed + self._compressobj.flush(self._flush_mode)
+
+
+def _accepted_encoding(headers: list[tuple[bytes, bytes]]) -> str | None:
+    """The response encoding to use per the Accept-Encoding header, if any."""
+    for name, value in headers:
+        if name != b"accept-encoding":
+            continue
+        qualities: dict[str, float] = {}
+        for coding in value.decode("latin-1").lower().split(","):
+            coding, _, params = coding.partition(";")
+            quality = 1.0
+            params = params.replace(" ", "")
+            if params.startswith("q="):
+                try:
+                    quality = float(params[2:])
+                except ValueError:
+                    quality = 0.0
+            qualities[coding.strip()] = quality
+        wildcard = qualities.get("*", 0.0)
+        if zstandard is not None and qualities.get("zstd", wildcard) > 0:
+            return "zstd"
+        if qualities.get("gzip", wildcard) > 0:
+            return "gzip"
+        return None
+    return None
+
+
+# gzip container around the deflate stream
+_GZIP_WBITS = 16 + zlib.MAX_WBITS
@@ -0,0 +1,201 @@
+import asyncio
+import os
+import threading
+from collections import deque
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from typing import Any, Callable, Literal, TypeVar
+
+from fastapi import status
+from starlette.concurrency import run_in_threadpool
+from starlette.exceptions import HTTPException
+from starlette.requests import HTTPConnection
+
+T = TypeVar("T")
+
+
+def request_body_size(request: HTTPConnection) -> int | None:
+    """
+    Size of the request body as announced by the client, if any, to pass to
+    `CPUOffloader.run`.
+    """
+    content_length = request.headers.get("content-length")
+    return int(content_length) if content_length and content_length.isdigit() else None
+
+
+class AdmissionGate:
+    """
+    Bounds the CPU work in flight, so latency stays predictable under load.
+
+    Up to `max_in_flight` calls run at once. Further calls wait in a FIFO
+    queue of at most `max_queued` entries, for at most `queue_timeout`
+    seconds; calls that find the queue full or time out are shed with an
+    HTTP `shed_status` (503 or 429) and a Retry-After header, instead of
+    piling up behind work the server cannot keep up with.
+
+    All methods must be called from the event loop thread.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int,
+        max_queued: int = 100,
+        queue_timeout: float = 1.0,
+        shed_status: int = status.HTTP_503_SERVICE_UNAVAILABLE,
+    ):
+        self.max_in_flight = max_in_flight
+        self.max_queued = max_queued
+        self.queue_timeout = queue_timeout
+        self.shed_status = shed_status
+        self.in_flight = 0
+        self.shed = 0
+        self._waiters: deque[asyncio.Future[None]] = deque()
+
+    async def acquire(self) -> None:
+        """Wait for a slot; raises HTTPException when the call is shed."""
+        if self.in_flight < self.max_in_flight and not self._waiters:
+            self.in_flight += 1
+            return
+        if len(self._waiters) >= self.max_queued:
+            self._shed()
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            # on wake-up the slot of the releasing call is handed over
+            await asyncio.wait_for(asyncio.shield(waiter), self.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done():
+                # woken up while timing out or being cancelled: give it back
+                self.release()
+            else:
+                waiter.cancel()
+                self._waiters.remove(waiter)
+            if isinstance(e, asyncio.TimeoutError):
+                self._shed()
+            raise
+
+    def release(self) -> None:
+        """Hand the slot of a finished call to the next waiter, or free it."""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+    def _shed(self) -> None:
+        self.shed += 1
+        raise HTTPException(
+            self.shed_status,
+            "Server is overloaded, retry later",
+            headers={"Retry-After": "1"},
+        )
+
+
+class LazyExecutor(Executor):
+    """
+    Process or thread pool started on first use.
+
+    Nothing runs until work is submitted, so one can be created before the
+    server forks its workers (see `src/server.py`) and each worker starts a
+    pool of its own: a started pool cannot be shared across a fork. After
+    `shutdown`, the next submission starts a new pool.
+    """
+
+    def __init__(
+        self,
+        kind: Literal["process", "thread"],
+        max_workers: int,
+        thread_name_prefix: str = "",
+    ):
+        self.kind = kind
+        self.max_workers = max_workers
+        self.thread_name_prefix = thread_name_prefix
+        self._pool: Executor | None = None
+        self._lock = threading.Lock()
+
+    def submit(self, fn: Callable[..., T], /, *args: Any, **kwargs: Any) -> Future[T]:
+        pool = self._pool or self._start()
+        return pool.submit(fn, *args, **kwargs)
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        """Stop the pool, if it was ever started."""
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=wait, cancel_futures=cancel_futures)
+                self._pool = None
+
+    def _start(self) -> Executor:
+        with self._lock:
+            if self._pool is None:
+                if self.kind == "process":
+                    # multiprocessing is only imported by processes that need it
+                    from concurrent.futures import ProcessPoolExecutor
+
+                    self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+                else:
+                    self._pool = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix=self.thread_name_prefix,
+                    )
+            return self._pool
+
+
+class CPUOffloader:
+    """
+    Runs the CPU-bound part of a request according to the execution mode.
+
+    - sync: every call runs in Starlette's threadpool, exactly like a plain
+      `def` endpoint (default).
+    - async: calls for bodies below `threshold_bytes` run inline on the event
+      loop, larger ones go to a dedicated pool so they never block it. The
+      pool is a process pool by default, a thread pool can be selected for
+      algorithms that release the GIL.
+
+    With a `gate`, calls first wait for an admission slot, so they may be
+    shed with a 429/503 when too much CPU work is already in flight.
+
+    The pool is created lazily on first use and must be shut down with
+    `shutdown` when the application stops.
+    """
+
+    def __init__(
+        self,
+        mode: Literal["sync", "async"] = "sync",
+        executor: Literal["process", "thread"] = "process",
+        threshold_bytes: int = 64 * 1024,
+        max_workers: int | None = None,
+        gate: AdmissionGate | None = None,
+    ):
+        self.mode = mode
+        self.gate = gate
+        self.executor = executor
+        self.threshold_bytes = threshold_bytes
+        self.max_workers = max_workers or os.cpu_count() or 1
+
+        self._pool = LazyExecutor(executor, self.max_workers, "cpu-offload")
+
+    async def run(self, size: int | None, func: Callable[..., T], *args: Any) -> T:
+        """
+        Run `func(*args)` for a request body of `size` bytes.
+        An unknown size (e.g. chunked uploads) is treated as a large body.
+        """
+        if self.gate is None:
+            return await self._run(size, func, *args)
+        await self.gate.acquire()
+        try:
+            return await self._run(size, func, *args)
+        finally:
+            self.gate.release()
+
+    async def _run(self, size: int | None, func: Callable[..., T], *args: Any) -> T:
+        if self.mode == "sync":
+            return await run_in_threadpool(func, *args)
+        if size is not None and size < self.threshold_bytes:
+            return func(*args)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, func, *args)
+
+    def shutdown(self) -> None:
+        """Stop the worker pool, if it was ever started."""
+        self._pool.shutdown(wait=True, cancel_futures=True)
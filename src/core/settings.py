@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -7,6 +9,82 @@ class Settings(BaseSettings):
     APP_DESCRIPTION: str = "Take Home Tech Challenge for riot"
 
     HMAC_SECRET_KEY: str = "pretty-much-unbreakable-secret"
+    # additional named keys, e.g. HMAC_KEYS='{"2025-01": "..."}', signatures made
+    # with them are prefixed by their key ID ("2025-01:<hex>")
+    HMAC_KEYS: dict[str, str] = {}
+    HMAC_ACTIVE_KEY_ID: str | None = None
+
+    # Base64 of a 32-byte key for the "aead" encryption algorithm, which is only
+    # served when it is set and the cryptography package is installed
+    AEAD_KEY: str = ""
+    AEAD_CIPHER: Literal["auto", "aes-gcm", "chacha20-poly1305"] = "auto"
+
+    SIGNATURE_CACHE_ENABLED: bool = False
+    SIGNATURE_CACHE_MAX_ENTRIES: int = 10_000
+    SIGNATURE_CACHE_MAX_BYTES: int = 16 * 1024 * 1024
+    SIGNATURE_CACHE_TTL_SECONDS: float = 300.0
+
+    # leaf digest cache of the hmac-tree signing algorithm
+    SIGNATURE_TREE_CACHE_MAX_ENTRIES: int = 10_000
+    SIGNATURE_TREE_CACHE_MAX_BYTES: int = 16 * 1024 * 1024
+
+    JSON_BACKEND: Literal["auto", "orjson", "stdlib"] = "auto"
+
+    # see README, "sync" keeps the historical threadpool behaviour
+    EXECUTION_MODE: Literal["sync", "async"] = "sync"
+    OFFLOAD_EXECUTOR: Literal["process", "thread"] = "process"
+    OFFLOAD_THRESHOLD_BYTES: int = 64 * 1024
+    OFFLOAD_MAX_WORKERS: int | None = None
+
+    # see README, parses crypto request bodies without FastAPI validation
+    CRYPTO_RAW_BODY: bool = False
+
+    # 0 disables parallel per-key encryption
+    PARALLEL_ENCRYPTION_WORKERS: int = 0
+    PARALLEL_ENCRYPTION_EXECUTOR: Literal["process", "thread"] = "process"
+    PARALLEL_ENCRYPTION_MIN_KEYS: int = 1024
+    PARALLEL_ENCRYPTION_CHUNK_SIZE: int = 256
+
+    # memo of repeated values within a request, shared by the items of batches
+    # and streams, see README (0 entries disables it)
+    ENCRYPTION_MEMO_MAX_ENTRIES: int = 4096
+    ENCRYPTION_MEMO_MAX_BYTES: int = 4 * 1024 * 1024
+
+    # request body limits, checked while the body is received (0 disables)
+    MAX_BODY_BYTES: int = 64 * 1024 * 1024
+    MAX_JSON_DEPTH: int = 128
+    MAX_TOP_LEVEL_KEYS: int = 100_000
+
+    # admission control of CPU work, see README (0 in-flight disables it)
+    ADMISSION_MAX_IN_FLIGHT: int = 0
+    ADMISSION_MAX_QUEUED: int = 100
+    ADMISSION_QUEUE_TIMEOUT_SECONDS: float = 1.0
+    ADMISSION_SHED_STATUS: Literal[429, 503] = 503
+
+    # response compression negotiated with Accept-Encoding, see README (zstd
+    # needs the zstandard package)
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_BYTES: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 1
+    COMPRESSION_ZSTD_LEVEL: int = 3
+
+    # move the objects built at startup out of the garbage collector's reach,
+    # see README ("Preforking Server")
+    GC_FREEZE_AFTER_STARTUP: bool = True
+
+    # gRPC front end served next to the HTTP routes, see README (needs the
+    # grpcio package, 0 disables it)
+    GRPC_PORT: int = 0
+    GRPC_HOST: str = "127.0.0.1"
+
+    # per-stage request timings, exposed at /metrics
+    METRICS_ENABLED: bool = True
+
+    BATCH_MAX_ITEMS: int = 10_000
+    STREAM_MAX_LINE_BYTES: int = 1024 * 1024
+    # NDJSON bodies of the streaming routes, held to this instead of
+    # MAX_BODY_BYTES (0 disables)
+    STREAM_MAX_BODY_BYTES: int = 16 * 1024 * 1024 * 1024
 
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
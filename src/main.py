@@ -1,17 +1,77 @@
+import gc
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 
-from src.api.crypto import router as crypto_router
+from src.api.batch import router as batch_router
 from src.api.health import router as health_router
-from src.core.middleware import value_error_handler
+from src.api.metrics import router as metrics_router
+from src.api.signature_tree import router as signature_tree_router
+from src.api.stream import router as stream_router
+from src.core.dependencies import container
+from src.core.middleware import (
+    BodyLimitMiddleware,
+    CompressionMiddleware,
+    MetricsMiddleware,
+    register_error_handlers,
+)
 from src.core.settings import settings
 
-app = FastAPI(
-    title=settings.APP_NAME,
-    version=settings.APP_VERSION,
-    description=settings.APP_DESCRIPTION,
-)
 
-app.middleware("http")(value_error_handler)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    grpc_server = None
+    if settings.GRPC_PORT:
+        # runs on this worker's event loop, sharing its services
+        from src.rpc.server import STOP_GRACE_SECONDS, create_server
+
+        grpc_server = create_server(
+            container, f"{settings.GRPC_HOST}:{settings.GRPC_PORT}"
+        )
+        await grpc_server.start()
+    if settings.GC_FREEZE_AFTER_STARTUP:
+        # modules, routes and services live as long as the process: full
+        # collections no longer walk them, nor write to their shared pages
+        gc.collect()
+        gc.freeze()
+    yield
+    if grpc_server is not None:
+        await grpc_server.stop(STOP_GRACE_SECONDS)
+    container.shutdown()
+
+
+def create_app(raw_body: bool = settings.CRYPTO_RAW_BODY) -> FastAPI:
+    """
+    Build the application.
+    `raw_body` serves the raw-body variant of the crypto routes.
+    """
+    app = FastAPI(
+        title=settings.APP_NAME,
+        version=settings.APP_VERSION,
+        description=settings.APP_DESCRIPTION,
+        lifespan=lifespan,
+    )
+
+    register_error_handlers(app)
+    app.add_middleware(BodyLimitMiddleware)
+    if settings.COMPRESSION_ENABLED:
+        app.add_middleware(CompressionMiddleware)
+    if settings.METRICS_ENABLED:
+        app.add_middleware(MetricsMiddleware)
+
+    app.include_router(health_router)
+    if settings.METRICS_ENABLED:
+        app.include_router(metrics_router)
+    # only the variant of the crypto routes being served is imported
+    if raw_body:
+        from src.api.crypto_raw import router as crypto_router
+    else:
+        from src.api.crypto import router as crypto_router
+    app.include_router(crypto_router)
+    app.include_router(signature_tree_router)
+    app.include_router(batch_router)
+    app.include_router(stream_router)
+    return app
+
 
-app.include_router(health_router)
-app.include_router(crypto_router)
+app = create_app()
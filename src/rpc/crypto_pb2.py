@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+# Generated by the protocol buffer compiler.  DO NOT EDIT!
+# source: src/rpc/crypto.proto
+"""Generated protocol buffer code."""
+from google.protobuf.internal import builder as _builder
+from google.protobuf import descriptor as _descriptor
+from google.protobuf import descriptor_pool as _descriptor_pool
+from google.protobuf import symbol_database as _symbol_database
+# @@protoc_insertion_point(imports)
+
+_sym_db = _symbol_database.Default()
+
+
+
+
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x14src/rpc/crypto.proto\x12\tcrypto.v1\"@\n\x0ePayloadRequest\x12\x0f\n\x07payload\x18\x01 \x01(\x0c\x12\x11\n\talgorithm\x18\x02 \x01(\t\x12\n\n\x02id\x18\x03 \x01(\x04\":\n\x0cPayloadReply\x12\x0f\n\x07payload\x18\x01 \x01(\x0c\x12\n\n\x02id\x18\x02 \x01(\x04\x12\r\n\x05\x65rror\x18\x03 \x01(\t\"9\n\tSignReply\x12\x11\n\tsignature\x18\x01 \x01(\t\x12\n\n\x02id\x18\x02 \x01(\x04\x12\r\n\x05\x65rror\x18\x03 \x01(\t\"R\n\rVerifyRequest\x12\x0f\n\x07payload\x18\x01 \x01(\x0c\x12\x11\n\tsignature\x18\x02 \x01(\t\x12\x11\n\talgorithm\x18\x03 \x01(\t\x12\n\n\x02id\x18\x04 \x01(\x04\"7\n\x0bVerifyReply\x12\r\n\x05valid\x18\x01 \x01(\x08\x12\n\n\x02id\x18\x02 \x01(\x04\x12\r\n\x05\x65rror\x18\x03 \x01(\t2\x96\x04\n\x06\x43rypto\x12=\n\x07\x45ncrypt\x12\x19.crypto.v1.PayloadRequest\x1a\x17.crypto.v1.PayloadReply\x12=\n\x07\x44\x65\x63rypt\x12\x19.crypto.v1.PayloadRequest\x1a\x17.crypto.v1.PayloadReply\x12\x37\n\x04Sign\x12\x19.crypto.v1.PayloadRequest\x1a\x14.crypto.v1.SignReply\x12:\n\x06Verify\x12\x18.crypto.v1.VerifyRequest\x1a\x16.crypto.v1.VerifyReply\x12G\n\rEncryptStream\x12\x19.crypto.v1.PayloadRequest\x1a\x17.crypto.v1.PayloadReply(\x01\x30\x01\x12G\n\rDecryptStream\x12\x19.crypto.v1.PayloadRequest\x1a\x17.crypto.v1.PayloadReply(\x01\x30\x01\x12\x41\n\nSignStream\x12\x19.crypto.v1.PayloadRequest\x1a\x14.crypto.v1.SignReply(\x01\x30\x01\x12\x44\n\x0cVerifyStream\x12\x18.crypto.v1.VerifyRequest\x1a\x16.crypto.v1.VerifyReply(\x01\x30\x01\x62\x06proto3')
+
+_builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, globals())
+_builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'src.rpc.crypto_pb2', globals())
+if _descriptor._USE_C_DESCRIPTORS == False:
+
+  DESCRIPTOR._options = None
+  _PAYLOADREQUEST._serialized_start=35
+  _PAYLOADREQUEST._serialized_end=99
+  _PAYLOADREPLY._serialized_start=101
+  _PAYLOADREPLY._serialized_end=159
+  _SIGNREPLY._serialized_start=161
+  _SIGNREPLY._serialized_end=218
+  _VERIFYREQUEST._serialized_start=220
+  _VERIFYREQUEST._serialized_end=302
+  _VERIFYREPLY._serialized_start=304
+  _VERIFYREPLY._serialized_end=359
+  _CRYPTO._serialized_start=362
+  _CRYPTO._serialized_end=896
+# @@protoc_insertion_point(module_scope)
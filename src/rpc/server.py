@@ -0,0 +1,76 @@
+"""
+Standalone gRPC server of the Crypto service, without the HTTP routes.
+
+    python -m src.rpc.server --host 0.0.0.0 --port 50051
+
+Set GRPC_PORT instead to serve it next to the HTTP routes, from the event
+loop of each application worker (see README, "gRPC").
+"""
+
+import argparse
+import asyncio
+import logging
+import signal
+import sys
+
+import grpc
+
+from src.core.dependencies import DependencyContainer
+from src.core.settings import settings
+from src.rpc.service import create_handler
+
+DEFAULT_PORT = 50051
+# in-flight calls get this long to finish when the server stops
+STOP_GRACE_SECONDS = 5.0
+
+logger = logging.getLogger(__name__)
+
+
+def create_server(container: DependencyContainer, address: str) -> grpc.aio.Server:
+    """
+    gRPC server of the Crypto service, bound to `address` but not started.
+    Messages are limited to MAX_BODY_BYTES, like HTTP request bodies.
+    """
+    server = grpc.aio.server(
+        handlers=[create_handler(container)],
+        options=[("grpc.max_receive_message_length", settings.MAX_BODY_BYTES or -1)],
+    )
+    if server.add_insecure_port(address) == 0:
+        raise RuntimeError(f"Could not bind the gRPC server to {address}")
+    return server
+
+
+async def serve(address: str) -> None:
+    """Serve the Crypto service on `address` until SIGTERM or SIGINT."""
+    from src.core.dependencies import container
+
+    server = create_server(container, address)
+    await server.start()
+    logger.info("gRPC server listening on %s", address)
+
+    stopped = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(signum, stopped.set)
+    await stopped.wait()
+
+    await server.stop(STOP_GRACE_SECONDS)
+    container.shutdown()
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m src.rpc.server")
+    parser.add_argument("--host", default=settings.GRPC_HOST)
+    parser.add_argument("--port", type=int, default=settings.GRPC_PORT or DEFAULT_PORT)
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=args.log_level.upper(), format="%(levelname)s:     %(message)s"
+    )
+    asyncio.run(serve(f"{args.host}:{args.port}"))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,268 @@
+"""
+The crypto.v1.Crypto gRPC service (crypto.proto), backed by the services of
+a DependencyContainer.
+
+Handlers are registered through grpc's generic handler API with the message
+classes protoc generated in crypto_pb2, so grpcio-tools is not needed, to
+run the server or to call it.
+"""
+
+from typing import Any, AsyncIterator, Awaitable, Callable, TypeVar
+
+import grpc
+from google.protobuf.message import Message
+from starlette.exceptions import HTTPException
+
+from src.core.algorithms import EncryptionAlgorithm, SigningAlgorithm
+from src.core.dependencies import DependencyContainer
+from src.core.limits import BodyLimitExceeded, JSONShapeScanner
+from src.core.settings import settings
+from src.rpc.crypto_pb2 import (
+    PayloadReply,
+    PayloadRequest,
+    SignReply,
+    VerifyReply,
+    VerifyRequest,
+)
+from src.services.encryption_service import EncryptionService
+from src.services.signing_service import SigningService
+from src.services.value_memo import ValueMemo
+from src.utils import from_json, to_compact_json_bytes
+
+SERVICE_NAME = "crypto.v1.Crypto"
+
+# status of the calls shed by the admission gate, by HTTP status
+_SHED_CODES = {
+    429: grpc.StatusCode.RESOURCE_EXHAUSTED,
+    503: grpc.StatusCode.UNAVAILABLE,
+}
+
+Request = TypeVar("Request", PayloadRequest, VerifyRequest)
+Reply = TypeVar("Reply", PayloadReply, SignReply, VerifyReply)
+# memos of a stream, by encryption service ID, None outside of streams
+Memos = dict[int, ValueMemo | None] | None
+
+
+class RequestError(Exception):
+    """A request that cannot be answered, with the status to answer it with."""
+
+    def __init__(self, code: grpc.StatusCode, detail: str):
+        super().__init__(code, detail)
+        self.code = code
+        self.detail = detail
+
+
+class CryptoServicer:
+    """
+    Implementation of the Crypto service.
+
+    Each request resolves its service from the container by algorithm name,
+    like the HTTP headers do, and its CPU work goes through the container's
+    offloader, so execution mode and admission control apply as on HTTP.
+    Streaming calls answer every request in order, reporting errors in the
+    reply instead of ending the stream, and share a value memo across the
+    requests of the stream, like the items of a batch.
+    """
+
+    def __init__(self, container: DependencyContainer):
+        self.container = container
+
+    async def encrypt(self, request: PayloadRequest, memos: Memos) -> PayloadReply:
+        service = self._encryption_service(request.algorithm)
+        body = await self._run(
+            request.payload,
+            _encrypt,
+            service,
+            request.payload,
+            _memo(service, memos),
+        )
+        return PayloadReply(payload=body, id=request.id)
+
+    async def decrypt(self, request: PayloadRequest, memos: Memos) -> PayloadReply:
+        service = self._encryption_service(request.algorithm)
+        body = await self._run(
+            request.payload,
+            _decrypt,
+            service,
+            request.payload,
+            _memo(service, memos),
+        )
+        return PayloadReply(payload=body, id=request.id)
+
+    async def sign(self, request: PayloadRequest, memos: Memos) -> SignReply:
+        service = self._signing_service(request.algorithm)
+        signature = await self._run(request.payload, _sign, service, request.payload)
+        return SignReply(signature=signature, id=request.id)
+
+    async def verify(self, request: VerifyRequest, memos: Memos) -> VerifyReply:
+        service = self._signing_service(request.algorithm)
+        valid = await self._run(
+            request.payload, _verify, service, request.payload, request.signature
+        )
+        return VerifyReply(valid=valid, id=request.id)
+
+    def _encryption_service(self, algorithm: str) -> EncryptionService:
+        name = algorithm or EncryptionAlgorithm.BASE64
+        service = self.container.encryption_services.get(name)
+        if service is None:
+            raise _unsupported("encryption", name, self.container.encryption_services)
+        return service
+
+    def _signing_service(self, algorithm: str) -> SigningService:
+        name = algorithm or SigningAlgorithm.HMAC
+        service = self.container.signing_services.get(name)
+        if service is None:
+            raise _unsupported("signing", name, self.container.signing_services)
+        return service
+
+    async def _run(self, payload: bytes, func: Callable[..., Any], *args: Any) -> Any:
+        try:
+            return await self.container.offloader.run(len(payload), func, *args)
+        except HTTPException as e:
+            code = _SHED_CODES.get(e.status_code, grpc.StatusCode.INTERNAL)
+            raise RequestError(code, e.detail) from e
+
+
+def create_handler(container: DependencyContainer) -> grpc.GenericRpcHandler:
+    """Handler serving the Crypto service from the services of `container`."""
+    servicer = CryptoServicer(container)
+    return grpc.method_handlers_generic_handler(
+        SERVICE_NAME,
+        {
+            "Encrypt": _unary(servicer.encrypt, PayloadRequest, PayloadReply),
+            "Decrypt": _unary(servicer.decrypt, PayloadRequest, PayloadReply),
+            "Sign": _unary(servicer.sign, PayloadRequest, SignReply),
+            "Verify": _unary(servicer.verify, VerifyRequest, VerifyReply),
+            "EncryptStream": _stream(servicer.encrypt, PayloadRequest, PayloadReply),
+            "DecryptStream": _stream(servicer.decrypt, PayloadRequest, PayloadReply),
+            "SignStream": _stream(servicer.sign, PayloadRequest, SignReply),
+            "VerifyStream": _stream(servicer.verify, VerifyRequest, VerifyReply),
+        },
+    )
+
+
+class CryptoStub:
+    """Client of the Crypto service, as protoc's gRPC plugin would generate it."""
+
+    def __init__(self, channel: grpc.Channel | grpc.aio.Channel):
+        def method(name: str, request: type[Message], reply: type[Message]) -> Any:
+            return channel.unary_unary(
+                f"/{SERVICE_NAME}/{name}",
+                request_serializer=request.SerializeToString,
+                response_deserializer=reply.FromString,
+            )
+
+        def stream(name: str, request: type[Message], reply: type[Message]) -> Any:
+            return channel.stream_stream(
+                f"/{SERVICE_NAME}/{name}",
+                request_serializer=request.SerializeToString,
+                response_deserializer=reply.FromString,
+            )
+
+        self.Encrypt = method("Encrypt", PayloadRequest, PayloadReply)
+        self.Decrypt = method("Decrypt", PayloadRequest, PayloadReply)
+        self.Sign = method("Sign", PayloadRequest, SignReply)
+        self.Verify = method("Verify", VerifyRequest, VerifyReply)
+        self.EncryptStream = stream("EncryptStream", PayloadRequest, PayloadReply)
+        self.DecryptStream = stream("DecryptStream", PayloadRequest, PayloadReply)
+        self.SignStream = stream("SignStream", PayloadRequest, SignReply)
+        self.VerifyStream = stream("VerifyStream", VerifyRequest, VerifyReply)
+
+
+def _unary(
+    operation: Callable[[Request, Memos], Awaitable[Reply]],
+    request_class: type[Request],
+    reply_class: type[Reply],
+) -> grpc.RpcMethodHandler:
+    async def handle(request: Request, context: grpc.aio.ServicerContext) -> Reply:
+        try:
+            return await operation(request, None)
+        except RequestError as e:
+            await context.abort(e.code, e.detail)
+
+    return grpc.unary_unary_rpc_method_handler(
+        handle,
+        request_deserializer=request_class.FromString,
+        response_serializer=reply_class.SerializeToString,
+    )
+
+
+def _stream(
+    operation: Callable[[Request, Memos], Awaitable[Reply]],
+    request_class: type[Request],
+    reply_class: type[Reply],
+) -> grpc.RpcMethodHandler:
+    async def handle(
+        requests: AsyncIterator[Request], context: grpc.aio.ServicerContext
+    ) -> AsyncIterator[Reply]:
+        memos: Memos = {}
+        async for request in requests:
+            try:
+                yield await operation(request, memos)
+            except RequestError as e:
+                yield reply_class(id=request.id, error=e.detail)
+
+    return grpc.stream_stream_rpc_method_handler(
+        handle,
+        request_deserializer=request_class.FromString,
+        response_serializer=reply_class.SerializeToString,
+    )
+
+
+def _memo(service: EncryptionService, memos: Memos) -> ValueMemo | None:
+    if memos is None:
+        return None
+    if id(service) not in memos:
+        memos[id(service)] = service.create_memo()
+    return memos[id(service)]
+
+
+def _unsupported(kind: str, name: str, services: dict[str, Any]) -> RequestError:
+    return RequestError(
+        grpc.StatusCode.INVALID_ARGUMENT,
+        f"Unsupported {kind} algorithm: {name!r}. Supported: {', '.join(services)}",
+    )
+
+
+def _parse(payload: bytes) -> dict[str, Any]:
+    """
+    Parse a JSON object payload, within the limits on request bodies.
+    Module-level, like the operations below, to run in worker processes.
+    """
+    try:
+        JSONShapeScanner(settings.MAX_JSON_DEPTH, settings.MAX_TOP_LEVEL_KEYS).feed(
+            payload
+        )
+    except BodyLimitExceeded as e:
+        raise RequestError(grpc.StatusCode.RESOURCE_EXHAUSTED, e.detail) from e
+    try:
+        data = from_json(payload)
+    except ValueError as e:
+        raise RequestError(
+            grpc.StatusCode.INVALID_ARGUMENT, "Payload is not valid JSON"
+        ) from e
+    if not isinstance(data, dict):
+        raise RequestError(
+            grpc.StatusCode.INVALID_ARGUMENT, "Payload must be a JSON object"
+        )
+    return data
+
+
+def _encrypt(
+    service: EncryptionService, payload: bytes, memo: ValueMemo | None
+) -> bytes:
+    return service.encrypt_payload_json(_parse(payload), memo=memo)
+
+
+def _decrypt(
+    service: EncryptionService, payload: bytes, memo: ValueMemo | None
+) -> bytes:
+    return to_compact_json_bytes(service.decrypt_payload(_parse(payload), memo=memo))
+
+
+def _sign(service: SigningService, payload: bytes) -> str:
+    return service.sign_payload(_parse(payload))["signature"]
+
+
+def _verify(service: SigningService, payload: bytes, signature: str) -> bool:
+    return service.verify_payload(_parse(payload), signature)
@@ -32,3 +32,57 @@ class VerificationRequest(BaseModel):
             {"message": "Hello World", "timestamp": 1616161616, "user_id": 123},
         ],
     )
+
+
+class TreeSignatureResponse(BaseModel):
+    """Response model for per-key (hmac-tree) signing."""
+
+    signature: str = Field(
+        ...,
+        description="HMAC-SHA256 signature of the per-key digests",
+        examples=[
+            "a1b2c3d4e5f6g7h8i9j0k1l2m3n4o5p6q7r8s9t0u1v2w3x4y5z6",
+        ],
+    )
+    leaves: dict[str, str] = Field(
+        ...,
+        description="HMAC-SHA256 digest of each top-level property",
+        examples=[{"message": "0f1e2d3c4b5a...", "timestamp": "9a8b7c6d5e4f..."}],
+    )
+
+
+class TreeVerificationRequest(VerificationRequest):
+    """Request model for per-key (hmac-tree) signature verification."""
+
+    leaves: dict[str, str] = Field(
+        ...,
+        description="The per-key digests returned along with the signature",
+        examples=[{"message": "0f1e2d3c4b5a...", "timestamp": "9a8b7c6d5e4f..."}],
+    )
+
+
+class BatchItemResult(BaseModel):
+    """Outcome of a single item within a batch operation."""
+
+    result: Any = Field(
+        None,
+        description="Result of the operation, shaped like the single-item endpoint "
+        "output. Null when the item failed.",
+        examples=[
+            {"signature": "a1b2c3d4e5f6g7h8i9j0k1l2m3n4o5p6q7r8s9t0u1v2w3x4y5z6"}
+        ],
+    )
+    error: str | None = Field(
+        None,
+        description="Reason the item could not be processed, null on success",
+        examples=["Item must be a JSON object"],
+    )
+
+
+class BatchResponse(BaseModel):
+    """Response model for batch operations, one entry per input item."""
+
+    results: list[BatchItemResult] = Field(
+        ...,
+        description="Per-item results, in the same order as the input array",
+    )
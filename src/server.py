@@ -0,0 +1,134 @@
+"""
+Preforking server: the application is imported and built once, then forked
+into the workers, which share it through copy-on-write.
+
+    python -m src.server --host 0.0.0.0 --port 8000 --workers 4
+
+`uvicorn --workers N` spawns fresh interpreters that each import FastAPI,
+pydantic and the app on their own. Here that work happens once, in the
+parent, so a worker is ready as soon as it has started its event loop, and
+the memory holding the imported code is shared instead of duplicated.
+Workers that die are replaced by a new fork of the parent, just as fast.
+Linux and macOS only, as it relies on `os.fork`.
+"""
+
+import argparse
+import gc
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+import traceback
+from types import FrameType
+from typing import Callable, NoReturn
+
+import uvicorn
+
+# a worker exiting sooner than this failed to start, respawning would loop
+MIN_WORKER_LIFETIME_SECONDS = 1.0
+
+logger = logging.getLogger("uvicorn.error")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m src.server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--log-level", default="info")
+    parser.add_argument("--no-access-log", action="store_true")
+    args = parser.parse_args(argv)
+
+    # no collection may run before the fork: it would leave holes in the
+    # pages the workers share, and its bookkeeping would write to them
+    gc.disable()
+    start = time.perf_counter()
+
+    from src.main import app
+
+    config = uvicorn.Config(
+        app,
+        host=args.host,
+        port=args.port,
+        log_level=args.log_level,
+        access_log=not args.no_access_log,
+    )
+    # imports the protocol implementations (uvloop, httptools) before forking
+    config.load()
+    sock = config.bind_socket()
+    logger.info(
+        "Application preloaded in %.0f ms", (time.perf_counter() - start) * 1000
+    )
+
+    gc.freeze()
+    return _supervise(lambda: _run_worker(config, sock), args.workers)
+
+
+def _supervise(run_worker: Callable[[], NoReturn], workers: int) -> int:
+    """Fork `workers` workers and replace those that die, until stopped."""
+    children: dict[int, float] = {}
+    stopping = False
+
+    def stop(signum: int, frame: FrameType | None) -> None:
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            os.kill(pid, signal.SIGTERM)
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    def fork() -> None:
+        pid = os.fork()
+        if pid == 0:
+            run_worker()
+        children[pid] = time.monotonic()
+
+    for _ in range(workers):
+        fork()
+
+    status = 0
+    while children:
+        try:
+            pid, wait_status = os.wait()
+        except ChildProcessError:
+            break
+        started = children.pop(pid)
+        if stopping:
+            continue
+        code = os.waitstatus_to_exitcode(wait_status)
+        if time.monotonic() - started < MIN_WORKER_LIFETIME_SECONDS:
+            logger.error("Worker %d failed to start (exit code %d)", pid, code)
+            status = 1
+            stop(signal.SIGTERM, None)
+            continue
+        logger.warning("Worker %d died (exit code %d), replacing it", pid, code)
+        fork()
+    return status
+
+
+def _run_worker(config: uvicorn.Config, sock: socket.socket) -> NoReturn:
+    """Serve requests in a forked worker, then exit it."""
+    # the parent's handlers would signal the other workers
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.default_int_handler)
+    gc.enable()
+
+    code = 0
+    try:
+        uvicorn.Server(config).run(sockets=[sock])
+    except SystemExit as e:
+        code = e.code if isinstance(e.code, int) else 1
+    except BaseException:
+        traceback.print_exc()
+        code = 1
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os._exit(code)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,162 @@
+import binascii
+import os
+import platform
+from typing import Any, Iterable, Iterator, Literal
+
+from ..utils import from_json, to_compact_json_bytes
+from .exceptions import DecryptionError
+from .protocols import NOT_DECRYPTABLE, EncryptionProtocol
+
+try:
+    from cryptography.exceptions import InvalidTag
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM, ChaCha20Poly1305
+except ImportError:  # optional dependency, see README
+    AESGCM = ChaCha20Poly1305 = InvalidTag = None
+
+AEADCipher = Literal["auto", "aes-gcm", "chacha20-poly1305"]
+
+KEY_SIZE = 32
+_NONCE_SIZE = 12
+_TAG_SIZE = 16
+
+# first byte of every ciphertext: the cipher that sealed it. It is also the
+# associated data, so it cannot be swapped without failing authentication.
+_CIPHER_IDS = {"aes-gcm": b"\x01", "chacha20-poly1305": b"\x02"}
+_HEADER_SIZE = 1
+# header, nonce and tag around a plaintext of at least one byte
+_MIN_SIZE = _HEADER_SIZE + _NONCE_SIZE + _TAG_SIZE + 1
+# both ids are below 4, so the Base64 form of every ciphertext starts with "A"
+_MIN_TEXT_SIZE = (_MIN_SIZE + 2) // 3 * 4
+
+
+def has_aes_instructions() -> bool:
+    """
+    Whether the CPU has AES instructions (AES-NI on x86, the ARMv8 crypto
+    extensions), which AES-GCM needs to beat ChaCha20-Poly1305.
+
+    Read from /proc/cpuinfo on Linux. Elsewhere, 64-bit x86 and ARM CPUs are
+    assumed to have them, as virtually all of them do.
+    """
+    try:
+        with open("/proc/cpuinfo") as cpuinfo:
+            return any(
+                line.startswith(("flags", "Features")) and " aes" in line
+                for line in cpuinfo
+            )
+    except OSError:
+        return platform.machine().lower() in ("x86_64", "amd64", "arm64", "aarch64")
+
+
+class AEADEncryptionService(EncryptionProtocol):
+    """
+    Authenticated encryption with AES-256-GCM or ChaCha20-Poly1305, through
+    the optional `cryptography` package (OpenSSL).
+
+    Ciphertexts are the cipher ID byte, a random 96-bit nonce and the sealed
+    compact JSON of the value, tag included; Base64-encoded in text form. With
+    `cipher="auto"`, AES-GCM is used when the CPU has AES instructions and
+    ChaCha20-Poly1305 (faster in software) otherwise. Decryption follows the
+    ID byte, so either cipher reads what the other wrote.
+
+    Cipher contexts are built once and shared by every value and thread, and
+    `encrypt_many*` seal a whole payload in one call, drawing the nonces of
+    every value with a single `os.urandom` call. Random nonces keep one key
+    safe for about 2**32 values; rotate it well before that.
+    """
+
+    def __init__(self, key: bytes, cipher: AEADCipher = "auto"):
+        if AESGCM is None:
+            raise RuntimeError("The AEAD algorithm requires the cryptography package")
+        if len(key) != KEY_SIZE:
+            raise ValueError(f"AEAD keys must be {KEY_SIZE} bytes, got {len(key)}")
+        if cipher == "auto":
+            cipher = "aes-gcm" if has_aes_instructions() else "chacha20-poly1305"
+        if cipher not in _CIPHER_IDS:
+            raise ValueError(f"Unknown AEAD cipher: {cipher!r}")
+
+        self._key = key
+        self.cipher = cipher
+        self._ciphers = {
+            _CIPHER_IDS["aes-gcm"][0]: AESGCM(key),
+            _CIPHER_IDS["chacha20-poly1305"][0]: ChaCha20Poly1305(key),
+        }
+        self._header = _CIPHER_IDS[cipher]
+
+    def __reduce__(self):
+        # cipher contexts cannot be pickled, worker processes build their own
+        return (type(self), (self._key, self.cipher))
+
+    def encrypt(self, value: Any) -> str:
+        """Encrypt a value, returning the Base64 text of the ciphertext."""
+        return self.encrypt_many((value,))[0]
+
+    def encrypt_many(self, values: Iterable[Any]) -> list[str]:
+        """Encrypt several values to Base64 text ciphertexts."""
+        return [
+            ciphertext.decode("ascii") for ciphertext in self.encrypt_many_bytes(values)
+        ]
+
+    def encrypt_many_bytes(self, values: Iterable[Any]) -> list[bytes]:
+        """Encrypt several values to Base64 ciphertexts, as bytes."""
+        return [
+            binascii.b2a_base64(ciphertext, newline=False)
+            for ciphertext in self._seal(values)
+        ]
+
+    def encrypt_many_raw(self, values: Iterable[Any]) -> list[bytes]:
+        """Encrypt several values to binary ciphertexts."""
+        return list(self._seal(values))
+
+    def _seal(self, values: Iterable[Any]) -> Iterator[bytes]:
+        """Yield the binary ciphertext of each value, sealed one at a time."""
+        values = list(values)
+        nonces = os.urandom(_NONCE_SIZE * len(values))
+        header = self._header
+        encrypt = self._ciphers[header[0]].encrypt
+        for start, value in zip(range(0, len(nonces), _NONCE_SIZE), values):
+            nonce = nonces[start : start + _NONCE_SIZE]
+            yield header + nonce + encrypt(nonce, to_compact_json_bytes(value), header)
+
+    def decrypt(self, encrypted_value: str) -> Any:
+        """
+        Decrypt a Base64 ciphertext.
+        Raises DecryptionError if the value is not a ciphertext of this key.
+        """
+        decrypted = self.try_decrypt(encrypted_value)
+        if decrypted is NOT_DECRYPTABLE:
+            raise DecryptionError(
+                f"Failed to decrypt value: {encrypted_value!r} "
+                "(not an AEAD ciphertext of this key)"
+            )
+        return decrypted
+
+    def try_decrypt(self, encrypted_value: str) -> Any:
+        """
+        Decrypt a Base64 ciphertext, or return NOT_DECRYPTABLE.
+        Values too short or not starting like a ciphertext are rejected
+        before any decoding.
+        """
+        if len(encrypted_value) < _MIN_TEXT_SIZE or encrypted_value[0] != "A":
+            return NOT_DECRYPTABLE
+        try:
+            ciphertext = binascii.a2b_base64(encrypted_value, strict_mode=True)
+        except (binascii.Error, ValueError):
+            return NOT_DECRYPTABLE
+        return self.try_decrypt_raw(ciphertext)
+
+    def try_decrypt_raw(self, encrypted_value: bytes) -> Any:
+        """Decrypt a binary ciphertext, or return NOT_DECRYPTABLE."""
+        if len(encrypted_value) < _MIN_SIZE:
+            return NOT_DECRYPTABLE
+        cipher = self._ciphers.get(encrypted_value[0])
+        if cipher is None:
+            return NOT_DECRYPTABLE
+        header = encrypted_value[:_HEADER_SIZE]
+        nonce = encrypted_value[_HEADER_SIZE : _HEADER_SIZE + _NONCE_SIZE]
+        try:
+            plaintext = cipher.decrypt(
+                nonce, encrypted_value[_HEADER_SIZE + _NONCE_SIZE :], header
+            )
+            return from_json(plaintext)
+        except (InvalidTag, ValueError):
+            return NOT_DECRYPTABLE
@@ -1,30 +1,86 @@
-import base64
 import binascii
-import json
-from typing import Any
+import re
+from typing import Any, Iterable
 
-from ..utils import to_compact_json
+from ..utils import from_json, to_compact_json_bytes
 from .exceptions import DecryptionError
-from .protocols import EncryptionProtocol
+from .protocols import NOT_DECRYPTABLE, EncryptionProtocol
+
+# alphabet and padding of `b64encode` output, whose length is also always a
+# non-zero multiple of 4
+_BASE64 = re.compile(r"[A-Za-z0-9+/]*={0,2}")
 
 
 class Base64EncryptionService(EncryptionProtocol):
     """Base64-based encryption service implementation."""
 
+    deterministic = True
+
     def encrypt(self, value: Any) -> str:
         """Encrypt a value using Base64 encoding."""
-        return base64.b64encode(to_compact_json(value).encode("utf-8")).decode("utf-8")
+        return _b64encode(to_compact_json_bytes(value)).decode("ascii")
+
+    def encrypt_many(self, values: Iterable[Any]) -> list[str]:
+        """Encrypt several values using Base64 encoding."""
+        return [self.encrypt(value) for value in values]
+
+    def encrypt_many_bytes(self, values: Iterable[Any]) -> list[bytes]:
+        """Encrypt several values straight from JSON bytes to Base64 bytes."""
+        return [_b64encode(to_compact_json_bytes(value)) for value in values]
+
+    def encrypt_many_raw(self, values: Iterable[Any]) -> list[bytes]:
+        """
+        Encrypt several values to binary ciphertexts. Base64 only encodes the
+        JSON bytes as text, so the binary form is the JSON bytes themselves.
+        """
+        return [to_compact_json_bytes(value) for value in values]
 
     def decrypt(self, encrypted_value: str) -> Any:
         """
         Decrypt a Base64 encoded value.
         Raises DecryptionError if the value cannot be decrypted.
         """
+        if not _is_base64(encrypted_value):
+            raise DecryptionError(
+                f"Failed to decrypt value: {encrypted_value!r} (not Base64 encoded)"
+            )
         try:
-            decoded_bytes = base64.b64decode(encrypted_value.encode("utf-8"))
-            json_str = decoded_bytes.decode("utf-8")
-            return json.loads(json_str)
-        except (ValueError, json.JSONDecodeError, binascii.Error) as e:
+            return self._decode(encrypted_value)
+        except ValueError as e:
             raise DecryptionError(
                 f"Failed to decrypt value: {encrypted_value!r} ({e})"
             ) from e
+
+    def try_decrypt(self, encrypted_value: str) -> Any:
+        """
+        Decrypt a Base64 encoded value, or return NOT_DECRYPTABLE.
+        Values outside the Base64 alphabet, or with a wrong length or padding,
+        are rejected before any decoding.
+        """
+        if not _is_base64(encrypted_value):
+            return NOT_DECRYPTABLE
+        try:
+            return self._decode(encrypted_value)
+        except ValueError:
+            return NOT_DECRYPTABLE
+
+    def try_decrypt_raw(self, encrypted_value: bytes) -> Any:
+        """Decrypt a binary ciphertext (JSON bytes), or return NOT_DECRYPTABLE."""
+        try:
+            return from_json(encrypted_value)
+        except ValueError:
+            return NOT_DECRYPTABLE
+
+    def _decode(self, encrypted_value: str) -> Any:
+        """Decode a Base64 value; raises ValueError on invalid UTF-8 or JSON."""
+        return from_json(binascii.a2b_base64(encrypted_value).decode("utf-8"))
+
+
+def _b64encode(data: bytes) -> bytes:
+    # same output as base64.b64encode, without its argument normalization
+    return binascii.b2a_base64(data, newline=False)
+
+
+def _is_base64(value: str) -> bool:
+    """Whether the value is shaped like `b64encode` output."""
+    return len(value) % 4 == 0 and value != "" and _BASE64.fullmatch(value) is not None
@@ -1,46 +1,300 @@
+import time
+from concurrent.futures import Executor
 from dataclasses import dataclass
-from typing import Any
+from itertools import islice
+from typing import Any, Callable, Hashable, Iterable, Iterator
 
-from .exceptions import DecryptionError
-from .protocols import EncryptionProtocol
+from ..utils import render_json_object
+from .protocols import NOT_DECRYPTABLE, EncryptionProtocol, StageObserverProtocol
+from .stages import run_stage
+from .value_memo import ValueMemo, ciphertext_key, value_key
+
+# payloads with fewer values get no memo of their own, their repeats would
+# not pay for it (a memo shared by the items of a batch still applies)
+MEMO_MIN_VALUES = 32
+
+# a chunk processor: (algorithm, values, timed) -> (results, durations)
+ChunkProcessor = Callable[
+    [EncryptionProtocol, list[Any], bool], tuple[list[Any], list[float]]
+]
 
 
 @dataclass(frozen=True)
 class EncryptionService:
-    """Service for encrypting and decrypting JSON payloads."""
+    """
+    Service for encrypting and decrypting JSON payloads.
+
+    With an `executor`, payloads of at least `parallel_min_keys` top-level keys
+    are split into chunks of `chunk_size` keys processed concurrently; smaller
+    payloads are always processed serially, where the pool overhead would
+    outweigh the gain. Output key order is preserved either way.
+
+    With an `observer`, the duration of each operation is reported to it
+    (stages "encrypt", "decrypt" and "render").
+
+    With `memo_max_entries` above 0, each call processes every distinct value
+    once, through a `ValueMemo` of that size. Callers processing several
+    payloads (e.g. the items of a batch) can share one from `create_memo`.
+    Encryption is only deduplicated for deterministic algorithms.
+    """
 
     algorithm: EncryptionProtocol
+    executor: Executor | None = None
+    parallel_min_keys: int = 1024
+    chunk_size: int = 256
+    observer: StageObserverProtocol | None = None
+    memo_max_entries: int = 0
+    memo_max_bytes: int = 4 * 1024 * 1024
 
-    def encrypt_payload(self, payload: dict[str, Any]) -> dict[str, Any]:
+    def __reduce__(self):
+        # worker processes receive a serial copy: no nested pools, and no
+        # request to report timings for
+        return (
+            _serial_service,
+            (self.algorithm, self.memo_max_entries, self.memo_max_bytes),
+        )
+
+    def create_memo(self) -> ValueMemo | None:
+        """A memo to share across calls for one request, None if disabled."""
+        if self.memo_max_entries <= 0:
+            return None
+        return ValueMemo(self.memo_max_entries, self.memo_max_bytes)
+
+    def encrypt_payload(
+        self,
+        payload: dict[str, Any],
+        timings: dict[str, float] | None = None,
+        memo: ValueMemo | None = None,
+    ) -> dict[str, Any]:
         """
         Encrypt all properties at depth 1 in the payload.
         Returns a new dictionary with encrypted values.
+
+        When `timings` is given, it is filled with the time in seconds spent
+        encrypting each key, for tuning chunk sizes and thresholds; every
+        value is then encrypted, repeated or not. `memo` replaces the memo of
+        the call, to share it with other calls.
+        """
+        return run_stage(
+            self.observer, "encrypt", self._encrypt_payload, payload, timings, memo
+        )
+
+    def _encrypt_payload(
+        self,
+        payload: dict[str, Any],
+        timings: dict[str, float] | None,
+        memo: ValueMemo | None,
+    ) -> dict[str, Any]:
+        if timings is None:
+            values = self._encrypt("text", _encrypt_chunk, payload, memo)
+            return dict(zip(payload, values))
+        values, durations = self._process(_encrypt_chunk, list(payload.values()), True)
+        timings.update(zip(payload, durations))
+        return dict(zip(payload, values))
+
+    def encrypt_payload_json(
+        self, payload: dict[str, Any], memo: ValueMemo | None = None
+    ) -> bytes:
+        """
+        Encrypt like `encrypt_payload`, rendering the result straight to a
+        UTF-8 JSON object. Ciphertexts stay bytes from the algorithm to the
+        response body, with no intermediate dict of `str` values to serialize.
         """
+        values = run_stage(
+            self.observer,
+            "encrypt",
+            self._encrypt,
+            "bytes",
+            _encrypt_bytes_chunk,
+            payload,
+            memo,
+        )
+        return run_stage(
+            self.observer, "render", render_json_object, payload.keys(), values
+        )
 
-        return {key: self.algorithm.encrypt(value) for key, value in payload.items()}
+    def encrypt_payload_raw(
+        self, payload: dict[str, Any], memo: ValueMemo | None = None
+    ) -> dict[str, bytes]:
+        """
+        Encrypt like `encrypt_payload`, to binary ciphertexts for wire formats
+        that carry bytes (see `EncryptionProtocol.encrypt_many_raw`).
+        `decrypt_payload` accepts them back as `bytes` values.
+        """
+        values = run_stage(
+            self.observer,
+            "encrypt",
+            self._encrypt,
+            "raw",
+            _encrypt_raw_chunk,
+            payload,
+            memo,
+        )
+        return dict(zip(payload, values))
 
-    def decrypt_payload(self, payload: dict[str, Any]) -> dict[str, Any]:
+    def _encrypt(
+        self,
+        table: str,
+        process_chunk: ChunkProcessor,
+        payload: dict[str, Any],
+        memo: ValueMemo | None,
+    ) -> list[Any]:
+        """Encrypt the payload values, each distinct one once if possible."""
+        values = list(payload.values())
+        if not self.algorithm.deterministic:
+            return self._process(process_chunk, values, False)[0]
+        return self._deduplicated(table, process_chunk, values, memo)
+
+    def decrypt_payload(
+        self,
+        payload: dict[str, Any],
+        timings: dict[str, float] | None = None,
+        memo: ValueMemo | None = None,
+    ) -> dict[str, Any]:
         """
-        Decrypt properties in the payload that can be decrypted.
+        Decrypt properties in the payload that can be decrypted, either text
+        ciphertexts or binary ones from `encrypt_payload_raw`.
         Non-encrypted properties remain unchanged.
         Returns a new dictionary with decrypted values where possible.
+        Repeated ciphertexts decrypt to the same object.
+
+        When `timings` is given, it is filled with the time in seconds spent
+        decrypting each key. `memo` works as with `encrypt_payload`.
 
         Example:
             >>> service = EncryptionService(Base64EncryptionService())
             >>> service.decrypt_payload({"name": "IkpvaG4gRG9lIg==", "age": "MzA="})
             {"name": "John Doe", "age": 30}
         """
+        return run_stage(
+            self.observer, "decrypt", self._decrypt_payload, payload, timings, memo
+        )
+
+    def _decrypt_payload(
+        self,
+        payload: dict[str, Any],
+        timings: dict[str, float] | None,
+        memo: ValueMemo | None,
+    ) -> dict[str, Any]:
+        if timings is None:
+            values = self._deduplicated(
+                "decrypt", _decrypt_chunk, list(payload.values()), memo, ciphertext_key
+            )
+            return dict(zip(payload, values))
+        values, durations = self._process(_decrypt_chunk, list(payload.values()), True)
+        timings.update(zip(payload, durations))
+        return dict(zip(payload, values))
+
+    def _deduplicated(
+        self,
+        table: str,
+        process_chunk: ChunkProcessor,
+        values: list[Any],
+        memo: ValueMemo | None,
+        key: Callable[[Any], Hashable | None] = value_key,
+    ) -> list[Any]:
+        """Process the values through the memo, or all of them without one."""
+        if memo is None and len(values) >= MEMO_MIN_VALUES:
+            memo = self.create_memo()
+        if memo is None:
+            return self._process(process_chunk, values, False)[0]
+
+        def process(distinct: list[Any]) -> list[Any]:
+            return self._process(process_chunk, distinct, False)[0]
+
+        return memo.map(table, values, process, key)
+
+    def _process(
+        self, process_chunk: ChunkProcessor, values: list[Any], timed: bool
+    ) -> tuple[list[Any], list[float]]:
+        """Process the values, in parallel chunks when there are enough."""
+        if self.executor is not None and len(values) >= self.parallel_min_keys:
+            return self._run_parallel(process_chunk, values, timed)
+        return process_chunk(self.algorithm, values, timed)
+
+    def _run_parallel(
+        self, process_chunk: ChunkProcessor, values: list[Any], timed: bool
+    ) -> tuple[list[Any], list[float]]:
+        """Process the values in chunks on the executor, keeping order."""
+        futures = [
+            self.executor.submit(process_chunk, self.algorithm, chunk, timed)
+            for chunk in _chunked(values, self.chunk_size)
+        ]
+
+        results: list[Any] = []
+        durations: list[float] = []
+        for future in futures:
+            chunk_results, chunk_durations = future.result()
+            results.extend(chunk_results)
+            durations.extend(chunk_durations)
+        return results, durations
+
+
+def _serial_service(
+    algorithm: EncryptionProtocol, memo_max_entries: int, memo_max_bytes: int
+) -> EncryptionService:
+    return EncryptionService(
+        algorithm, memo_max_entries=memo_max_entries, memo_max_bytes=memo_max_bytes
+    )
+
+
+def _chunked(values: Iterable[Any], size: int) -> Iterator[list[Any]]:
+    iterator = iter(values)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def _encrypt_chunk(
+    algorithm: EncryptionProtocol, values: list[Any], timed: bool
+) -> tuple[list[str], list[float]]:
+    """Encrypt a chunk of values, optionally timing each one."""
+    if not timed:
+        return algorithm.encrypt_many(values), []
+
+    results: list[str] = []
+    durations: list[float] = []
+    for value in values:
+        start = time.perf_counter()
+        results.append(algorithm.encrypt(value))
+        durations.append(time.perf_counter() - start)
+    return results, durations
+
+
+def _encrypt_bytes_chunk(
+    algorithm: EncryptionProtocol, values: list[Any], timed: bool
+) -> tuple[list[bytes], list[float]]:
+    """Encrypt a chunk of values to UTF-8 ciphertexts (never timed)."""
+    return algorithm.encrypt_many_bytes(values), []
+
+
+def _encrypt_raw_chunk(
+    algorithm: EncryptionProtocol, values: list[Any], timed: bool
+) -> tuple[list[bytes], list[float]]:
+    """Encrypt a chunk of values to binary ciphertexts (never timed)."""
+    return algorithm.encrypt_many_raw(values), []
+
 
-        result: dict[str, Any] = {}
-        for key, value in payload.items():
-            if isinstance(value, str):
-                # we can try to decrypt
-                try:
-                    result[key] = self.algorithm.decrypt(value)
-                except DecryptionError:
-                    # unable to decrypt, keep as-is
-                    result[key] = value
-            else:
-                # not a string, keep as-is
-                result[key] = value
-        return result
+def _decrypt_chunk(
+    algorithm: EncryptionProtocol, values: list[Any], timed: bool
+) -> tuple[list[Any], list[float]]:
+    """Decrypt a chunk of values, optionally timing each one."""
+    results: list[Any] = []
+    durations: list[float] = []
+    for value in values:
+        start = time.perf_counter() if timed else 0.0
+        if isinstance(value, str):
+            # we can try to decrypt
+            decrypted = algorithm.try_decrypt(value)
+            if decrypted is not NOT_DECRYPTABLE:
+                value = decrypted
+            # unable to decrypt, keep as-is
+        elif isinstance(value, bytes):
+            # binary ciphertext, from a wire format that carries bytes
+            decrypted = algorithm.try_decrypt_raw(value)
+            if decrypted is not NOT_DECRYPTABLE:
+                value = decrypted
+        # not a string, keep as-is
+        results.append(value)
+        if timed:
+            durations.append(time.perf_counter() - start)
+    return results, durations
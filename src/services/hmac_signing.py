@@ -1,35 +1,125 @@
 import hashlib
 import hmac
-from typing import Any
+from typing import Any, Mapping
 
-from ..utils import to_deterministic_json
-from .protocols import SigningProtocol
+from ..utils import write_deterministic_json
+from .protocols import CanonicalSigningProtocol
 
+KEY_ID_SEPARATOR = ":"
 
-class HMACSigningService(SigningProtocol):
+
+class HMACSigningService(CanonicalSigningProtocol):
     """HMAC-based signing service implementation."""
 
-    def __init__(self, secret_key: str):
-        """Initialize with a secret key for HMAC."""
+    def __init__(
+        self,
+        secret_key: str,
+        keys: Mapping[str, str] | None = None,
+        active_key_id: str | None = None,
+    ):
+        """
+        Initialize with a secret key for HMAC.
+
+        `keys` maps key IDs to additional secrets accepted for verification.
+        When `active_key_id` names one of them, new signatures are made with it
+        and prefixed with "<key_id>:", otherwise `secret_key` is used and
+        signatures stay bare hex digests.
+
+        Every key is turned into a pre-keyed HMAC state once, here: signing then
+        only copies that state instead of deriving the padded keys again.
+        """
         self.secret_key = secret_key.encode("utf-8")
+        self._keys = dict(keys or {})
+        self._default_state = hmac.new(self.secret_key, digestmod=hashlib.sha256)
+        self._keyed_states = {
+            key_id: hmac.new(key.encode("utf-8"), digestmod=hashlib.sha256)
+            for key_id, key in self._keys.items()
+        }
+        self.activate_key(active_key_id)
+
+    def __reduce__(self):
+        # HMAC states cannot be pickled, rebuild them from the keys instead
+        # (needed to hand the service over to worker processes)
+        return (
+            type(self),
+            (self.secret_key.decode("utf-8"), self._keys, self.active_key_id),
+        )
 
     def sign(self, data: dict[str, Any]) -> str:
         """
         Generate an HMAC signature for the given data.
         Uses deterministic JSON serialization to ensure order independence.
+        The canonical form is serialized in one call, and only streamed into
+        the HMAC chunk by chunk for documents of several megabytes (see
+        `write_deterministic_json`).
 
         Example:
             >>> service = HMACSigningService()
             >>> service.sign({"name": "John Doe", "age": 30})
             "sha256=..."
         """
-        return hmac.new(
-            self.secret_key,
-            to_deterministic_json(data).encode("utf-8"),
-            hashlib.sha256,
-        ).hexdigest()
+        key_id, state = self._signing_state()
+        write_deterministic_json(data, state.update)
+        return self._format_signature(key_id, state)
 
     def verify(self, data: dict[str, Any], signature: str) -> bool:
-        """Verify if the signature matches the data."""
-        expected_signature = self.sign(data)
-        return hmac.compare_digest(signature, expected_signature)
+        """
+        Verify if the signature matches the data.
+        Signatures prefixed with a key ID are checked against that key.
+        """
+        state, digest = self._verification_state(signature)
+        if state is None:
+            return False
+        write_deterministic_json(data, state.update)
+        return self._matches(state, digest)
+
+    def sign_canonical(self, canonical: bytes) -> str:
+        """Generate an HMAC signature for already-serialized canonical JSON."""
+        key_id, state = self._signing_state()
+        state.update(canonical)
+        return self._format_signature(key_id, state)
+
+    def verify_canonical(self, canonical: bytes, signature: str) -> bool:
+        """Verify a signature against already-serialized canonical JSON."""
+        state, digest = self._verification_state(signature)
+        if state is None:
+            return False
+        state.update(canonical)
+        return self._matches(state, digest)
+
+    def activate_key(self, key_id: str | None) -> None:
+        """
+        Rotate the key used for new signatures.
+        `None` switches back to the unnamed `secret_key`.
+        """
+        if key_id is not None and key_id not in self._keyed_states:
+            raise ValueError(f"Unknown active HMAC key ID: {key_id!r}")
+        self.active_key_id = key_id
+
+    def _signing_state(self) -> tuple[str | None, hmac.HMAC]:
+        """Active key ID and a fresh copy of its pre-keyed HMAC state."""
+        key_id = self.active_key_id
+        if key_id is None:
+            return None, self._default_state.copy()
+        return key_id, self._keyed_states[key_id].copy()
+
+    def _format_signature(self, key_id: str | None, state: hmac.HMAC) -> str:
+        if key_id is None:
+            return state.hexdigest()
+        return f"{key_id}{KEY_ID_SEPARATOR}{state.hexdigest()}"
+
+    def _verification_state(self, signature: str) -> tuple[hmac.HMAC | None, str]:
+        """
+        Fresh HMAC state for the key a signature names, and its bare digest.
+        The state is None for unknown key IDs, before anything is serialized.
+        """
+        key_id, separator, digest = signature.rpartition(KEY_ID_SEPARATOR)
+        if not separator:
+            return self._default_state.copy(), digest
+        state = self._keyed_states.get(key_id)
+        return (state.copy() if state is not None else None), digest
+
+    def _matches(self, state: hmac.HMAC, digest: str) -> bool:
+        return hmac.compare_digest(
+            digest.encode("utf-8"), state.hexdigest().encode("utf-8")
+        )
@@ -0,0 +1,216 @@
+import hashlib
+import hmac
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable
+
+from ..utils import to_deterministic_json_bytes
+from .protocols import CanonicalSigningProtocol, TreeSigningProtocol
+
+# domain separation: leaf digests use a key derived from `leaf_secret_key`, and
+# the root message is prefixed, so that neither can pass for a plain HMAC
+# signature of some other document (or for each other)
+_LEAF_KEY_LABEL = b"hmac-tree leaf"
+_ROOT_PREFIX = b"hmac-tree root\n"
+
+# rough per-entry bookkeeping cost (ordered dict node, tuples) on top of the
+# key and digest objects themselves
+_ENTRY_OVERHEAD_BYTES = 200
+
+# services unpickled in this process, by leaf key and cache bounds: every call
+# offloaded to a worker process unpickles the service again, and resolves to
+# the instance (and leaf cache) its earlier calls used
+_process_services: dict[tuple[str, int, int], "HMACTreeSigningService"] = {}
+
+
+class HMACTreeSigningService(TreeSigningProtocol):
+    """
+    Two-level (Merkle) HMAC signing for large documents.
+
+    Each top-level key gets a leaf digest, the HMAC-SHA256 under a key derived
+    from `leaf_secret_key` of the canonical JSON of `{key: value}`. The
+    signature is then made by `algorithm` over the canonical JSON of the leaf
+    digests,
+    so it still depends on every value, while key rotation and key ID
+    prefixes are handled by `algorithm` as usual.
+
+    Leaf digests are cached (LRU, bounded by entry count and approximate
+    memory), so re-signing a document where one field changed only hashes
+    that field again. String values are looked up by the string itself,
+    which also skips serializing them; other values by their canonical JSON.
+    The leaf key never rotates, so the cache never needs flushing. Copies
+    unpickled in worker processes share one cache per process (see
+    `_process_service`), so offloaded calls reuse it too.
+
+    Example:
+        >>> service = HMACTreeSigningService(HMACSigningService("secret"), "secret")
+        >>> signature, leaves = service.sign_tree({"name": "John Doe", "age": 30})
+        >>> service.failing_keys({"name": "Jane Doe", "age": 30}, signature, leaves)
+        ["name"]
+    """
+
+    def __init__(
+        self,
+        algorithm: CanonicalSigningProtocol,
+        leaf_secret_key: str,
+        max_entries: int = 10_000,
+        max_bytes: int = 16 * 1024 * 1024,
+    ):
+        self.algorithm = algorithm
+        self.leaf_secret_key = leaf_secret_key
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        leaf_key = hmac.digest(
+            leaf_secret_key.encode("utf-8"), _LEAF_KEY_LABEL, "sha256"
+        )
+        self._leaf_state = hmac.new(leaf_key, digestmod=hashlib.sha256)
+
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[Hashable, tuple[str, int]] = OrderedDict()
+        self._size_bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+
+    def __reduce__(self):
+        # HMAC states cannot be pickled, rebuild them, or reuse the instance
+        # already unpickled in the receiving process along with its cache
+        return (
+            _process_service,
+            (self.algorithm, self.leaf_secret_key, self.max_entries, self.max_bytes),
+        )
+
+    def sign(self, data: dict[str, Any]) -> str:
+        """Generate the root signature of the data."""
+        return self.sign_tree(data)[0]
+
+    def verify(self, data: dict[str, Any], signature: str) -> bool:
+        """Verify the root signature, with any key `algorithm` accepts."""
+        return self.algorithm.verify_canonical(
+            _root_message(self._leaves(data)), signature
+        )
+
+    def sign_tree(self, data: dict[str, Any]) -> tuple[str, dict[str, str]]:
+        """Return the root signature and the leaf digest of every top-level key."""
+        leaves = self._leaves(data)
+        return self.algorithm.sign_canonical(_root_message(leaves)), leaves
+
+    def failing_keys(
+        self, data: dict[str, Any], signature: str, leaves: dict[str, str]
+    ) -> list[str]:
+        """
+        Return the sorted top-level keys whose values do not match `leaves`.
+
+        `leaves` are first authenticated against the root `signature`: if they
+        do not match it, no leaf can be trusted and every key is reported.
+        Keys present in only one of `data` and `leaves` are reported too, so
+        an empty list means `signature` is valid for `data`.
+        """
+        keys = sorted(data.keys() | leaves.keys())
+        if not self.algorithm.verify_canonical(_root_message(leaves), signature):
+            return keys
+        return [
+            key
+            for key in keys
+            if key not in data
+            or key not in leaves
+            or not hmac.compare_digest(
+                leaves[key].encode("utf-8"),
+                self._leaf_digest(key, data[key]).encode("utf-8"),
+            )
+        ]
+
+    def stats(self) -> dict[str, int]:
+        """Return leaf cache hit/miss counters and current occupancy."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "size_bytes": self._size_bytes,
+            }
+
+    def clear(self) -> None:
+        """Drop every cached leaf digest."""
+        with self._lock:
+            self._entries.clear()
+            self._size_bytes = 0
+
+    def _leaves(self, data: dict[str, Any]) -> dict[str, str]:
+        return {key: self._leaf_digest(key, value) for key, value in data.items()}
+
+    def _leaf_digest(self, key: str, value: Any) -> str:
+        canonical: bytes | None = None
+        if type(value) is str:
+            cache_key: Hashable = (key, value)
+            value_size = sys.getsizeof(key) + sys.getsizeof(value)
+        else:
+            # the canonical form is needed to hash the value anyway, and it
+            # tells apart values that compare equal (1, 1.0 and True)
+            canonical = to_deterministic_json_bytes({key: value})
+            cache_key = canonical
+            value_size = sys.getsizeof(canonical)
+
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is not None:
+                self._entries.move_to_end(cache_key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        if canonical is None:
+            canonical = to_deterministic_json_bytes({key: value})
+        state = self._leaf_state.copy()
+        state.update(canonical)
+        digest = state.hexdigest()
+
+        with self._lock:
+            self._store(cache_key, digest, value_size + _ENTRY_OVERHEAD_BYTES)
+        return digest
+
+    def _store(self, cache_key: Hashable, digest: str, size: int) -> None:
+        """Insert an entry and evict least recently used ones. Lock must be held."""
+        if size > self.max_bytes:
+            return
+        previous = self._entries.pop(cache_key, None)
+        if previous is not None:
+            self._size_bytes -= previous[1]
+
+        self._entries[cache_key] = (digest, size)
+        self._size_bytes += size
+
+        while self._entries and (
+            len(self._entries) > self.max_entries or self._size_bytes > self.max_bytes
+        ):
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self._size_bytes -= evicted_size
+
+
+def _process_service(
+    algorithm: CanonicalSigningProtocol,
+    leaf_secret_key: str,
+    max_entries: int,
+    max_bytes: int,
+) -> HMACTreeSigningService:
+    """
+    Unpickle a service into the instance of this process with the same leaf
+    key and bounds. Leaf digests only depend on the leaf key, so its cache
+    stays valid; `algorithm` is replaced to follow key rotations.
+    """
+    process_key = (leaf_secret_key, max_entries, max_bytes)
+    service = _process_services.get(process_key)
+    if service is None:
+        service = HMACTreeSigningService(
+            algorithm, leaf_secret_key, max_entries, max_bytes
+        )
+        _process_services[process_key] = service
+    else:
+        service.algorithm = algorithm
+    return service
+
+
+def _root_message(leaves: dict[str, str]) -> bytes:
+    """The message the root signs: the canonical JSON of the leaf digests."""
+    return _ROOT_PREFIX + to_deterministic_json_bytes(leaves)
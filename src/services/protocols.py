@@ -1,13 +1,55 @@
-from typing import Any, Protocol
+from enum import Enum
+from typing import Any, Final, Iterable, Protocol
+
+from .exceptions import DecryptionError
+
+
+class _Sentinel(Enum):
+    NOT_DECRYPTABLE = "NOT_DECRYPTABLE"
+
+
+# returned by `try_decrypt` for values the algorithm did not produce; an enum
+# member so it stays a singleton across pickling into worker processes
+NOT_DECRYPTABLE: Final = _Sentinel.NOT_DECRYPTABLE
 
 
 class EncryptionProtocol(Protocol):
     """Protocol for encryption/decryption algorithms."""
 
+    # whether the ciphertext of a value only depends on its JSON form, so
+    # repeated values can be encrypted once (see `ValueMemo`); randomized
+    # algorithms must leave it False, or equal values would be revealed
+    deterministic: bool = False
+
     def encrypt(self, value: Any) -> str:
         """Encrypt a single value and return as string."""
         ...
 
+    def encrypt_many(self, values: Iterable[Any]) -> list[str]:
+        """
+        Encrypt several values at once, preserving their order.
+        Lets implementations amortize per-call work across a whole payload.
+        The default calls `encrypt` for every value.
+        """
+        return [self.encrypt(value) for value in values]
+
+    def encrypt_many_bytes(self, values: Iterable[Any]) -> list[bytes]:
+        """
+        Same as `encrypt_many`, returning UTF-8 encoded ciphertexts.
+        The default encodes `encrypt_many` output; implementations should
+        override it to produce bytes without intermediate `str` objects.
+        """
+        return [value.encode("utf-8") for value in self.encrypt_many(values)]
+
+    def encrypt_many_raw(self, values: Iterable[Any]) -> list[bytes]:
+        """
+        Encrypt several values to binary ciphertexts, for wire formats that
+        carry bytes. The default is the text ciphertext of `encrypt_many_bytes`;
+        algorithms whose text form encodes binary data (e.g. Base64) should
+        return that data instead.
+        """
+        return self.encrypt_many_bytes(values)
+
     def decrypt(self, encrypted_value: str) -> Any:
         """
         Decrypt a string value back to its original type.
@@ -15,6 +57,30 @@ class EncryptionProtocol(Protocol):
         """
         ...
 
+    def try_decrypt(self, encrypted_value: str) -> Any:
+        """
+        Decrypt a string value, or return NOT_DECRYPTABLE if it cannot be.
+        Never raises, so probing plaintext values costs no exception.
+
+        The default wraps `decrypt`; implementations should override it to
+        reject non-candidates with cheap checks before decoding anything.
+        """
+        try:
+            return self.decrypt(encrypted_value)
+        except DecryptionError:
+            return NOT_DECRYPTABLE
+
+    def try_decrypt_raw(self, encrypted_value: bytes) -> Any:
+        """
+        Decrypt a binary ciphertext from `encrypt_many_raw`, or return
+        NOT_DECRYPTABLE. The default decodes it back to the text ciphertext.
+        """
+        try:
+            text = encrypted_value.decode("utf-8")
+        except UnicodeDecodeError:
+            return NOT_DECRYPTABLE
+        return self.try_decrypt(text)
+
 
 class SigningProtocol(Protocol):
     """Protocol for signing and verification algorithms."""
@@ -29,3 +95,48 @@ class SigningProtocol(Protocol):
     def verify(self, data: dict[str, Any], signature: str) -> bool:
         """Verify if the signature matches the data."""
         ...
+
+
+class CanonicalSigningProtocol(SigningProtocol, Protocol):
+    """
+    Signing algorithm that can work on pre-serialized canonical JSON.
+    Lets callers that already hold the canonical form skip serializing twice.
+    """
+
+    active_key_id: str | None
+
+    def sign_canonical(self, canonical: bytes) -> str:
+        """Generate a signature for canonical (deterministic) JSON bytes."""
+        ...
+
+    def verify_canonical(self, canonical: bytes, signature: str) -> bool:
+        """Verify if the signature matches the canonical JSON bytes."""
+        ...
+
+
+class TreeSigningProtocol(SigningProtocol, Protocol):
+    """
+    Signing algorithm whose signature covers one digest per top-level key.
+    Lets verification report which keys were tampered with.
+    """
+
+    def sign_tree(self, data: dict[str, Any]) -> tuple[str, dict[str, str]]:
+        """Return the signature and the digest of every top-level key."""
+        ...
+
+    def failing_keys(
+        self, data: dict[str, Any], signature: str, leaves: dict[str, str]
+    ) -> list[str]:
+        """
+        Return the top-level keys that fail verification against the signature
+        and its per-key digests; an empty list means the signature is valid.
+        """
+        ...
+
+
+class StageObserverProtocol(Protocol):
+    """Receives the duration of the stages a service goes through."""
+
+    def observe(self, stage: str, start: float, end: float) -> None:
+        """Record a stage that ran between two `time.perf_counter()` readings."""
+        ...
@@ -1,9 +1,47 @@
 import json
-from typing import Any
+import string
+from typing import Any, Iterable
 
-from ..utils import to_deterministic_json
+from ..utils import from_json, to_deterministic_json, to_deterministic_json_bytes
 from .exceptions import DecryptionError
-from .protocols import EncryptionProtocol
+from .protocols import NOT_DECRYPTABLE, EncryptionProtocol
+
+_LOWER = string.ascii_lowercase
+_UPPER = string.ascii_uppercase
+
+# ROT13 only moves ASCII letters, so the table is built once at import time
+ROT13_TABLE = str.maketrans(
+    _LOWER + _UPPER, _LOWER[13:] + _LOWER[:13] + _UPPER[13:] + _UPPER[:13]
+)
+ROT13_BYTES_TABLE = bytes.maketrans(
+    (_LOWER + _UPPER).encode("ascii"),
+    (_LOWER[13:] + _LOWER[:13] + _UPPER[13:] + _UPPER[:13]).encode("ascii"),
+)
+
+# ROT13 leaves JSON punctuation, digits and whitespace alone and rotates the
+# letters of the literals (true, false, null, NaN, Infinity), so a rotated
+# JSON document can only start and end with these characters
+_JSON_WHITESPACE = " \t\n\r"
+_ROT13_JSON_FIRST = frozenset('"{[-0123456789' + "gsaAV" + _JSON_WHITESPACE)
+_ROT13_JSON_LAST = frozenset('"}]0123456789' + "ryAl" + _JSON_WHITESPACE)
+
+
+def rot13_reference(text: str) -> str:
+    """
+    Reference per-character ROT13 implementation.
+
+    Kept as the readable source of truth that the table-driven engine is
+    tested against; not used on the request path.
+    """
+    result: list[str] = []
+    for char in text:
+        if "a" <= char <= "z":
+            result.append(chr((ord(char) - ord("a") + 13) % 26 + ord("a")))
+        elif "A" <= char <= "Z":
+            result.append(chr((ord(char) - ord("A") + 13) % 26 + ord("A")))
+        else:
+            result.append(char)
+    return "".join(result)
 
 
 class ROT13EncryptionService(EncryptionProtocol):
@@ -12,33 +50,66 @@ class ROT13EncryptionService(EncryptionProtocol):
     https://en.wikipedia.org/wiki/ROT13
     """
 
+    deterministic = True
+
     def encrypt(self, value: Any) -> str:
         """Encrypt a value using ROT13 encoding."""
         return self._rot13_encode(to_deterministic_json(value))
 
+    def encrypt_many(self, values: Iterable[Any]) -> list[str]:
+        """
+        Encrypt several values with a single translation pass.
+
+        Serialized JSON never contains a raw newline, so the values can be
+        joined, rotated in one `str.translate` call and split back apart.
+        """
+        serialized = [to_deterministic_json(value) for value in values]
+        if not serialized:
+            return []
+        return self._rot13_encode("\n".join(serialized)).split("\n")
+
+    def encrypt_many_bytes(self, values: Iterable[Any]) -> list[bytes]:
+        """
+        Same as `encrypt_many` on bytes. Serialized JSON is ASCII, so the
+        rotation is a single `bytes.translate` call.
+        """
+        serialized = [to_deterministic_json_bytes(value) for value in values]
+        if not serialized:
+            return []
+        return b"\n".join(serialized).translate(ROT13_BYTES_TABLE).split(b"\n")
+
     def decrypt(self, encrypted_value: str) -> Any | None:
         """
         Decrypt a ROT13 encoded value.
         Returns None if the value cannot be decrypted.
         """
         try:
-            return json.loads(self._rot13_decode(encrypted_value))
+            return from_json(self._rot13_decode(encrypted_value))
         except (UnicodeDecodeError, json.JSONDecodeError) as e:
             raise DecryptionError(
                 f"Failed to decrypt value: {encrypted_value!r} ({e})"
             ) from e
 
+    def try_decrypt(self, encrypted_value: str) -> Any:
+        """
+        Decrypt a ROT13 encoded value, or return NOT_DECRYPTABLE.
+        Values whose first or last character cannot belong to a rotated JSON
+        document are rejected without rotating anything.
+        """
+        if (
+            not encrypted_value
+            or encrypted_value[0] not in _ROT13_JSON_FIRST
+            or encrypted_value[-1] not in _ROT13_JSON_LAST
+        ):
+            return NOT_DECRYPTABLE
+        try:
+            return from_json(self._rot13_decode(encrypted_value))
+        except ValueError:
+            return NOT_DECRYPTABLE
+
     def _rot13_encode(self, text: str) -> str:
         """Apply ROT13 encoding to text."""
-        result: list[str] = []
-        for char in text:
-            if "a" <= char <= "z":
-                result.append(chr((ord(char) - ord("a") + 13) % 26 + ord("a")))
-            elif "A" <= char <= "Z":
-                result.append(chr((ord(char) - ord("A") + 13) % 26 + ord("A")))
-            else:
-                result.append(char)
-        return "".join(result)
+        return text.translate(ROT13_TABLE)
 
     def _rot13_decode(self, text: str) -> str:
         """Decode ROT13 encoded text (ROT13 is its own inverse)."""
@@ -0,0 +1,142 @@
+import hashlib
+import hmac
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable
+
+from ..utils import to_deterministic_json
+from .protocols import CanonicalSigningProtocol, SigningProtocol
+
+# rough per-entry bookkeeping cost (ordered dict node, tuple, float) on top of
+# the key and signature objects themselves
+_ENTRY_OVERHEAD_BYTES = 200
+
+
+class CachedSigningService(SigningProtocol):
+    """
+    Memoizing layer around a signing algorithm.
+
+    Signatures are cached under a BLAKE2b digest of the canonical JSON, with
+    LRU eviction bounded by entry count and approximate memory, and a TTL.
+    The cache is flushed automatically when the wrapped algorithm's active key
+    changes, so a rotated key never serves a stale signature.
+
+    Example:
+        >>> service = CachedSigningService(HMACSigningService("secret"))
+        >>> service.sign({"name": "John Doe"})  # miss, computed
+        >>> service.sign({"name": "John Doe"})  # hit, served from the cache
+        >>> service.stats()
+        {"hits": 1, "misses": 1, ...}
+    """
+
+    def __init__(
+        self,
+        algorithm: CanonicalSigningProtocol,
+        max_entries: int = 10_000,
+        max_bytes: int = 16 * 1024 * 1024,
+        ttl_seconds: float = 300.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.algorithm = algorithm
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[bytes, tuple[str, float, int]] = OrderedDict()
+        self._size_bytes = 0
+        self._key_id = algorithm.active_key_id
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __reduce__(self):
+        # the cache lives in the parent process only: worker processes receive
+        # the wrapped algorithm and sign directly
+        return (_identity, (self.algorithm,))
+
+    def sign(self, data: dict[str, Any]) -> str:
+        """Return the cached signature for the data, computing it on a miss."""
+        canonical = to_deterministic_json(data).encode("utf-8")
+        return self._signature_for(canonical)
+
+    def verify(self, data: dict[str, Any], signature: str) -> bool:
+        """
+        Verify the signature against the cached expected signature.
+
+        A mismatch is re-checked by the wrapped algorithm, which also accepts
+        signatures made with its other (non-active) keys.
+        """
+        canonical = to_deterministic_json(data).encode("utf-8")
+        expected = self._signature_for(canonical)
+        if hmac.compare_digest(signature.encode("utf-8"), expected.encode("utf-8")):
+            return True
+        return self.algorithm.verify_canonical(canonical, signature)
+
+    def stats(self) -> dict[str, int]:
+        """Return hit/miss counters and current occupancy."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "size_bytes": self._size_bytes,
+            }
+
+    def clear(self) -> None:
+        """Drop every cached signature."""
+        with self._lock:
+            self._entries.clear()
+            self._size_bytes = 0
+
+    def _signature_for(self, canonical: bytes) -> str:
+        key = hashlib.blake2b(canonical, digest_size=16).digest()
+        now = self._clock()
+
+        with self._lock:
+            if self.algorithm.active_key_id != self._key_id:
+                self._entries.clear()
+                self._size_bytes = 0
+                self._key_id = self.algorithm.active_key_id
+
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+            key_id = self._key_id
+
+        signature = self.algorithm.sign_canonical(canonical)
+
+        with self._lock:
+            # skip storing if the key rotated while the signature was computed
+            if self._key_id == key_id == self.algorithm.active_key_id:
+                self._store(key, signature, now + self.ttl_seconds)
+        return signature
+
+    def _store(self, key: bytes, signature: str, expires_at: float) -> None:
+        """Insert an entry and evict least recently used ones. Lock must be held."""
+        size = sys.getsizeof(key) + sys.getsizeof(signature) + _ENTRY_OVERHEAD_BYTES
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._size_bytes -= previous[2]
+
+        self._entries[key] = (signature, expires_at, size)
+        self._size_bytes += size
+
+        while self._entries and (
+            len(self._entries) > self.max_entries or self._size_bytes > self.max_bytes
+        ):
+            _, (_, _, evicted_size) = self._entries.popitem(last=False)
+            self._size_bytes -= evicted_size
+            self.evictions += 1
+
+
+def _identity(value: Any) -> Any:
+    return value
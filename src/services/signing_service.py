@@ -1,14 +1,19 @@
 from dataclasses import dataclass
 from typing import Any
 
-from .protocols import SigningProtocol
+from .protocols import SigningProtocol, StageObserverProtocol, TreeSigningProtocol
+from .stages import run_stage
 
 
 @dataclass(frozen=True)
 class SigningService:
-    """Service for signing and verifying JSON payloads."""
+    """
+    Service for signing and verifying JSON payloads.
+    With an `observer`, the duration of each operation is reported to it.
+    """
 
     algorithm: SigningProtocol
+    observer: StageObserverProtocol | None = None
 
     def sign_payload(self, payload: dict[str, Any]) -> dict[str, str]:
         """
@@ -20,7 +25,9 @@ class SigningService:
             >>> service.sign_payload({"name": "John Doe", "age": 30})
             {"signature": "sha256=..."}
         """
-        return {"signature": self.algorithm.sign(payload)}
+        return {
+            "signature": run_stage(self.observer, "sign", self.algorithm.sign, payload)
+        }
 
     def verify_payload(self, data: dict[str, Any], signature: str) -> bool:
         """Verify if the signature matches the data.
@@ -30,4 +37,41 @@ class SigningService:
             >>> service.verify_payload({"name": "John Doe", "age": 30}, "sha256=...")
             True
         """
-        return self.algorithm.verify(data, signature)
+        return run_stage(
+            self.observer, "verify", self.algorithm.verify, data, signature
+        )
+
+
+@dataclass(frozen=True)
+class TreeSigningService:
+    """Service for signing JSON payloads with per-key digests."""
+
+    algorithm: TreeSigningProtocol
+    observer: StageObserverProtocol | None = None
+
+    def sign_payload(self, payload: dict[str, Any]) -> dict[str, Any]:
+        """
+        Sign a payload and return the signature with its per-key digests.
+
+        Example:
+            >>> service = TreeSigningService(HMACTreeSigningService(...))
+            >>> service.sign_payload({"name": "John Doe", "age": 30})
+            {"signature": "...", "leaves": {"name": "...", "age": "..."}}
+        """
+        signature, leaves = run_stage(
+            self.observer, "sign", self.algorithm.sign_tree, payload
+        )
+        return {"signature": signature, "leaves": leaves}
+
+    def failing_keys(
+        self, data: dict[str, Any], signature: str, leaves: dict[str, str]
+    ) -> list[str]:
+        """Return the keys of the data that fail verification, if any."""
+        return run_stage(
+            self.observer,
+            "verify",
+            self.algorithm.failing_keys,
+            data,
+            signature,
+            leaves,
+        )
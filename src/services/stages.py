@@ -0,0 +1,24 @@
+import time
+from typing import Any, Callable, TypeVar
+
+from .protocols import StageObserverProtocol
+
+T = TypeVar("T")
+
+
+def run_stage(
+    observer: StageObserverProtocol | None,
+    stage: str,
+    func: Callable[..., T],
+    *args: Any,
+) -> T:
+    """
+    Run `func(*args)`, reporting its duration to `observer` as `stage`.
+    Without an observer this is a plain call, nothing is timed.
+    """
+    if observer is None:
+        return func(*args)
+    start = time.perf_counter()
+    result = func(*args)
+    observer.observe(stage, start, time.perf_counter())
+    return result
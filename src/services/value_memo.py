@@ -0,0 +1,167 @@
+from typing import Any, Callable, Hashable
+
+from ..utils import json_size_at_most, to_compact_json_bytes
+
+# lookups after which a memo with too few hits turns itself off
+PROBE_LOOKUPS = 256
+MIN_HIT_RATIO = 0.2
+
+# objects and arrays are keyed on their JSON, which costs a serialization on
+# top of the encryption's: only small ones repeat often enough to pay it back
+MAX_SERIALIZED_KEY_BYTES = 256
+
+
+def value_key(value: Any) -> Hashable | None:
+    """
+    Key of a value to encrypt: values with equal keys have the same JSON form,
+    hence the same ciphertext under a deterministic algorithm.
+
+    Strings and scalars are keyed without serializing them. Booleans are
+    tagged apart from integers (True == 1, but "true" != "1") and floats are
+    keyed on their repr (-0.0 == 0.0, but they serialize differently).
+    Objects and arrays are keyed on their compact JSON, up to
+    MAX_SERIALIZED_KEY_BYTES; larger ones are not memoized (None).
+    """
+    kind = type(value)
+    if kind is str:
+        return value
+    if kind is int or kind is bool or value is None:
+        return (kind, value)
+    if kind is float:
+        return (kind, repr(value))
+    if json_size_at_most(value, MAX_SERIALIZED_KEY_BYTES):
+        return to_compact_json_bytes(value)
+    return None
+
+
+def ciphertext_key(value: Any) -> Hashable | None:
+    """
+    Key of a value to decrypt: text and binary ciphertexts are their own key,
+    other values are never memoized.
+    """
+    return value if type(value) is str or type(value) is bytes else None
+
+
+def _size(obj: Any) -> int:
+    return len(obj) if type(obj) is str or type(obj) is bytes else 0
+
+
+class ValueMemo:
+    """
+    Memo of the values processed during a request, so that each distinct
+    value is encrypted or decrypted once, however often it repeats across
+    the keys of a payload or the items of a batch.
+
+    Results are stored per `table` (one per kind of output) up to
+    `max_entries` entries and roughly `max_bytes` of keys and results; once
+    full, new values are still processed but no longer stored. From
+    `probe_lookups` lookups on, the memo turns itself off as soon as fewer
+    than `min_hit_ratio` of them hit, and values are processed directly, so
+    payloads without repetition only pay for the probe.
+
+    A memo serves a single service (algorithm) and is not thread-safe: it is
+    meant to be created per request, see `EncryptionService.create_memo`.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 4096,
+        max_bytes: int = 4 * 1024 * 1024,
+        probe_lookups: int = PROBE_LOOKUPS,
+        min_hit_ratio: float = MIN_HIT_RATIO,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.probe_lookups = probe_lookups
+        self.min_hit_ratio = min_hit_ratio
+        self.enabled = True
+        self.hits = 0
+        self.misses = 0
+
+        self._tables: dict[str, dict[Hashable, Any]] = {}
+        self._entries = 0
+        self._size_bytes = 0
+
+    def map(
+        self,
+        table: str,
+        values: list[Any],
+        process: Callable[[list[Any]], list[Any]],
+        key: Callable[[Any], Hashable | None] = value_key,
+    ) -> list[Any]:
+        """
+        Return `process(values)`, processing each distinct value once.
+
+        Values whose key is in `table` are served from it. The others are
+        processed in a single `process` call, in order of first occurrence,
+        and stored while the memo has room. Values whose key is None are
+        processed in the same call, but never memoized.
+        """
+        if not self.enabled:
+            return process(values)
+        probe_left = self.probe_lookups - self.hits - self.misses
+        if 0 < probe_left < len(values):
+            # decide on the first values whether the rest is worth memoizing
+            head = self.map(table, values[:probe_left], process, key)
+            return head + self.map(table, values[probe_left:], process, key)
+
+        entries = self._tables.setdefault(table, {})
+        keys: list[Hashable | None] = []
+        missing: dict[Hashable, Any] = {}
+        unkeyed: list[Any] = []
+        for value in values:
+            item_key = key(value)
+            keys.append(item_key)
+            if item_key is None:
+                unkeyed.append(value)
+            elif item_key not in entries and item_key not in missing:
+                missing[item_key] = value
+        if len(unkeyed) == len(values):
+            self._record(0, len(values))
+            return process(values)
+
+        processed = process([*missing.values(), *unkeyed]) if missing or unkeyed else []
+        computed = dict(zip(missing, processed))
+        unkeyed_results = iter(processed[len(missing) :])
+        results: list[Any] = []
+        for item_key in keys:
+            if item_key is None:
+                results.append(next(unkeyed_results))
+            elif item_key in computed:
+                results.append(computed[item_key])
+            else:
+                results.append(entries[item_key])
+
+        self._store(entries, computed)
+        # values without a key count as misses: they can never hit
+        self._record(len(values) - len(missing) - len(unkeyed), len(processed))
+        return results
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": self._entries,
+            "size_bytes": self._size_bytes,
+        }
+
+    def _store(
+        self, entries: dict[Hashable, Any], computed: dict[Hashable, Any]
+    ) -> None:
+        for item_key, result in computed.items():
+            size = _size(item_key) + _size(result)
+            if (
+                self._entries >= self.max_entries
+                or self._size_bytes + size > self.max_bytes
+            ):
+                return
+            entries[item_key] = result
+            self._entries += 1
+            self._size_bytes += size
+
+    def _record(self, hits: int, misses: int) -> None:
+        self.hits += hits
+        self.misses += misses
+        lookups = self.hits + self.misses
+        if lookups >= self.probe_lookups and self.hits < self.min_hit_ratio * lookups:
+            self.enabled = False
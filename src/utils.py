@@ -1,5 +1,144 @@
 import json
-from typing import Any
+import re
+from itertools import islice
+from typing import Any, Callable, Iterable, Protocol, Sequence
+
+from pydantic import ValidationError
+
+from src.core.settings import settings
+
+try:
+    import orjson
+except ImportError:  # optional speedup, see README
+    orjson = None
+
+
+class JSONBackend(Protocol):
+    """Protocol for JSON serializers used by the encryption and signing paths."""
+
+    name: str
+
+    def dumps(self, data: Any, sort_keys: bool) -> str:
+        """
+        Serialize data to compact JSON.
+        Output must be byte-identical to the stdlib backend, signatures rely on it.
+        """
+        ...
+
+    def dumps_bytes(self, data: Any, sort_keys: bool) -> bytes:
+        """Same as `dumps`, encoded. The output is always ASCII."""
+        ...
+
+    def loads(self, data: str | bytes) -> Any:
+        """Parse a JSON document. Raises json.JSONDecodeError on invalid input."""
+        ...
+
+
+class StdlibJSONBackend:
+    """Reference backend built on the standard library `json` module."""
+
+    name = "stdlib"
+
+    def dumps(self, data: Any, sort_keys: bool) -> str:
+        return json.dumps(data, separators=(",", ":"), sort_keys=sort_keys)
+
+    def dumps_bytes(self, data: Any, sort_keys: bool) -> bytes:
+        return self.dumps(data, sort_keys).encode("ascii")
+
+    def loads(self, data: str | bytes) -> Any:
+        return json.loads(data)
+
+
+class OrjsonJSONBackend:
+    """
+    Accelerated backend built on orjson.
+
+    orjson does not format everything the way the stdlib does: it writes
+    non-ASCII and DEL characters raw, prints floats with a different exponent
+    style, turns NaN/Infinity into null and rejects integers wider than 64 bits
+    and non-string keys. Whenever the output could contain one of those cases
+    the value is re-serialized with the stdlib, so the result is always
+    byte-identical to `StdlibJSONBackend` and existing signatures still verify.
+    """
+
+    name = "orjson"
+
+    # exponent floats are written "1e16" / "1e-7" by orjson, "1e+16" / "1e-07"
+    # by the stdlib. A match inside a string only costs a fallback.
+    _EXPONENT = re.compile(rb"e[0-9-]")
+
+    # integers from 19 digits up may not fit in 64 bits, which orjson either
+    # rejects or silently parses as floats depending on its version. Masking
+    # every digit to "0" and everything else to " " turns the check into a
+    # substring search, several times cheaper than a `[0-9]{19}` regex.
+    _DIGIT_MASK = bytes(0x30 if 0x30 <= byte <= 0x39 else 0x20 for byte in range(256))
+    _WIDE_INTEGER = b"0" * 19
+
+    def __init__(self) -> None:
+        self._fallback = StdlibJSONBackend()
+
+    def dumps(self, data: Any, sort_keys: bool) -> str:
+        return self.dumps_bytes(data, sort_keys).decode("ascii")
+
+    def dumps_bytes(self, data: Any, sort_keys: bool) -> bytes:
+        try:
+            output = orjson.dumps(data, option=orjson.OPT_SORT_KEYS if sort_keys else 0)
+        except TypeError:  # orjson.JSONEncodeError is a TypeError
+            return self._fallback.dumps_bytes(data, sort_keys)
+        if self._may_diverge(output):
+            return self._fallback.dumps_bytes(data, sort_keys)
+        return output
+
+    def _may_diverge(self, output: bytes) -> bool:
+        """
+        Tell whether orjson output could differ from the stdlib's.
+
+        Checks, cheapest first: raw non-ASCII or DEL characters, nulls that may
+        have been NaN/Infinity, floats below 1e-4 written without exponent
+        ("0.00001") and exponent floats. False positives only cost a fallback.
+        """
+        return (
+            not output.isascii()
+            or b"\x7f" in output
+            or b"null" in output
+            or b"0.0000" in output
+            or self._EXPONENT.search(output) is not None
+        )
+
+    def loads(self, data: str | bytes) -> Any:
+        raw = data.encode("utf-8", "surrogatepass") if isinstance(data, str) else data
+        if self._WIDE_INTEGER in raw.translate(self._DIGIT_MASK):
+            return self._fallback.loads(data)
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # the stdlib also accepts NaN and Infinity
+            return self._fallback.loads(data)
+
+
+def get_json_backend(name: str) -> JSONBackend:
+    """
+    Select a JSON backend by name.
+
+    Supports:
+    - auto: orjson when installed, stdlib otherwise (default)
+    - orjson: orjson, raises if it is not installed
+    - stdlib: the standard library `json` module
+    """
+    match name:
+        case "auto":
+            return OrjsonJSONBackend() if orjson is not None else StdlibJSONBackend()
+        case "orjson":
+            if orjson is None:
+                raise ValueError("JSON backend 'orjson' requires the orjson package")
+            return OrjsonJSONBackend()
+        case "stdlib":
+            return StdlibJSONBackend()
+        case _:
+            raise ValueError(f"Unknown JSON backend: {name!r}")
+
+
+json_backend = get_json_backend(settings.JSON_BACKEND)
 
 
 def to_deterministic_json(data: Any) -> str:
@@ -9,7 +148,299 @@ def to_deterministic_json(data: Any) -> str:
     Uses compact formatting and sorted keys to ensure consistent output
     regardless of input order. Used for signing to ensure order independence.
     """
-    return json.dumps(data, separators=(",", ":"), sort_keys=True)
+    return json_backend.dumps(data, sort_keys=True)
+
+
+# size from which `write_deterministic_json` streams a document: below it, the
+# backend serializes it in one call, several times faster than the streaming
+# writer, for a buffer too small to matter next to the parsed payload
+STREAMING_MIN_SIZE = 4 * 1024 * 1024
+
+
+def write_deterministic_json(
+    data: Any,
+    write: Callable[[bytes], Any],
+    chunk_size: int = 64 * 1024,
+    stream_min_size: int = STREAMING_MIN_SIZE,
+) -> None:
+    """
+    Write `to_deterministic_json(data)` to `write` as ASCII bytes.
+
+    Documents measured at `stream_min_size` or less are serialized by the
+    backend and written in a single call. Larger ones are streamed in chunks
+    of about `chunk_size`: objects and arrays are walked in sorted key order,
+    batching their small members, and long strings are escaped slice by
+    slice, so extra memory is about the nesting depth times `chunk_size`
+    rather than the document size. Either way the bytes written add up to
+    exactly `to_deterministic_json(data)`.
+
+    Example:
+        >>> state = hmac.new(key, digestmod=hashlib.sha256)
+        >>> write_deterministic_json(data, state.update)
+    """
+    if not _larger_than(data, stream_min_size):
+        write(to_deterministic_json_bytes(data))
+        return
+
+    pending: list[str] = []
+    pending_size = 0
+
+    def emit(piece: str) -> None:
+        nonlocal pending_size
+        pending.append(piece)
+        pending_size += len(piece)
+        if pending_size >= chunk_size:
+            write("".join(pending).encode("ascii"))
+            pending.clear()
+            pending_size = 0
+
+    _emit_large(data, emit, chunk_size)
+    if pending:
+        write("".join(pending).encode("ascii"))
+
+
+def _larger_than(value: Any, size: int) -> bool:
+    """
+    Whether the compact JSON of a value is larger than about `size` bytes.
+
+    The sampled estimate of `_likely_larger_than` rules out most values in a
+    few microseconds; the others are measured with `json_size_at_most`, which
+    stops once `size` is exceeded. A large value the sample misses is only
+    serialized whole, as `to_deterministic_json` would.
+    """
+    return _likely_larger_than(value, size) and not json_size_at_most(value, size)
+
+
+# approximate serialized size of numbers, booleans and null
+_SCALAR_SIZE = 8
+_SCALAR_TYPES = frozenset({int, float, bool, type(None)})
+_FLAT_TYPES = _SCALAR_TYPES | {str}
+_FLAT_CHECK_MIN_MEMBERS = 32
+# longest key or string of a member streamed in fixed-count batches
+_FLAT_MEMBER_SIZE = 64
+
+
+# bounds of the work of `_likely_larger_than`: containers sized, and members
+# sampled in each of them
+_ESTIMATE_MAX_CONTAINERS = 4
+_ESTIMATE_SAMPLED_MEMBERS = 8
+
+
+def _likely_larger_than(value: Any, size: int) -> bool:
+    """
+    Whether the compact JSON of a value is likely larger than `size` bytes.
+
+    Unlike `json_size_at_most`, the work is bounded whatever the value: only
+    the first _ESTIMATE_SAMPLED_MEMBERS members of a container are sized and
+    extrapolated to all of them, and only _ESTIMATE_MAX_CONTAINERS containers
+    are sampled, the others counting as containers of scalars. Documents are
+    large because of wide containers or long strings, which the sample
+    catches even under a few levels of wrapping objects.
+    """
+    value_type = type(value)
+    if value_type is str:
+        return len(value) + 2 > size
+    if value_type is dict or value_type is list or value_type is tuple:
+        return _sampled_size(value, [_ESTIMATE_MAX_CONTAINERS]) > size
+    return False
+
+
+def _sampled_size(container: Any, containers_left: list[int]) -> int:
+    """Sampled size of a container, see `_likely_larger_than`."""
+    containers_left[0] -= 1
+    if containers_left[0] < 0 or not container:
+        # as many scalar members, with their keys
+        return 1 + (_SCALAR_SIZE + 4) * len(container)
+    if type(container) is dict:
+        try:
+            total = sum(map(len, islice(container, _ESTIMATE_SAMPLED_MEMBERS)))
+        except TypeError:
+            total = _SCALAR_SIZE * _ESTIMATE_SAMPLED_MEMBERS
+        total += 4 * min(len(container), _ESTIMATE_SAMPLED_MEMBERS)
+        members: Iterable[Any] = islice(container.values(), _ESTIMATE_SAMPLED_MEMBERS)
+    else:
+        total = 0
+        members = container[:_ESTIMATE_SAMPLED_MEMBERS]
+
+    sampled = 0
+    for member in members:
+        sampled += 1
+        member_type = type(member)
+        if member_type is str:
+            total += len(member) + 2
+        elif member_type is dict or member_type is list or member_type is tuple:
+            total += _sampled_size(member, containers_left)
+        else:
+            total += _SCALAR_SIZE
+    return 1 + total * len(container) // sampled
+
+
+def json_size_at_most(value: Any, size: int) -> bool:
+    """
+    Whether the compact JSON of a value is about `size` bytes or less,
+    estimated without serializing it and without walking it in full.
+    """
+    return _size_budget_left(value, size) >= 0
+
+
+def _size_budget_left(value: Any, budget: int) -> int:
+    """
+    Subtract the approximate serialized size of a value from `budget`,
+    stopping as soon as the result is negative. Escaping can make the real
+    size larger, by a bounded factor.
+    """
+    if isinstance(value, str):
+        return budget - len(value) - 2
+    if isinstance(value, dict):
+        try:
+            budget -= 1 + 4 * len(value) + sum(map(len, value))
+        except TypeError:
+            # non-string keys are converted before sorting, which only the
+            # backend does (they never come out of a JSON document anyway)
+            return budget
+        members: Iterable[Any] = value.values()
+    elif isinstance(value, (list, tuple)):
+        budget -= 1 + len(value)
+        members = value
+    else:
+        return budget - _SCALAR_SIZE
+
+    if budget < 0:
+        return budget
+
+    if len(value) >= _FLAT_CHECK_MIN_MEMBERS:
+        # wide containers of scalars and strings are sized without a
+        # Python-level loop over their members
+        member_types = set(map(type, members))
+        if member_types <= _SCALAR_TYPES:
+            return budget - _SCALAR_SIZE * len(value)
+        if member_types <= _FLAT_TYPES:
+            strings = [member for member in members if type(member) is str]
+            return (
+                budget
+                - _SCALAR_SIZE * (len(value) - len(strings))
+                - 2 * len(strings)
+                - sum(map(len, strings))
+            )
+
+    for member in members:
+        if budget < 0:
+            break
+        member_type = type(member)
+        if member_type is str:
+            budget -= len(member) + 2
+        elif member_type in _SCALAR_TYPES:
+            budget -= _SCALAR_SIZE
+        else:
+            budget = _size_budget_left(member, budget)
+    return budget
+
+
+def _emit_large(value: Any, emit: Callable[[str], None], chunk_size: int) -> None:
+    """Stream a value estimated larger than `chunk_size`."""
+    if not isinstance(value, (str, dict, list, tuple)) or (
+        isinstance(value, dict) and not all(isinstance(key, str) for key in value)
+    ):
+        # scalars, and objects with non-string keys which only the backend
+        # knows how to convert and sort
+        emit(to_deterministic_json(value))
+        return
+    if isinstance(value, str):
+        emit('"')
+        for start in range(0, len(value), chunk_size):
+            emit(_encode_json_string_ascii(value[start : start + chunk_size])[1:-1])
+        emit('"')
+        return
+
+    is_object = isinstance(value, dict)
+    opening, closing = ("{", "}") if is_object else ("[", "]")
+    if is_object:
+        keys = sorted(value)
+        values: Any = list(map(value.__getitem__, keys))
+    else:
+        keys, values = None, value
+
+    if _is_flat(values) and (not is_object or _max_len(keys) <= _FLAT_MEMBER_SIZE):
+        # no nested containers nor long strings: members have a bounded
+        # size, so batches of a fixed count are serialized in one call each
+        step = max(1, chunk_size // (2 * _FLAT_MEMBER_SIZE))
+        separator = opening
+        for start in range(0, len(values), step):
+            end = start + step
+            batch = (
+                list(zip(keys[start:end], values[start:end]))
+                if is_object
+                else values[start:end]
+            )
+            emit(separator + _serialize_batch(batch, is_object))
+            separator = ","
+        if separator == opening:
+            emit(opening)
+        emit(closing)
+        return
+
+    members = zip(keys, values) if is_object else values
+    separator = opening
+
+    # consecutive small members are serialized together, as a container of
+    # the same kind stripped of its brackets
+    batch: list[Any] = []
+    batch_budget = chunk_size
+    for member in members:
+        member_value = member[1] if is_object else member
+        member_type = type(member_value)
+        if member_type is str:
+            size = len(member_value) + 2
+        elif member_type in _SCALAR_TYPES:
+            size = _SCALAR_SIZE
+        else:
+            size = chunk_size - _size_budget_left(member_value, chunk_size)
+        if is_object:
+            size += len(member[0]) + 4
+
+        if size > batch_budget and batch:
+            emit(separator + _serialize_batch(batch, is_object))
+            separator = ","
+            batch.clear()
+            batch_budget = chunk_size
+        if size <= batch_budget:
+            batch.append(member)
+            batch_budget -= size
+        elif is_object:
+            emit(separator + _encode_json_string_ascii(member[0]) + ":")
+            separator = ","
+            _emit_large(member_value, emit, chunk_size)
+        else:
+            emit(separator)
+            separator = ","
+            _emit_large(member_value, emit, chunk_size)
+
+    if batch:
+        emit(separator + _serialize_batch(batch, is_object))
+    elif separator == opening:
+        emit(opening)
+    emit(closing)
+
+
+def _is_flat(values: Sequence[Any]) -> bool:
+    """Whether values are all scalars or strings of at most _FLAT_MEMBER_SIZE."""
+    member_types = set(map(type, values))
+    if member_types <= _SCALAR_TYPES:
+        return True
+    if not member_types <= _FLAT_TYPES:
+        return False
+    return (
+        _max_len(value for value in values if type(value) is str) <= _FLAT_MEMBER_SIZE
+    )
+
+
+def _max_len(strings: Iterable[str]) -> int:
+    return max(map(len, strings), default=0)
+
+
+def _serialize_batch(batch: list[Any], is_object: bool) -> str:
+    """Serialize batched members without the enclosing brackets."""
+    return to_deterministic_json(dict(batch) if is_object else batch)[1:-1]
 
 
 def to_compact_json(data: Any) -> str:
@@ -19,4 +450,79 @@ def to_compact_json(data: Any) -> str:
     Uses compact formatting but preserves original key order.
     Used for encryption where order independence is not required.
     """
-    return json.dumps(data, separators=(",", ":"))
+    return json_backend.dumps(data, sort_keys=False)
+
+
+def to_deterministic_json_bytes(data: Any) -> bytes:
+    """Same as `to_deterministic_json`, as ASCII bytes."""
+    return json_backend.dumps_bytes(data, sort_keys=True)
+
+
+def to_compact_json_bytes(data: Any) -> bytes:
+    """Same as `to_compact_json`, as ASCII bytes."""
+    return json_backend.dumps_bytes(data, sort_keys=False)
+
+
+# maps the bytes that must be escaped inside a JSON string (quote, backslash
+# and control characters) to NUL and every other byte to "x", which turns the
+# check into a translate and a substring search, far cheaper than a regex
+_JSON_ESCAPE_MASK = bytes(
+    0x00 if byte < 0x20 or byte in b'"\\' else 0x78 for byte in range(256)
+)
+
+# the C string encoders behind `json.dumps`, with and without `ensure_ascii`
+_encode_json_string = json.encoder.encode_basestring
+_encode_json_string_ascii = json.encoder.encode_basestring_ascii
+
+
+def render_json_object(keys: Iterable[str], values: Iterable[bytes]) -> bytes:
+    """
+    Render a JSON object mapping each key to a string given as UTF-8 bytes.
+
+    Values needing no escaping, such as Base64 ciphertext, are copied into the
+    output as-is, so the document is assembled in a single join without
+    intermediate `str` objects. Formatted like FastAPI's JSONResponse (compact,
+    non-ASCII written raw), which this replaces on the hot paths.
+    """
+    encoded_keys = [_encode_json_string(key).encode("utf-8") for key in keys]
+    values = list(values)
+    if not encoded_keys:
+        return b"{}"
+
+    if any(map(_needs_escaping, values)):
+        values = [
+            _encode_json_string(value.decode("utf-8")).encode("utf-8")
+            for value in values
+        ]
+        separators = (b":", b",")
+    else:
+        separators = (b':"', b'",')
+
+    # interleave keys and values between separators with slice assignments
+    # rather than appending four parts per key
+    parts: list[bytes] = [b"", separators[0], b"", separators[1]] * len(encoded_keys)
+    parts[0::4] = encoded_keys
+    parts[2::4] = values
+    parts[-1] = separators[1][:-1] + b"}"
+    parts.insert(0, b"{")
+    return b"".join(parts)
+
+
+def _needs_escaping(value: bytes) -> bool:
+    return b"\x00" in value.translate(_JSON_ESCAPE_MASK)
+
+
+def format_validation_error(error: ValidationError) -> str:
+    """Render a pydantic validation error as a short, single-line message."""
+    return "; ".join(
+        f"{'.'.join(str(part) for part in detail['loc'])}: {detail['msg']}"
+        for detail in error.errors()
+    )
+
+
+def from_json(data: str | bytes) -> Any:
+    """
+    Parse a JSON document with the configured backend.
+    Raises json.JSONDecodeError if the document is invalid.
+    """
+    return json_backend.loads(data)
@@ -0,0 +1,140 @@
+"""Tests for the AES-GCM / ChaCha20-Poly1305 encryption algorithm."""
+
+import base64
+import binascii
+import os
+import pickle
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.core.dependencies import container
+from src.main import app
+from src.services.aead_encryption import AEADEncryptionService
+from src.services.encryption_service import EncryptionService
+from src.services.exceptions import DecryptionError
+from src.services.protocols import NOT_DECRYPTABLE
+
+pytest.importorskip("cryptography")
+
+KEY = bytes(range(32))
+CIPHERS = ["aes-gcm", "chacha20-poly1305"]
+
+PAYLOAD = {
+    "name": "John Doe",
+    "age": 30,
+    "contact": {"email": "john@example.com", "tags": ["a", "b"]},
+    "unicode": "漢字",
+    "empty": "",
+    "none": None,
+}
+
+
+@pytest.mark.parametrize("cipher", CIPHERS)
+def test_round_trip(cipher: str):
+    """Test that every value decrypts back to itself."""
+    service = EncryptionService(AEADEncryptionService(KEY, cipher))
+
+    encrypted = service.encrypt_payload(PAYLOAD)
+    assert encrypted.keys() == PAYLOAD.keys()
+    assert all(isinstance(value, str) for value in encrypted.values())
+    assert service.decrypt_payload(encrypted) == PAYLOAD
+
+    raw = service.encrypt_payload_raw(PAYLOAD)
+    assert all(isinstance(value, bytes) for value in raw.values())
+    assert service.decrypt_payload(raw) == PAYLOAD
+
+
+def test_ciphertexts_are_randomized():
+    """Test that the same value never encrypts twice to the same ciphertext."""
+    algorithm = AEADEncryptionService(KEY)
+    ciphertexts = algorithm.encrypt_many(["same"] * 100)
+
+    assert len(set(ciphertexts)) == 100
+    assert {algorithm.decrypt(ciphertext) for ciphertext in ciphertexts} == {"same"}
+
+
+def test_ciphers_read_each_other():
+    """Test that decryption follows the cipher recorded in the ciphertext."""
+    aes = AEADEncryptionService(KEY, "aes-gcm")
+    chacha = AEADEncryptionService(KEY, "chacha20-poly1305")
+
+    assert chacha.decrypt(aes.encrypt("value")) == "value"
+    assert aes.decrypt(chacha.encrypt("value")) == "value"
+    assert aes.encrypt_many_raw(["v"])[0][0] == 1
+    assert chacha.encrypt_many_raw(["v"])[0][0] == 2
+
+
+@pytest.mark.parametrize("cipher", CIPHERS)
+def test_tampering_is_detected(cipher: str):
+    """Test that modified, truncated or relabelled ciphertexts do not decrypt."""
+    algorithm = AEADEncryptionService(KEY, cipher)
+    ciphertext = algorithm.encrypt_many_raw(["secret"])[0]
+
+    flipped = ciphertext[:-1] + bytes([ciphertext[-1] ^ 1])
+    relabelled = bytes([3 - ciphertext[0]]) + ciphertext[1:]
+    for tampered in (flipped, relabelled, ciphertext[:-1], ciphertext[:5], b""):
+        assert algorithm.try_decrypt_raw(tampered) is NOT_DECRYPTABLE
+
+    other_key = AEADEncryptionService(os.urandom(32), cipher)
+    assert other_key.try_decrypt_raw(ciphertext) is NOT_DECRYPTABLE
+    with pytest.raises(DecryptionError):
+        other_key.decrypt(base64.b64encode(ciphertext).decode())
+
+
+@pytest.mark.parametrize(
+    "value", ["John Doe", "", "A" * 64, "AAAA" * 20 + "!", "IkpvaG4gRG9lIg=="]
+)
+def test_plaintext_values_are_kept(value: str):
+    """Test that strings that are not ciphertexts are returned unchanged."""
+    service = EncryptionService(AEADEncryptionService(KEY))
+
+    assert service.decrypt_payload({"a": value}) == {"a": value}
+    assert service.decrypt_payload({"a": b"\x01bytes"}) == {"a": b"\x01bytes"}
+
+
+def test_pickle_round_trip():
+    """Test that the service can be sent to worker processes."""
+    algorithm = AEADEncryptionService(KEY, "chacha20-poly1305")
+    copy = pickle.loads(pickle.dumps(algorithm))
+
+    assert copy.cipher == "chacha20-poly1305"
+    assert copy.decrypt(algorithm.encrypt(PAYLOAD)) == PAYLOAD
+
+
+def test_invalid_configuration():
+    """Test that bad keys and unknown ciphers are rejected upfront."""
+    with pytest.raises(ValueError, match="32 bytes"):
+        AEADEncryptionService(b"short")
+    with pytest.raises(ValueError, match="cipher"):
+        AEADEncryptionService(KEY, "des")  # type: ignore[arg-type]
+
+
+def test_auto_cipher_follows_cpu(monkeypatch: pytest.MonkeyPatch):
+    """Test that "auto" falls back to ChaCha20-Poly1305 without AES instructions."""
+    monkeypatch.setattr(
+        "src.services.aead_encryption.has_aes_instructions", lambda: False
+    )
+    assert AEADEncryptionService(KEY).cipher == "chacha20-poly1305"
+
+    monkeypatch.setattr(
+        "src.services.aead_encryption.has_aes_instructions", lambda: True
+    )
+    assert AEADEncryptionService(KEY).cipher == "aes-gcm"
+
+
+def test_endpoints(monkeypatch: pytest.MonkeyPatch):
+    """Test encrypting and decrypting through the API with the aead header."""
+    monkeypatch.setattr(container, "encryption_services", {})
+    container.register_encryption_algorithm("aead", AEADEncryptionService(KEY))
+    client = TestClient(app)
+    headers = {"X-Encryption-Algorithm": "aead"}
+
+    response = client.post("/encrypt", json=PAYLOAD, headers=headers)
+    assert response.status_code == 200
+    encrypted = response.json()
+    assert all(binascii.a2b_base64(value) for value in encrypted.values())
+
+    response = client.post("/decrypt", json=encrypted, headers=headers)
+    assert response.status_code == 200
+    assert response.json() == PAYLOAD
@@ -0,0 +1,135 @@
+"""Tests for the batch endpoints."""
+
+import json
+from typing import Any
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.core.dependencies import container
+from src.core.offload import CPUOffloader
+from src.core.settings import settings
+from src.main import app
+
+client = TestClient(app)
+
+
+def test_batch_encrypt_decrypt_round_trip():
+    """Test that /batch/encrypt followed by /batch/decrypt returns the originals."""
+    payloads = [
+        {"name": "John Doe", "age": 30},
+        {"contact": {"email": "john@example.com"}, "active": True},
+        {},
+    ]
+
+    encrypt_response = client.post("/batch/encrypt", json=payloads)
+    assert encrypt_response.status_code == 200
+    encrypted = [item["result"] for item in encrypt_response.json()["results"]]
+    assert encrypted[0] == {"name": "IkpvaG4gRG9lIg==", "age": "MzA="}
+
+    decrypt_response = client.post("/batch/decrypt", json=encrypted)
+    assert decrypt_response.status_code == 200
+    decrypted = [item["result"] for item in decrypt_response.json()["results"]]
+    assert decrypted == payloads
+
+
+def test_batch_sign_matches_single_sign():
+    """Test that batch signatures are identical to the single-item endpoint."""
+    payloads = [{"message": "Hello World"}, {"timestamp": 1616161616}]
+
+    response = client.post("/batch/sign", json=payloads)
+    assert response.status_code == 200
+
+    for payload, item in zip(payloads, response.json()["results"]):
+        expected = client.post("/sign", json=payload).json()
+        assert item == {"result": expected, "error": None}
+
+
+def test_batch_verify_reports_per_item_validity():
+    """Test that invalid signatures are reported per item instead of failing."""
+    data = {"message": "Hello World", "timestamp": 1616161616}
+    signature = client.post("/sign", json=data).json()["signature"]
+
+    response = client.post(
+        "/batch/verify",
+        json=[
+            {"signature": signature, "data": data},
+            {"signature": "invalid", "data": data},
+            {"signature": signature},
+        ],
+    )
+    assert response.status_code == 200
+
+    results = response.json()["results"]
+    assert results[0] == {"result": {"valid": True}, "error": None}
+    assert results[1] == {"result": {"valid": False}, "error": None}
+    assert results[2]["result"] is None
+    assert "data" in results[2]["error"]
+
+
+@pytest.mark.parametrize(
+    "endpoint", ["/batch/encrypt", "/batch/decrypt", "/batch/sign", "/batch/verify"]
+)
+@pytest.mark.parametrize("invalid_item", ["string", 123, [1, 2, 3], True, None])
+def test_batch_non_dict_items_reported(endpoint: str, invalid_item: Any):
+    """Test that non-object items produce per-item errors, not a failed batch."""
+    response = client.post(endpoint, json=[invalid_item])
+    assert response.status_code == 200
+    assert response.json() == {
+        "results": [{"result": None, "error": "Item must be a JSON object"}]
+    }
+
+
+def test_batch_non_finite_results_reported():
+    """Test that NaN/Infinity results are per-item errors, as /decrypt rejects them."""
+    # Base64 ciphertexts of NaN and -Infinity, then of 1
+    items = [{"a": "TmFO"}, {"b": "LUluZmluaXR5"}, {"c": "MQ=="}]
+    expected = client.post("/decrypt", json=items[0])
+    assert expected.status_code == 400
+
+    response = client.post("/batch/decrypt", json=items)
+    assert response.status_code == 200
+    results = json.loads(response.content, parse_constant=_reject_constant)["results"]
+    assert results[0] == {"result": None, "error": expected.json()["detail"]}
+    assert results[1] == {"result": None, "error": expected.json()["detail"]}
+    assert results[2] == {"result": {"c": 1}, "error": None}
+
+
+def _reject_constant(name: str) -> None:
+    raise AssertionError(f"{name} is not valid JSON")
+
+
+@pytest.mark.parametrize(
+    "endpoint", ["/batch/encrypt", "/batch/decrypt", "/batch/sign", "/batch/verify"]
+)
+def test_batch_non_array_rejected(endpoint: str):
+    """Test that batch endpoints reject non-array bodies with 422."""
+    response = client.post(endpoint, json={"message": "Hello World"})
+    assert response.status_code == 422
+
+
+def test_batch_size_limit(monkeypatch: pytest.MonkeyPatch):
+    """Test that batches above BATCH_MAX_ITEMS are rejected with 413."""
+    monkeypatch.setattr(settings, "BATCH_MAX_ITEMS", 2)
+
+    response = client.post("/batch/sign", json=[{}, {}, {}])
+    assert response.status_code == 413
+
+
+def test_batch_in_process_pool(monkeypatch: pytest.MonkeyPatch):
+    """Test that batches can be processed in the process pool of the async mode."""
+    offloader = CPUOffloader(mode="async", threshold_bytes=0, max_workers=1)
+    monkeypatch.setattr(container, "offloader", offloader)
+    signature = client.post("/sign", json={"a": 1}).json()["signature"]
+
+    try:
+        response = client.post(
+            "/batch/verify",
+            json=[{"signature": signature, "data": {"a": 1}}, {"data": {}}],
+        )
+    finally:
+        offloader.shutdown()
+    assert response.json()["results"] == [
+        {"result": {"valid": True}, "error": None},
+        {"result": None, "error": "signature: Field required"},
+    ]
@@ -0,0 +1,122 @@
+"""Smoke tests for the benchmark suite, so it keeps working as the code evolves."""
+
+import json
+
+import pytest
+
+from benchmarks.__main__ import build_report, main
+from benchmarks.harness import compare, measure, summarize
+from benchmarks.payloads import PAYLOAD_SHAPES
+from benchmarks.suites import (
+    inprocess_transport,
+    measure_import_time,
+    run_grpc_suite,
+    run_http_suite,
+    run_service_suite,
+)
+from src.services.aead_encryption import AESGCM
+
+
+def test_measure_reports_latency_and_allocations():
+    """Test that a measurement fills throughput, percentiles and allocations."""
+    result = measure("alloc", lambda: [0] * 10_000, iterations=20, warmup=1)
+
+    assert result.ops_per_sec > 0
+    assert 0 < result.p50_seconds <= result.p99_seconds
+    assert result.alloc_peak_bytes >= 80_000
+
+
+@pytest.mark.parametrize("shape", list(PAYLOAD_SHAPES))
+def test_payload_shapes_are_json_objects(shape: str):
+    """Test that every payload shape is a JSON-serializable object."""
+    payload = PAYLOAD_SHAPES[shape]()
+    assert isinstance(payload, dict)
+    assert json.loads(json.dumps(payload)) == payload
+
+
+def test_service_and_http_suites_run():
+    """Test that the service and in-process HTTP suites cover every case."""
+    results = run_service_suite(["flat"], iterations=2, alloc_samples=1)
+    with inprocess_transport() as transport:
+        results += run_http_suite(
+            "inprocess", transport, ["flat"], iterations=2, alloc_samples=1
+        )
+
+    names = {result.name for result in results}
+    assert "service/rot13/decrypt/flat" in names
+    assert "service/hmac/verify/flat" in names
+    assert "inprocess/verify/flat" in names
+    # the AEAD ciphers are only benchmarked with the cryptography package
+    assert len(names) == 12 + (6 if AESGCM is not None else 0)
+
+    report = build_report(results)
+    assert json.loads(json.dumps(report))["results"][0]["name"] == results[0].name
+
+
+def test_grpc_suite_runs():
+    """Test that the gRPC suite covers unary and streaming calls of every route."""
+    pytest.importorskip("grpc")
+    results = run_grpc_suite(["flat"], iterations=2)
+
+    names = [result.name for result in results]
+    assert len(names) == 8
+    assert "grpc/verify/flat" in names
+    assert "grpc-stream/encrypt/flat" in names
+
+
+def test_import_time_breakdown():
+    """Test that the import time of the app is split by package."""
+    times = measure_import_time()
+
+    assert {"total", "fastapi", "src"} <= times.keys()
+    assert all(seconds > 0 for seconds in times.values())
+    assert sum(times.values()) - times["total"] == pytest.approx(
+        times["total"], rel=0.2
+    )
+
+
+def test_summarize_startup_samples():
+    """Test that durations measured elsewhere are summarized like timed calls."""
+    result = summarize("startup/case", [0.3, 0.1, 0.2], alloc_peak_bytes=1024)
+
+    assert result.iterations == 3
+    assert result.p50_seconds == 0.2
+    assert result.p99_seconds == 0.3
+    assert result.ops_per_sec == pytest.approx(5.0)
+    assert result.alloc_peak_bytes == 1024
+
+
+def test_compare_flags_regressions_beyond_tolerance():
+    """Test that only regressions beyond the tolerance are reported."""
+    case = {
+        "name": "service/base64/encrypt/flat",
+        "ops_per_sec": 1000.0,
+        "p99_seconds": 0.001,
+        "alloc_peak_bytes": 1000,
+    }
+    baseline = {"results": [case]}
+
+    assert compare(baseline, {"results": [{**case, "ops_per_sec": 950.0}]}) == []
+    regressions = compare(
+        baseline,
+        {"results": [{**case, "ops_per_sec": 500.0, "alloc_peak_bytes": 2000}]},
+    )
+    assert len(regressions) == 2
+    assert compare(baseline, {"results": [{**case, "name": "other"}]}) == []
+
+
+def test_compare_command_exit_status(tmp_path):
+    """Test that the compare command fails only when results regressed."""
+    case = {
+        "name": "case",
+        "ops_per_sec": 1000.0,
+        "p99_seconds": 0.001,
+        "alloc_peak_bytes": 1000,
+    }
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(json.dumps({"results": [case]}))
+    slower = tmp_path / "slower.json"
+    slower.write_text(json.dumps({"results": [{**case, "p99_seconds": 0.01}]}))
+
+    assert main(["compare", str(baseline), str(baseline)]) == 0
+    assert main(["compare", str(baseline), str(slower)]) == 1
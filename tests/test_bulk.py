@@ -0,0 +1,199 @@
+"""Tests for the offline bulk CLI."""
+
+import io
+import json
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Iterable
+
+import pytest
+
+from src.bulk import (
+    Chunk,
+    InputError,
+    build_operation,
+    detect_format,
+    init_worker,
+    iter_chunks,
+    main,
+    run,
+)
+from src.core.dependencies import container
+from src.services.value_memo import ValueMemo
+
+RECORDS = [
+    {"id": index, "note": 'a, "quoted" [bracket] {brace} \\', "tags": ["x", {"y": 1}]}
+    for index in range(200)
+]
+
+
+def _encrypted(record: dict) -> dict:
+    return container.encryption_services["base64"].encrypt_payload(record)
+
+
+def _signature(record: dict) -> str:
+    return container.signing_services["hmac"].sign_payload(record)["signature"]
+
+
+@pytest.fixture
+def ndjson_file(tmp_path: Path) -> Path:
+    path = tmp_path / "records.ndjson"
+    path.write_text("".join(json.dumps(record) + "\n" for record in RECORDS))
+    return path
+
+
+@pytest.fixture
+def array_file(tmp_path: Path) -> Path:
+    path = tmp_path / "records.json"
+    path.write_text(json.dumps(RECORDS, indent=2))
+    return path
+
+
+def test_ndjson_round_trip_keeps_order(ndjson_file: Path, tmp_path: Path):
+    """Test that chunks processed by several workers are written in order."""
+    encrypted = tmp_path / "encrypted.ndjson"
+    args = ["-o", str(encrypted), "--workers", "2", "--chunk-bytes", "500", "--quiet"]
+    assert main(["encrypt", str(ndjson_file), *args]) == 0
+    lines = encrypted.read_text().splitlines()
+    assert [json.loads(line) for line in lines] == [_encrypted(r) for r in RECORDS]
+
+    decrypted = io.BytesIO()
+    reporter = run("decrypt", str(encrypted), decrypted, workers=2, chunk_bytes=700)
+    assert reporter.records == len(RECORDS)
+    lines = decrypted.getvalue().decode().splitlines()
+    assert [json.loads(line) for line in lines] == RECORDS
+
+
+def test_array_sign_and_verify(array_file: Path, tmp_path: Path):
+    """Test that the elements of a JSON array are found despite tricky strings."""
+    signatures = tmp_path / "signatures.json"
+    args = ["-o", str(signatures), "--workers", "2", "--chunk-bytes", "1000", "--quiet"]
+    assert main(["sign", str(array_file), *args]) == 0
+    results = json.loads(signatures.read_text())
+    assert results == [{"signature": _signature(record)} for record in RECORDS]
+
+    requests = tmp_path / "requests.json"
+    requests.write_text(
+        json.dumps(
+            [
+                # odd records get the signature of the previous one
+                {"signature": result["signature"], "data": RECORDS[index & ~1]}
+                for index, result in enumerate(results)
+            ]
+        )
+    )
+    output = io.BytesIO()
+    run("verify", str(requests), output, workers=1)
+    assert json.loads(output.getvalue()) == [{"valid": True}, {"valid": False}] * 100
+
+
+def test_single_json_object(tmp_path: Path):
+    """Test that a single JSON object is processed as one record."""
+    path = tmp_path / "record.json"
+    path.write_text(json.dumps(RECORDS[0], indent=2))
+    output = io.BytesIO()
+
+    run("encrypt", str(path), output, workers=1)
+    assert json.loads(output.getvalue()) == _encrypted(RECORDS[0])
+
+
+def test_errors_reported_in_place(tmp_path: Path, capsys: pytest.CaptureFixture):
+    """Test that bad records are replaced by errors and fail the exit status."""
+    path = tmp_path / "mixed.jsonl"
+    path.write_text('{"a": 1}\nnot json\n[1]\n\n{"signature": 1, "data": {}}\n')
+    output = tmp_path / "out.jsonl"
+
+    assert main(["verify", str(path), "-o", str(output), "--workers", "1"]) == 1
+    assert [json.loads(line) for line in output.read_text().splitlines()] == [
+        {"error": "Record must have a string 'signature' and an object 'data'"},
+        {"error": "Record is not valid JSON"},
+        {"error": "Record must be a JSON object"},
+        {"error": "Record must have a string 'signature' and an object 'data'"},
+    ]
+    assert "4 records" in capsys.readouterr().err
+
+
+def _elements(chunks: Iterable[Chunk], content: bytes) -> list[Any]:
+    return [json.loads(content[start:end]) for c in chunks for start, end in c.spans]
+
+
+@pytest.mark.parametrize("indent", [None, 2], ids=["single-line", "indented"])
+@pytest.mark.parametrize("chunk_bytes", [1, 7, 64, 1 << 20])
+def test_array_ranges_stitched(indent: int | None, chunk_bytes: int):
+    """Test that elements are found across ranges cut inside strings and escapes."""
+    content = json.dumps(RECORDS, indent=indent).encode()
+
+    chunks = iter_chunks(content, "array", chunk_bytes)
+    assert _elements(chunks, content) == RECORDS
+
+
+def test_array_scanned_by_workers(array_file: Path):
+    """Test that workers scanning the ranges of an array find the same elements."""
+    content = array_file.read_bytes()
+    with ProcessPoolExecutor(
+        2, initializer=init_worker, initargs=(str(array_file), "sign", None)
+    ) as pool:
+        chunks = list(iter_chunks(content, "array", 300, pool, scans_in_flight=4))
+
+    assert _elements(chunks, content) == RECORDS
+    assert chunks == list(iter_chunks(content, "array", 300))
+
+
+def test_memo_is_opt_in(ndjson_file: Path):
+    """Test that values are only deduplicated with --memo, once per chunk."""
+    assert build_operation("encrypt", None)[1]() is None
+    assert isinstance(build_operation("encrypt", None, memo=True)[1](), ValueMemo)
+    assert build_operation("sign", None, memo=True)[1]() is None
+
+    outputs = []
+    for memo in (False, True):
+        output = io.BytesIO()
+        run("encrypt", str(ndjson_file), output, workers=1, memo=memo)
+        outputs.append(output.getvalue())
+    assert outputs[0] == outputs[1]
+
+
+@pytest.mark.parametrize(
+    "content",
+    [b"[1, 2", b'{"a": 1}', b"[1] [2]", b"x [1]", b'["]', b'[1, "2]'],
+    ids=repr,
+)
+def test_invalid_arrays(content: bytes):
+    """Test that inputs that are not a single JSON array are rejected."""
+    with pytest.raises(InputError):
+        list(iter_chunks(content, "array", 1024))
+
+
+def test_invalid_input_fails(tmp_path: Path, capsys: pytest.CaptureFixture):
+    """Test that unreadable inputs and unknown algorithms fail cleanly."""
+    path = tmp_path / "broken.json"
+    path.write_text('[{"a": 1},')
+    assert main(["encrypt", str(path), "--quiet"]) == 1
+    assert main(["sign", str(path), "--algorithm", "md5"]) == 1
+    assert main(["sign", str(tmp_path / "missing.json")]) == 1
+    assert capsys.readouterr().err.count("error:") == 3
+
+
+@pytest.mark.parametrize(
+    "name, content, expected",
+    [
+        ("a.ndjson", b"[1]\n", "ndjson"),
+        ("a.jsonl", b"{}\n", "ndjson"),
+        ("a.json", b"  \n[{}]", "array"),
+        ("a.json", b"{}", "json"),
+        ("a.txt", b"{}\n{}\n", "ndjson"),
+    ],
+)
+def test_format_detection(name: str, content: bytes, expected: str):
+    """Test that the format follows the extension, then the first byte."""
+    assert detect_format(name, content) == expected
+
+
+def test_empty_input(tmp_path: Path):
+    """Test that empty inputs give empty outputs."""
+    path = tmp_path / "empty.json"
+    path.write_bytes(b"")
+    output = io.BytesIO()
+
+    assert run("encrypt", str(path), output, input_format="array").records == 0
+    assert output.getvalue() == b"[]\n"
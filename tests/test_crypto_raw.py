@@ -0,0 +1,76 @@
+"""Tests for the raw-body variant of the crypto routes."""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.main import create_app
+
+client = TestClient(create_app(raw_body=False))
+raw_client = TestClient(create_app(raw_body=True))
+
+BODIES = [
+    b'{"name":"John Doe","age":30,"contact":{"email":"john@example.com"}}',
+    b'{"name":"IkpvaG4gRG9lIg==","age":"MzA=","birth_date":"1998-11-19"}',
+    b'{"unicode":"\xe6\xbc\xa2\xe5\xad\x97","escaped":"\\u00e9\\n"}',
+    b"{}",
+    b"[1, 2, 3]",
+    b'"string"',
+    b"null",
+    b"",
+    b"{not valid json",
+    b"\xff",
+    b'{"signature": 1}',
+    b'{"signature": "test", "data": []}',
+]
+
+
+@pytest.mark.parametrize("endpoint", ["/encrypt", "/decrypt", "/sign", "/verify"])
+@pytest.mark.parametrize("body", BODIES)
+def test_raw_routes_match_default_routes(endpoint: str, body: bytes):
+    """Test that raw mode returns the same status and body as the default routes."""
+    headers = {"Content-Type": "application/json"}
+
+    expected = client.post(endpoint, content=body, headers=headers)
+    response = raw_client.post(endpoint, content=body, headers=headers)
+
+    assert response.status_code == expected.status_code
+    assert response.content == expected.content
+
+
+@pytest.mark.parametrize("algorithm", ["base64", "rot13"])
+def test_raw_encrypt_decrypt_round_trip(algorithm: str):
+    """Test that raw mode round-trips a payload with either algorithm."""
+    payload = {"name": "John Doe", "age": 30, "tags": ["a", "b"], "none": None}
+    headers = {"X-Encryption-Algorithm": algorithm}
+
+    encrypted = raw_client.post("/encrypt", json=payload, headers=headers)
+    assert encrypted.status_code == 200
+    assert encrypted.headers["content-type"] == "application/json"
+
+    decrypted = raw_client.post("/decrypt", json=encrypted.json(), headers=headers)
+    assert decrypted.json() == payload
+
+
+def test_raw_sign_verify_round_trip():
+    """Test that signatures from raw mode verify in both modes."""
+    data = {"message": "Hello World", "timestamp": 1616161616}
+
+    signature = raw_client.post("/sign", json=data).json()["signature"]
+    assert signature == client.post("/sign", json=data).json()["signature"]
+
+    verification = {"signature": signature, "data": data}
+    assert raw_client.post("/verify", json=verification).status_code == 204
+
+    verification["data"] = {"message": "Tampered"}
+    response = raw_client.post("/verify", json=verification)
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Invalid signature"}
+
+
+@pytest.mark.parametrize("test_client", [client, raw_client], ids=["default", "raw"])
+def test_encrypt_docs_list_every_algorithm(test_client: TestClient):
+    """Test that the /encrypt docs list the algorithms the header accepts."""
+    schema = test_client.get("/openapi.json").json()
+    description = schema["paths"]["/encrypt"]["post"]["description"]
+
+    assert "(base64|rot13|aead)" in description
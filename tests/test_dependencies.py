@@ -1,7 +1,21 @@
-from src.core.algorithms import EncryptionAlgorithm
-from src.core.dependencies import get_encryption_service
+import json
+from typing import Any
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from src.core.algorithms import EncryptionAlgorithm, SigningAlgorithm
+from src.core.dependencies import (
+    container,
+    get_encryption_service,
+    get_signing_service,
+)
+from src.main import app
 from src.services.base64_encryption import Base64EncryptionService
 from src.services.encryption_service import EncryptionService
+from src.services.exceptions import DecryptionError
+from src.services.protocols import EncryptionProtocol
 from src.services.rot13_encryption import ROT13EncryptionService
 
 
@@ -27,3 +41,58 @@ def test_get_encryption_service_rot13():
 
     assert isinstance(service, EncryptionService)
     assert isinstance(service.algorithm, ROT13EncryptionService)
+
+
+def test_get_encryption_service_reuses_instances():
+    """Test that services are resolved from the container, not rebuilt per call."""
+    assert get_encryption_service() is get_encryption_service()
+    assert get_encryption_service(EncryptionAlgorithm.ROT13) is get_encryption_service(
+        EncryptionAlgorithm.ROT13
+    )
+    assert get_signing_service() is container.signing_services[SigningAlgorithm.HMAC]
+
+
+def test_get_encryption_service_unknown_algorithm():
+    """Test that an unknown algorithm is rejected with 422."""
+    with pytest.raises(HTTPException) as exc_info:
+        get_encryption_service("enigma")
+
+    assert exc_info.value.status_code == 422
+
+
+class ReversedJsonEncryption(EncryptionProtocol):
+    """Third-party algorithm implementing only `encrypt` and `decrypt`."""
+
+    def encrypt(self, value: Any) -> str:
+        return "rev:" + json.dumps(value)[::-1]
+
+    def decrypt(self, encrypted_value: str) -> Any:
+        if not encrypted_value.startswith("rev:"):
+            raise DecryptionError("not a reversed value")
+        return json.loads(encrypted_value[4:][::-1])
+
+
+def test_register_third_party_algorithm(monkeypatch: pytest.MonkeyPatch):
+    """Test that algorithms registered at startup are served through the header."""
+    monkeypatch.setattr(container, "encryption_services", {})
+    container.register_encryption_algorithm("reversed", ReversedJsonEncryption())
+
+    service = get_encryption_service("reversed")
+    assert isinstance(service.algorithm, ReversedJsonEncryption)
+
+    client = TestClient(app)
+    headers = {"X-Encryption-Algorithm": "reversed"}
+    payload = {"name": "John Doe", "age": 30, "tags": ["a"], "plain": "text"}
+    response = client.post("/encrypt", json=payload, headers=headers)
+    assert response.status_code == 200
+    encrypted = response.json()
+    assert encrypted["name"] == 'rev:"eoD nhoJ"'
+
+    response = client.post("/decrypt", json=encrypted, headers=headers)
+    assert response.status_code == 200
+    assert response.json() == payload
+
+    response = client.post(
+        "/encrypt", json={}, headers={"X-Encryption-Algorithm": "base64"}
+    )
+    assert response.status_code == 422
@@ -1,9 +1,13 @@
+import json
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from typing import Any
 
 import pytest
 
 from src.services.base64_encryption import Base64EncryptionService
 from src.services.encryption_service import EncryptionService
+from src.services.exceptions import DecryptionError
+from src.services.protocols import NOT_DECRYPTABLE, EncryptionProtocol
 
 
 @pytest.mark.parametrize(
@@ -26,6 +30,51 @@ def test_base64_round_trip(original: Any):
     assert decrypted == original
 
 
+@pytest.mark.parametrize(
+    "value",
+    ["", "John", "Hello World", "1998-11-19", "MzA", "MzA==", "=MzA", "M zA=", "/w=="],
+)
+def test_base64_rejects_non_candidates(value: str):
+    """Test that plaintext and non-canonical Base64 are not decrypted."""
+    service = Base64EncryptionService()
+
+    assert service.try_decrypt(value) is NOT_DECRYPTABLE
+    with pytest.raises(DecryptionError):
+        service.decrypt(value)
+
+
+class ReversedEncryption(EncryptionProtocol):
+    """Algorithm implementing only `encrypt` and `decrypt`, for the defaults."""
+
+    def encrypt(self, value: Any) -> str:
+        return str(value)[::-1]
+
+    def decrypt(self, encrypted_value: str) -> Any:
+        if not encrypted_value.isdigit():
+            raise DecryptionError("not a reversed number")
+        return int(encrypted_value[::-1])
+
+
+def test_default_try_decrypt_wraps_decrypt():
+    """Test the protocol's try_decrypt fallback for algorithms without one."""
+    service = EncryptionService(ReversedEncryption())
+    assert service.decrypt_payload({"a": "12", "b": "plain"}) == {
+        "a": 21,
+        "b": "plain",
+    }
+
+
+def test_default_batch_hooks_wrap_encrypt():
+    """Test that an algorithm with only encrypt/decrypt encrypts whole payloads."""
+    service = EncryptionService(ReversedEncryption())
+    payload = {"a": 12, "b": 340}
+
+    assert service.encrypt_payload(payload) == {"a": "21", "b": "043"}
+    assert json.loads(service.encrypt_payload_json(payload)) == {"a": "21", "b": "043"}
+    assert service.encrypt_payload_raw(payload) == {"a": b"21", "b": b"043"}
+    assert service.decrypt_payload(service.encrypt_payload(payload)) == payload
+
+
 def test_payload_encryption():
     """Test encrypting/decrypting full payloads."""
     algorithm = Base64EncryptionService()
@@ -51,6 +100,30 @@ def test_payload_encryption():
     assert decrypted == original
 
 
+@pytest.mark.parametrize("parallel_min_keys", [2, 1000])
+def test_payload_encryption_to_json(parallel_min_keys: int):
+    """Test that the bytes path renders the same object as encrypt_payload."""
+    original = {
+        "name": "John Doe",
+        "age": 30,
+        "contact": {"email": "john@example.com", "phone": "123-456-7890"},
+        "unicode": "漢字🙂",
+    }
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        service = EncryptionService(
+            Base64EncryptionService(),
+            executor=executor,
+            parallel_min_keys=parallel_min_keys,
+            chunk_size=1,
+        )
+        rendered = service.encrypt_payload_json(original)
+        expected = service.encrypt_payload(original)
+
+    assert json.loads(rendered) == expected
+    assert list(json.loads(rendered)) == list(original)
+
+
 def test_mixed_content_decryption():
     """Test decrypting payload with mixed encrypted/unencrypted content."""
     algorithm = Base64EncryptionService()
@@ -92,3 +165,63 @@ def test_none_value_preservation():
     assert decrypted["value"] is None
     assert type(decrypted["value"]) is type(None)
     assert decrypted["second_level"]["occupation"] is None
+
+
+@pytest.mark.parametrize("executor_class", [ThreadPoolExecutor, ProcessPoolExecutor])
+def test_parallel_payload_encryption(executor_class: type[Executor]):
+    """Test that parallel mode matches serial output and keeps key order."""
+    algorithm = Base64EncryptionService()
+    serial = EncryptionService(algorithm)
+
+    original = {f"key-{index}": {"index": index} for index in range(50, 0, -1)}
+    original["plain"] = "1998-11-19"
+
+    with executor_class(max_workers=2) as executor:
+        parallel = EncryptionService(
+            algorithm, executor=executor, parallel_min_keys=10, chunk_size=7
+        )
+
+        encrypted = parallel.encrypt_payload(original)
+        assert encrypted == serial.encrypt_payload(original)
+        assert list(encrypted) == list(original)
+
+        decrypted = parallel.decrypt_payload(encrypted)
+        assert decrypted == original
+        assert list(decrypted) == list(original)
+
+
+def test_parallel_mode_threshold():
+    """Test that payloads below the key threshold never touch the executor."""
+
+    class FailingExecutor(ThreadPoolExecutor):
+        def submit(self, *args: Any, **kwargs: Any):
+            raise AssertionError("executor should not be used")
+
+    with FailingExecutor() as executor:
+        service = EncryptionService(
+            Base64EncryptionService(), executor=executor, parallel_min_keys=10
+        )
+        assert service.decrypt_payload(service.encrypt_payload({"a": 1})) == {"a": 1}
+
+
+@pytest.mark.parametrize("parallel_min_keys", [1, 1000])
+def test_per_key_timings(parallel_min_keys: int):
+    """Test that per-key timings are reported in serial and parallel modes."""
+    original = {"name": "John Doe", "age": 30, "contact": {"email": "a@b.c"}}
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        service = EncryptionService(
+            Base64EncryptionService(),
+            executor=executor,
+            parallel_min_keys=parallel_min_keys,
+            chunk_size=2,
+        )
+
+        encrypt_timings: dict[str, float] = {}
+        encrypted = service.encrypt_payload(original, timings=encrypt_timings)
+        decrypt_timings: dict[str, float] = {}
+        assert service.decrypt_payload(encrypted, timings=decrypt_timings) == original
+
+    for timings in (encrypt_timings, decrypt_timings):
+        assert list(timings) == list(original)
+        assert all(duration >= 0 for duration in timings.values())
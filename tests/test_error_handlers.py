@@ -0,0 +1,86 @@
+"""Tests for the mapping of application errors to HTTP responses."""
+
+from typing import Any
+
+import pytest
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+from src.main import create_app
+from src.services.exceptions import DecryptionError
+
+
+class Item(BaseModel):
+    count: int
+
+
+app = create_app()
+
+
+@app.get("/test/decryption-error")
+def raise_decryption_error():
+    raise DecryptionError("Value is not Base64 encoded")
+
+
+@app.get("/test/value-error")
+async def raise_value_error():
+    raise ValueError("Unknown active HMAC key ID: 'nope'")
+
+
+@app.get("/test/validation-error")
+def raise_validation_error():
+    return Item.model_validate({"count": "many"})
+
+
+@app.get("/test/runtime-error")
+def raise_runtime_error():
+    raise RuntimeError("not a client error")
+
+
+client = TestClient(app, raise_server_exceptions=False)
+
+
+@pytest.mark.parametrize(
+    "path,detail",
+    [
+        ("/test/decryption-error", "Value is not Base64 encoded"),
+        ("/test/value-error", "Unknown active HMAC key ID: 'nope'"),
+        (
+            "/test/validation-error",
+            [
+                {
+                    "type": "int_parsing",
+                    "loc": ["count"],
+                    "msg": "Input should be a valid integer, unable to parse "
+                    "string as an integer",
+                    "input": "many",
+                }
+            ],
+        ),
+    ],
+)
+def test_errors_map_to_bad_request(path: str, detail: Any):
+    """Test that errors raised by endpoints are answered with a 400."""
+    response = client.get(path)
+    assert response.status_code == 400
+    assert response.json() == {"detail": detail}
+
+
+def test_other_errors_stay_server_errors():
+    """Test that unrelated exceptions are not turned into client errors."""
+    assert client.get("/test/runtime-error").status_code == 500
+
+
+def test_request_validation_keeps_422():
+    """Test that invalid request bodies are still answered with a 422."""
+    response = client.post("/encrypt", json=["not", "an", "object"])
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["type"] == "dict_type"
+
+
+def test_no_http_middleware():
+    """Test that no BaseHTTPMiddleware wraps the requests."""
+    assert all(
+        middleware.cls.__name__ != "BaseHTTPMiddleware"
+        for middleware in app.user_middleware
+    )
@@ -0,0 +1,131 @@
+"""Tests for the gRPC front end of the encryption and signing services."""
+
+import json
+import pickle
+import socket
+from typing import Iterator
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.core.settings import settings
+from src.main import create_app
+
+grpc = pytest.importorskip("grpc")
+
+from src.rpc.crypto_pb2 import PayloadRequest, VerifyRequest  # noqa: E402
+from src.rpc.service import CryptoStub, RequestError  # noqa: E402
+
+PAYLOAD = {"name": "John Doe", "age": 30, "contact": {"email": "john@example.com"}}
+BODY = json.dumps(PAYLOAD).encode()
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def http(monkeypatch: pytest.MonkeyPatch) -> Iterator[TestClient]:
+    """HTTP client of an app serving gRPC next to its routes."""
+    monkeypatch.setattr(settings, "GRPC_PORT", _free_port())
+    with TestClient(create_app()) as client:
+        yield client
+
+
+@pytest.fixture
+def stub(http: TestClient) -> Iterator[CryptoStub]:
+    with grpc.insecure_channel(f"127.0.0.1:{settings.GRPC_PORT}") as channel:
+        yield CryptoStub(channel)
+
+
+def test_unary_calls_match_http_routes(http: TestClient, stub: CryptoStub):
+    """Test that unary calls answer exactly like the HTTP routes."""
+    encrypted = stub.Encrypt(PayloadRequest(payload=BODY)).payload
+    assert json.loads(encrypted) == http.post("/encrypt", json=PAYLOAD).json()
+
+    decrypted = stub.Decrypt(PayloadRequest(payload=encrypted)).payload
+    assert json.loads(decrypted) == PAYLOAD
+
+    signature = stub.Sign(PayloadRequest(payload=BODY)).signature
+    assert signature == http.post("/sign", json=PAYLOAD).json()["signature"]
+    assert stub.Verify(VerifyRequest(payload=BODY, signature=signature)).valid
+    assert not stub.Verify(VerifyRequest(payload=b"{}", signature=signature)).valid
+
+
+def test_algorithm_selection(stub: CryptoStub):
+    """Test that requests select their algorithm like the HTTP headers do."""
+    request = PayloadRequest(payload=b'{"name": "John"}', algorithm="rot13")
+    encrypted = stub.Encrypt(request).payload
+    assert encrypted == b'{"name":"\\"Wbua\\""}'
+
+    with pytest.raises(grpc.RpcError) as e:
+        stub.Sign(PayloadRequest(payload=BODY, algorithm="md5"))
+    assert e.value.code() == grpc.StatusCode.INVALID_ARGUMENT
+    assert "Unsupported signing algorithm: 'md5'" in e.value.details()
+
+
+@pytest.mark.parametrize("payload", [b"not json", b"[1, 2]", b""])
+def test_unary_invalid_payloads(stub: CryptoStub, payload: bytes):
+    """Test that payloads other than JSON objects fail the call."""
+    with pytest.raises(grpc.RpcError) as e:
+        stub.Encrypt(PayloadRequest(payload=payload))
+    assert e.value.code() == grpc.StatusCode.INVALID_ARGUMENT
+
+
+def test_body_limits_apply(monkeypatch: pytest.MonkeyPatch, stub: CryptoStub):
+    """Test that the limits on request bodies apply to gRPC payloads."""
+    monkeypatch.setattr(settings, "MAX_JSON_DEPTH", 2)
+    with pytest.raises(grpc.RpcError) as e:
+        stub.Sign(PayloadRequest(payload=b'{"a": {"b": {"c": 1}}}'))
+    assert e.value.code() == grpc.StatusCode.RESOURCE_EXHAUSTED
+
+
+def test_streams_answer_in_order(stub: CryptoStub):
+    """Test that streams answer every request in order, errors included."""
+    requests = [
+        PayloadRequest(payload=b'{"status": "ACTIVE"}', id=1),
+        PayloadRequest(payload=b"[]", id=2),
+        PayloadRequest(payload=b'{"status": "ACTIVE"}', id=3, algorithm="nope"),
+        PayloadRequest(payload=b'{"status": "ACTIVE"}', id=4, algorithm="rot13"),
+    ]
+    replies = list(stub.EncryptStream(iter(requests)))
+
+    assert [reply.id for reply in replies] == [1, 2, 3, 4]
+    assert json.loads(replies[0].payload) == {"status": "IkFDVElWRSI="}
+    assert replies[1].error == "Payload must be a JSON object"
+    assert replies[2].error.startswith("Unsupported encryption algorithm")
+    assert json.loads(replies[3].payload) == {"status": '"NPGVIR"'}
+
+    decrypted = stub.DecryptStream(
+        iter([PayloadRequest(payload=replies[0].payload, id=7)])
+    )
+    assert [json.loads(reply.payload) for reply in decrypted] == [{"status": "ACTIVE"}]
+
+
+def test_sign_and_verify_streams(stub: CryptoStub):
+    """Test that signatures made on a stream verify on another, in order."""
+    payloads = [json.dumps({"index": index}).encode() for index in range(20)]
+    signatures = [
+        reply.signature
+        for reply in stub.SignStream(
+            PayloadRequest(payload=payload, id=index)
+            for index, payload in enumerate(payloads)
+        )
+    ]
+    # every other payload gets the signature of the next one
+    signatures[1::2] = signatures[2::2] + signatures[:1]
+    verifications = stub.VerifyStream(
+        VerifyRequest(payload=payload, signature=signature, id=index)
+        for index, (payload, signature) in enumerate(zip(payloads, signatures))
+    )
+    assert [reply.valid for reply in verifications] == [True, False] * 10
+
+
+def test_request_errors_pickle():
+    """Test that errors raised in worker processes reach the handler intact."""
+    error = pickle.loads(
+        pickle.dumps(RequestError(grpc.StatusCode.INVALID_ARGUMENT, "bad"))
+    )
+    assert (error.code, error.detail) == (grpc.StatusCode.INVALID_ARGUMENT, "bad")
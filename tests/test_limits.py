@@ -0,0 +1,250 @@
+"""Tests for the request body limits and the admission control of CPU work."""
+
+import asyncio
+import json
+import threading
+import time
+from typing import Iterator
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.exceptions import HTTPException
+
+from src.core.dependencies import container
+from src.core.limits import BodyLimitExceeded, JSONShapeScanner
+from src.core.offload import AdmissionGate, CPUOffloader
+from src.core.settings import settings
+from src.main import app, create_app
+
+client = TestClient(app)
+
+
+def _nested(depth: int) -> dict:
+    data: dict = {"leaf": "x"}
+    for _ in range(depth - 1):
+        data = {"child": data}
+    return data
+
+
+def _scan(body: bytes, chunk_size: int, max_depth: int, max_keys: int):
+    scanner = JSONShapeScanner(max_depth, max_keys)
+    for start in range(0, len(body), chunk_size):
+        scanner.feed(body[start : start + chunk_size])
+    return scanner
+
+
+def _chunks(body: bytes, size: int = 7) -> Iterator[bytes]:
+    for start in range(0, len(body), size):
+        yield body[start : start + size]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 5, 64, 1 << 20])
+def test_scanner_ignores_strings(chunk_size: int):
+    """Test that brackets, colons and escaped quotes in strings are skipped."""
+    data = {
+        'tricky "key": {[': 'value with \\" and \\\\" and [{:',
+        "list": [1, {"a": [None, "]}"]}],
+        "unicode": "café ☃",
+    }
+    for body in (json.dumps(data), json.dumps(data, ensure_ascii=False, indent=2)):
+        scanner = _scan(body.encode(), chunk_size, max_depth=4, max_keys=3)
+        assert scanner.depth == 0
+        assert scanner.top_level_keys == 3
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 1 << 20])
+def test_scanner_limits(chunk_size: int):
+    """Test that the depth and key limits are enforced at their boundary."""
+    deep = json.dumps(_nested(5)).encode()
+    _scan(deep, chunk_size, max_depth=5, max_keys=0)
+    with pytest.raises(BodyLimitExceeded, match="deeper than 4 levels"):
+        _scan(deep, chunk_size, max_depth=4, max_keys=0)
+
+    wide = json.dumps({f"key{i}": {"nested": i} for i in range(10)}).encode()
+    _scan(wide, chunk_size, max_depth=0, max_keys=10)
+    with pytest.raises(BodyLimitExceeded, match="more than 9 top-level keys"):
+        _scan(wide, chunk_size, max_depth=0, max_keys=9)
+
+
+def test_content_length_over_limit(monkeypatch: pytest.MonkeyPatch):
+    """Test that a declared body over the limit is rejected before reading it."""
+    monkeypatch.setattr(settings, "MAX_BODY_BYTES", 100)
+
+    response = client.post("/encrypt", json={"data": "x" * 100})
+    assert response.status_code == 413
+    assert response.json() == {
+        "detail": "Request body exceeds the maximum of 100 bytes"
+    }
+    assert client.post("/encrypt", json={"data": "x"}).status_code == 200
+
+
+def test_streamed_body_over_limit(monkeypatch: pytest.MonkeyPatch):
+    """Test that a body without Content-Length is cut off at the limit."""
+    monkeypatch.setattr(settings, "MAX_BODY_BYTES", 100)
+    body = json.dumps({"data": "x" * 100}).encode()
+
+    response = client.post(
+        "/sign", content=_chunks(body), headers={"Content-Type": "application/json"}
+    )
+    assert response.status_code == 413
+
+
+@pytest.mark.parametrize(
+    "setting,data,detail",
+    [
+        ("MAX_JSON_DEPTH", _nested(6), "nested deeper than 5 levels"),
+        (
+            "MAX_TOP_LEVEL_KEYS",
+            {str(i): i for i in range(6)},
+            "more than 5 top-level keys",
+        ),
+    ],
+)
+def test_shape_limits(monkeypatch: pytest.MonkeyPatch, setting, data, detail):
+    """Test that too deep or too wide bodies are answered with a 413."""
+    monkeypatch.setattr(settings, setting, 5)
+    body = json.dumps(data).encode()
+
+    for content in (body, _chunks(body)):
+        response = client.post(
+            "/encrypt", content=content, headers={"Content-Type": "application/json"}
+        )
+        assert response.status_code == 413
+        assert detail in response.json()["detail"]
+
+
+def test_ndjson_bodies_are_exempt(monkeypatch: pytest.MonkeyPatch):
+    """Test that the streaming routes keep their own per-line limit."""
+    monkeypatch.setattr(settings, "MAX_BODY_BYTES", 10)
+    monkeypatch.setattr(settings, "MAX_TOP_LEVEL_KEYS", 1)
+    body = b'{"a": 1, "b": 2}\n{"c": 3}\n'
+
+    response = client.post(
+        "/stream/encrypt",
+        content=body,
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+    assert response.status_code == 200
+    assert len(response.text.splitlines()) == 2
+
+
+@pytest.mark.parametrize("raw_body", [False, True])
+def test_ndjson_bodies_limited_outside_streams(
+    monkeypatch: pytest.MonkeyPatch, raw_body: bool
+):
+    """Test that an NDJSON Content-Type does not lift the limits of other routes."""
+    monkeypatch.setattr(settings, "MAX_BODY_BYTES", 1000)
+    body = json.dumps({"data": "x" * 5000}).encode()
+    headers = {"Content-Type": "application/x-ndjson"}
+
+    with TestClient(create_app(raw_body=raw_body)) as raw_client:
+        for content in (body, _chunks(body, 512)):
+            response = raw_client.post("/encrypt", content=content, headers=headers)
+            assert response.status_code == 413
+
+
+def test_stream_body_cap(monkeypatch: pytest.MonkeyPatch):
+    """Test that the streaming routes are held to their own body cap."""
+    monkeypatch.setattr(settings, "STREAM_MAX_BODY_BYTES", 100)
+    body = b'{"a": 1}\n' * 20
+
+    response = client.post(
+        "/stream/encrypt",
+        content=body,
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+    assert response.status_code == 413
+
+
+def test_gate_sheds_when_queue_is_full():
+    """Test that calls beyond the queue are shed with Retry-After."""
+    gate = AdmissionGate(1, max_queued=1, queue_timeout=10, shed_status=429)
+
+    async def run() -> None:
+        await gate.acquire()
+        queued = asyncio.create_task(gate.acquire())
+        await asyncio.sleep(0)
+
+        with pytest.raises(HTTPException) as excinfo:
+            await gate.acquire()
+        assert excinfo.value.status_code == 429
+        assert excinfo.value.headers == {"Retry-After": "1"}
+
+        # the slot is handed over to the queued call
+        gate.release()
+        await queued
+        assert gate.in_flight == 1
+        gate.release()
+        assert gate.in_flight == 0
+
+    asyncio.run(run())
+    assert gate.shed == 1
+
+
+def test_gate_sheds_on_queue_timeout():
+    """Test that queued calls give up after the queue timeout."""
+    gate = AdmissionGate(1, queue_timeout=0.01)
+
+    async def run() -> None:
+        await gate.acquire()
+        with pytest.raises(HTTPException) as excinfo:
+            await gate.acquire()
+        assert excinfo.value.status_code == 503
+
+        # a cancelled waiter does not keep its place either
+        waiter = asyncio.create_task(gate.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+        gate.release()
+        assert gate.in_flight == 0
+        assert not gate._waiters
+
+    asyncio.run(run())
+
+
+def test_offloader_waits_for_the_gate():
+    """Test that the offloader never runs more calls than the gate admits."""
+    gate = AdmissionGate(2, max_queued=10)
+    offloader = CPUOffloader(
+        mode="async", executor="thread", threshold_bytes=0, max_workers=4, gate=gate
+    )
+    lock = threading.Lock()
+    running = peak = 0
+
+    def work() -> None:
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.01)
+        with lock:
+            running -= 1
+
+    async def run() -> None:
+        await asyncio.gather(*(offloader.run(None, work) for _ in range(6)))
+
+    try:
+        asyncio.run(run())
+    finally:
+        offloader.shutdown()
+    assert peak == 2
+    assert gate.in_flight == 0
+
+
+@pytest.mark.parametrize(
+    "path, body", [("/sign", {"a": 1}), ("/batch/sign", [{"a": 1}] * 3)]
+)
+def test_overloaded_endpoint(monkeypatch: pytest.MonkeyPatch, path: str, body):
+    """Test that the crypto and batch routes answer with the shed status."""
+    gate = AdmissionGate(1, max_queued=0)
+    gate.in_flight = 1
+    offloader = CPUOffloader(mode="sync", gate=gate)
+    monkeypatch.setattr(container, "offloader", offloader)
+
+    response = client.post(path, json=body)
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert response.json() == {"detail": "Server is overloaded, retry later"}
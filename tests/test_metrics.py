@@ -0,0 +1,124 @@
+"""Tests for the per-stage timing metrics and the /metrics endpoint."""
+
+import pickle
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.core.metrics import Histogram, metrics
+from src.main import app
+from src.services.base64_encryption import Base64EncryptionService
+from src.services.encryption_service import EncryptionService
+from src.services.hmac_signing import HMACSigningService
+from src.services.signing_service import SigningService
+
+client = TestClient(app)
+
+
+class RecordingObserver:
+    def __init__(self):
+        self.stages: list[str] = []
+
+    def observe(self, stage: str, start: float, end: float) -> None:
+        assert end >= start
+        self.stages.append(stage)
+
+
+@pytest.fixture(autouse=True)
+def clear_metrics():
+    metrics.clear()
+    yield
+    metrics.clear()
+
+
+def _counts(text: str) -> dict[str, int]:
+    """Map the label set of every `_count` sample to its value."""
+    prefix = "crypto_stage_duration_seconds_count"
+    return {
+        line[len(prefix) : line.rindex(" ")]: int(line.rsplit(" ", 1)[1])
+        for line in text.splitlines()
+        if line.startswith(prefix)
+    }
+
+
+def test_histogram_render():
+    """Test the Prometheus text format: cumulative buckets, sum and count."""
+    histogram = Histogram("test_seconds", "Test.", ("route",), buckets=(0.1, 1.0))
+    histogram.observe(("/a",), 0.05)
+    histogram.observe(("/a",), 0.5)
+    histogram.observe(("/a",), 5.0)
+    histogram.observe(('say "hi"\n',), 0.1)
+
+    assert list(histogram.render()) == [
+        "# HELP test_seconds Test.",
+        "# TYPE test_seconds histogram",
+        'test_seconds_bucket{route="/a",le="0.1"} 1',
+        'test_seconds_bucket{route="/a",le="1.0"} 2',
+        'test_seconds_bucket{route="/a",le="+Inf"} 3',
+        'test_seconds_sum{route="/a"} 5.55',
+        'test_seconds_count{route="/a"} 3',
+        'test_seconds_bucket{route="say \\"hi\\"\\n",le="0.1"} 1',
+        'test_seconds_bucket{route="say \\"hi\\"\\n",le="1.0"} 1',
+        'test_seconds_bucket{route="say \\"hi\\"\\n",le="+Inf"} 1',
+        'test_seconds_sum{route="say \\"hi\\"\\n"} 0.1',
+        'test_seconds_count{route="say \\"hi\\"\\n"} 1',
+    ]
+
+
+def test_metrics_endpoint_reports_stages():
+    """Test that requests are broken down into stages, by route and algorithm."""
+    client.post("/encrypt", json={"name": "John Doe"})
+    client.post("/sign", json={"name": "John Doe"})
+    client.post(
+        "/decrypt", json={"name": "plain"}, headers={"X-Encryption-Algorithm": "rot13"}
+    )
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+
+    counts = _counts(response.text)
+    for stage in ("request", "parse", "encrypt", "render", "response"):
+        assert counts[f'{{stage="{stage}",route="/encrypt",algorithm="base64"}}'] == 1
+    for stage in ("request", "parse", "sign", "response"):
+        assert counts[f'{{stage="{stage}",route="/sign",algorithm="hmac"}}'] == 1
+    assert counts['{stage="decrypt",route="/decrypt",algorithm="rot13"}'] == 1
+
+
+def test_unmatched_routes_share_a_label():
+    """Test that unknown paths do not create a series each."""
+    client.get("/does-not-exist")
+    client.get("/neither-does-this")
+
+    counts = _counts(client.get("/metrics").text)
+    assert counts['{stage="request",route="unmatched",algorithm=""}'] == 2
+
+
+def test_services_report_stages():
+    """Test the timing hooks of the encryption and signing services."""
+    observer = RecordingObserver()
+    encryption = EncryptionService(Base64EncryptionService(), observer=observer)
+    signing = SigningService(HMACSigningService("secret"), observer=observer)
+
+    encrypted = encryption.encrypt_payload({"a": 1})
+    encryption.decrypt_payload(encrypted)
+    encryption.encrypt_payload_json({"a": 1})
+    signature = signing.sign_payload({"a": 1})["signature"]
+    signing.verify_payload({"a": 1}, signature)
+
+    assert observer.stages == [
+        "encrypt",
+        "decrypt",
+        "encrypt",
+        "render",
+        "sign",
+        "verify",
+    ]
+
+
+def test_observer_is_not_sent_to_workers():
+    """Test that services handed over to worker processes lose their hook."""
+    observer = metrics.observer("hmac")
+    signing = SigningService(HMACSigningService("secret"), observer=observer)
+
+    assert pickle.loads(pickle.dumps(signing)).observer is None
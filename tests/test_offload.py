@@ -0,0 +1,126 @@
+"""Tests for the CPU offloading execution modes."""
+
+import asyncio
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.api import crypto
+from src.core.dependencies import container
+from src.core.offload import CPUOffloader, LazyExecutor
+from src.main import app
+from src.services.hmac_signing import HMACSigningService
+from src.services.signature_cache import CachedSigningService
+from src.services.signing_service import SigningService
+
+
+def _current_thread_name() -> str:
+    return threading.current_thread().name
+
+
+def test_async_mode_runs_small_bodies_inline():
+    """Test that small bodies run on the event loop thread in async mode."""
+    offloader = CPUOffloader(mode="async", executor="thread", threshold_bytes=1024)
+
+    async def run() -> tuple[str, str]:
+        return threading.current_thread().name, await offloader.run(
+            10, _current_thread_name
+        )
+
+    loop_thread, worker_thread = asyncio.run(run())
+    assert worker_thread == loop_thread
+
+
+@pytest.mark.parametrize("size", [1024, 10_000, None])
+def test_async_mode_offloads_large_bodies(size: int | None):
+    """Test that large or unknown-size bodies go to the worker pool."""
+    offloader = CPUOffloader(mode="async", executor="thread", threshold_bytes=1024)
+
+    try:
+        worker_thread = asyncio.run(offloader.run(size, _current_thread_name))
+    finally:
+        offloader.shutdown()
+    assert worker_thread.startswith("cpu-offload")
+
+
+def test_lazy_executor_starts_on_first_use():
+    """Test that no pool exists before a submission, nor after a shutdown."""
+    executor = LazyExecutor("thread", max_workers=2, thread_name_prefix="lazy")
+    assert executor._pool is None
+    executor.shutdown()
+
+    assert executor.submit(_current_thread_name).result().startswith("lazy")
+    assert list(executor.map(abs, [-1, -2])) == [1, 2]
+    executor.shutdown()
+    assert executor._pool is None
+
+    # a new pool is started for work submitted after a shutdown
+    assert executor.submit(abs, -3).result() == 3
+    executor.shutdown()
+
+
+def test_process_pool_signing_matches_inline():
+    """Test that signing services survive the trip to a worker process."""
+    algorithm = HMACSigningService(
+        "extremely-secret-hmac-secret", keys={"2025": "new"}, active_key_id="2025"
+    )
+    service = SigningService(CachedSigningService(algorithm))
+    offloader = CPUOffloader(
+        mode="async", executor="process", threshold_bytes=0, max_workers=1
+    )
+
+    data = {"message": "Hello World", "timestamp": 1616161616}
+    try:
+        result = asyncio.run(offloader.run(None, service.sign_payload, data))
+    finally:
+        offloader.shutdown()
+    assert result == service.sign_payload(data)
+
+
+def test_endpoints_in_async_mode(monkeypatch: pytest.MonkeyPatch):
+    """Test the crypto routes when every body is offloaded."""
+    offloader = CPUOffloader(mode="async", executor="thread", threshold_bytes=0)
+    monkeypatch.setattr(container, "offloader", offloader)
+
+    payload = {"message": "Hello World", "timestamp": 1616161616}
+    with TestClient(app) as client:
+        encrypted = client.post("/encrypt", json=payload).json()
+        assert client.post("/decrypt", json=encrypted).json() == payload
+
+        signature = client.post("/sign", json=payload).json()["signature"]
+        verify_payload = {"signature": signature, "data": payload}
+        assert client.post("/verify", json=verify_payload).status_code == 204
+        verify_payload["signature"] = "invalid"
+        assert client.post("/verify", json=verify_payload).status_code == 400
+
+
+def test_responses_rendered_in_offloaded_call(monkeypatch: pytest.MonkeyPatch):
+    """Test that /decrypt and /sign render their response off the event loop."""
+    offloader = CPUOffloader(mode="async", executor="thread", threshold_bytes=0)
+    monkeypatch.setattr(container, "offloader", offloader)
+    threads: list[str] = []
+
+    def recording(render):
+        def wrapper(*args):
+            threads.append(_current_thread_name())
+            return render(*args)
+
+        return wrapper
+
+    monkeypatch.setattr(crypto, "render_json", recording(crypto.render_json))
+    monkeypatch.setattr(
+        crypto, "render_json_object", recording(crypto.render_json_object)
+    )
+    payload = {"message": "Hello World", "unicode": "é漢🙂"}
+    try:
+        with TestClient(app) as client:
+            encrypted = client.post("/encrypt", json=payload).json()
+            response = client.post("/decrypt", json=encrypted)
+            assert response.json() == payload
+            assert response.headers["content-type"] == "application/json"
+            assert client.post("/sign", json=payload).json()["signature"]
+    finally:
+        offloader.shutdown()
+    assert len(threads) == 2
+    assert all(thread.startswith("cpu-offload") for thread in threads)
@@ -0,0 +1,91 @@
+"""Tests comparing the table-driven ROT13 engine with the reference implementation."""
+
+import random
+import string
+from typing import Any
+
+import pytest
+
+from src.services.encryption_service import EncryptionService
+from src.services.protocols import NOT_DECRYPTABLE, EncryptionProtocol
+from src.services.rot13_encryption import ROT13EncryptionService, rot13_reference
+
+ALPHABET = string.printable + "éàüßñ€漢字🙂\u0000"
+
+
+def _random_texts(count: int) -> list[str]:
+    rng = random.Random(1337)
+    return [
+        "".join(rng.choice(ALPHABET) for _ in range(rng.randint(0, 200)))
+        for _ in range(count)
+    ]
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "",
+        "Hello World",
+        "NOPQRSTUVWXYZ abcdefghijklm",
+        '{"é":"漢字🙂"}',
+        "[]{}0123456789",
+    ]
+    + _random_texts(200),
+)
+def test_rot13_matches_reference(text: str):
+    """Test that the translation table agrees with the per-character reference."""
+    service = ROT13EncryptionService()
+
+    assert service._rot13_encode(text) == rot13_reference(text)
+    assert service._rot13_decode(service._rot13_encode(text)) == text
+
+
+@pytest.mark.parametrize(
+    "values",
+    [
+        [],
+        ["John Doe"],
+        ["John Doe", 30, {"email": "test@example.com"}, [1, 2, 3], True, None],
+        ["line\nbreak", {"nested": "multi\nline"}],
+    ],
+)
+def test_rot13_encrypt_many_matches_encrypt(values: list[Any]):
+    """Test that the single-pass bulk path agrees with per-value encryption."""
+    service = ROT13EncryptionService()
+
+    assert service.encrypt_many(values) == [service.encrypt(value) for value in values]
+    assert service.encrypt_many_bytes(values) == [
+        value.encode() for value in service.encrypt_many(values)
+    ]
+
+
+def test_rot13_payload_round_trip():
+    """Test that a ROT13-encrypted payload decrypts back to the original."""
+    service = EncryptionService(ROT13EncryptionService())
+
+    original = {
+        "name": "John Doe",
+        "age": 30,
+        "contact": {"email": "john@example.com", "phone": "123-456-7890"},
+    }
+
+    encrypted = service.encrypt_payload(original)
+    assert encrypted["name"] == '"Wbua Qbr"'
+    assert service.decrypt_payload(encrypted) == original
+
+
+@pytest.mark.parametrize(
+    "text",
+    ["", "John Doe", "1998-11-19", " 42 ", "gehr", "AnA", "-Vasvavgl", '"Uryyb"']
+    + _random_texts(200),
+)
+def test_rot13_try_decrypt_matches_decrypt(text: str):
+    """Test that the pre-validated try_decrypt agrees with decrypt."""
+    service = ROT13EncryptionService()
+
+    expected = EncryptionProtocol.try_decrypt(service, text)
+    actual = service.try_decrypt(text)
+    if expected is NOT_DECRYPTABLE:
+        assert actual is NOT_DECRYPTABLE
+    else:
+        assert repr(actual) == repr(expected)
@@ -0,0 +1,123 @@
+"""Tests for the preforking server and startup tuning."""
+
+import gc
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from src.core.settings import settings
+from src.main import create_app
+from src.server import MIN_WORKER_LIFETIME_SECONDS, _supervise
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "fork"), reason="needs os.fork")
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _children(pid: int) -> set[int]:
+    with open(f"/proc/{pid}/task/{pid}/children") as f:
+        return {int(child) for child in f.read().split()}
+
+
+def _wait_for(condition, timeout: float = 20.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if result := condition():
+                return result
+        except httpx.TransportError:
+            pass
+        time.sleep(0.05)
+    raise AssertionError("condition not met in time")
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/task"), reason="needs procfs")
+def test_preforked_workers_serve_and_are_replaced():
+    """Test that forked workers share the socket and that dead ones are replaced."""
+    port = _free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "src.server", "--port", str(port), "--workers", "2"],
+        cwd=PROJECT_ROOT,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}") as client:
+            _wait_for(lambda: client.get("/health/").status_code == 200)
+            response = client.post("/encrypt", json={"name": "John Doe"})
+            assert response.json() == {"name": "IkpvaG4gRG9lIg=="}
+
+            _wait_for(lambda: len(_children(server.pid)) == 2)
+            # younger workers dying are taken for a failed start
+            time.sleep(MIN_WORKER_LIFETIME_SECONDS)
+            workers = _children(server.pid)
+            killed = workers.pop()
+            os.kill(killed, signal.SIGKILL)
+            _wait_for(lambda: len(_children(server.pid) - workers - {killed}) == 1)
+            assert client.get("/health/").status_code == 200
+
+        server.send_signal(signal.SIGTERM)
+        assert server.wait(timeout=20) == 0
+    finally:
+        if server.poll() is None:
+            server.kill()
+
+
+def test_workers_failing_to_start_stop_the_server():
+    """Test that a worker exiting right away is not respawned in a loop."""
+    handlers = signal.getsignal(signal.SIGTERM), signal.getsignal(signal.SIGINT)
+    try:
+        assert _supervise(lambda: os._exit(3), workers=2) == 1
+    finally:
+        signal.signal(signal.SIGTERM, handlers[0])
+        signal.signal(signal.SIGINT, handlers[1])
+
+
+@pytest.mark.parametrize("enabled", [True, False])
+def test_startup_objects_are_frozen(monkeypatch: pytest.MonkeyPatch, enabled: bool):
+    """Test that the lifespan freezes the objects built at startup, if enabled."""
+    monkeypatch.setattr(settings, "GC_FREEZE_AFTER_STARTUP", enabled)
+    gc.unfreeze()
+    try:
+        with TestClient(create_app()):
+            assert (gc.get_freeze_count() > 0) is enabled
+    finally:
+        gc.unfreeze()
+
+
+@pytest.mark.parametrize(
+    "raw_body, served, skipped",
+    [
+        ("false", "src.api.crypto", "src.api.crypto_raw"),
+        ("true", "src.api.crypto_raw", "src.api.crypto"),
+    ],
+)
+def test_only_served_crypto_routes_are_imported(
+    raw_body: str, served: str, skipped: str
+):
+    """Test that the variant of the crypto routes not served is never imported."""
+    code = (
+        "import sys, src.main\n"
+        f"assert {served!r} in sys.modules\n"
+        f"assert {skipped!r} not in sys.modules\n"
+    )
+    subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=PROJECT_ROOT,
+        env={**os.environ, "CRYPTO_RAW_BODY": raw_body},
+        check=True,
+    )
@@ -0,0 +1,131 @@
+"""Tests for the WebSocket session endpoint of the crypto routes."""
+
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from src.core.dependencies import container
+from src.core.offload import AdmissionGate, CPUOffloader
+from src.core.settings import settings
+from src.main import app, create_app
+
+PAYLOAD = {"name": "John Doe", "age": 30, "contact": {"email": "john@example.com"}}
+
+
+def _frame(frame_id: int, op: str, payload: object) -> str:
+    return json.dumps({"id": frame_id, "op": op, "payload": payload})
+
+
+@pytest.mark.parametrize("raw_body", [False, True])
+def test_session_matches_http_routes(raw_body: bool):
+    """Test that every operation answers like its HTTP route, on both routers."""
+    with TestClient(create_app(raw_body=raw_body)) as client:
+        encrypted = client.post("/encrypt", json=PAYLOAD).json()
+        signature = client.post("/sign", json=PAYLOAD).json()["signature"]
+
+        with client.websocket_connect("/session") as websocket:
+            websocket.send_text(_frame(1, "encrypt", PAYLOAD))
+            websocket.send_text(_frame(2, "decrypt", encrypted))
+            websocket.send_text(_frame(3, "sign", PAYLOAD))
+            verification = {"signature": signature, "data": PAYLOAD}
+            websocket.send_text(_frame(4, "verify", verification))
+            verification = {"signature": signature, "data": {}}
+            websocket.send_text(_frame(5, "verify", verification))
+            replies = [websocket.receive_json() for _ in range(5)]
+
+    assert replies == [
+        {"id": 1, "result": encrypted, "error": None},
+        {"id": 2, "result": PAYLOAD, "error": None},
+        {"id": 3, "result": {"signature": signature}, "error": None},
+        {"id": 4, "result": {"valid": True}, "error": None},
+        {"id": 5, "result": {"valid": False}, "error": None},
+    ]
+
+
+@pytest.mark.parametrize(
+    "url, headers",
+    [
+        ("/session?encryption_algorithm=rot13", {}),
+        ("/session", {"X-Encryption-Algorithm": "rot13"}),
+    ],
+)
+def test_algorithm_negotiated_once(url: str, headers: dict[str, str]):
+    """Test that the algorithm chosen at the handshake serves the whole session."""
+    with TestClient(app) as client:
+        with client.websocket_connect(url, headers=headers) as websocket:
+            for frame_id in range(3):
+                websocket.send_text(_frame(frame_id, "encrypt", {"name": "John"}))
+                reply = websocket.receive_json()
+                assert reply["result"] == {"name": '"Wbua"'}
+
+
+def test_unsupported_algorithm_closes_session():
+    """Test that an unsupported algorithm closes the session with a reason."""
+    with TestClient(app) as client:
+        with client.websocket_connect("/session?signing_algorithm=md5") as websocket:
+            with pytest.raises(WebSocketDisconnect) as e:
+                websocket.receive_text()
+    assert e.value.code == 1008
+    assert e.value.reason.startswith("Unsupported signing algorithm: 'md5'")
+
+
+def test_frame_errors_answered_in_place():
+    """Test that bad frames get an error reply without ending the session."""
+    frames = [
+        "not json",
+        "[1, 2]",
+        _frame(1, "frobnicate", {}),
+        json.dumps({"id": 2, "op": "sign"}),
+        _frame(3, "verify", {"data": {}}),
+    ]
+    with TestClient(app) as client:
+        with client.websocket_connect("/session") as websocket:
+            for frame in frames:
+                websocket.send_text(frame)
+            websocket.send_bytes(_frame(4, "sign", {}).encode())
+            replies = [websocket.receive_json() for _ in range(6)]
+
+    assert [reply["id"] for reply in replies] == [None, None, 1, 2, 3, 4]
+    assert [reply["error"] for reply in replies[:5]] == [
+        "Frame is not valid JSON",
+        "Frame must be a JSON object",
+        "Unsupported operation: 'frobnicate'. Supported: encrypt, decrypt, sign, verify",
+        "Payload must be a JSON object",
+        "signature: Field required",
+    ]
+    assert replies[5]["error"] is None
+
+
+def test_body_limits_apply_to_frames(monkeypatch: pytest.MonkeyPatch):
+    """Test that the limits on request bodies apply to each frame's payload."""
+    monkeypatch.setattr(settings, "MAX_JSON_DEPTH", 2)
+    monkeypatch.setattr(settings, "MAX_TOP_LEVEL_KEYS", 2)
+    with TestClient(app) as client:
+        with client.websocket_connect("/session") as websocket:
+            websocket.send_text(_frame(1, "sign", {"a": {"b": 1}}))
+            websocket.send_text(_frame(2, "sign", {"a": {"b": {"c": 1}}}))
+            websocket.send_text(_frame(3, "sign", {"a": 1, "b": 2, "c": 3}))
+            replies = [websocket.receive_json() for _ in range(3)]
+
+    assert replies[0]["error"] is None
+    assert replies[1]["error"] == "Payload is nested deeper than 2 levels"
+    assert replies[2]["error"] == "Payload has more than 2 top-level keys"
+
+
+def test_frames_shed_by_admission_gate(monkeypatch: pytest.MonkeyPatch):
+    """Test that frames shed by the admission gate get an error reply."""
+    gate = AdmissionGate(1, max_queued=0)
+    gate.in_flight = 1
+    monkeypatch.setattr(container, "offloader", CPUOffloader(gate=gate))
+    with TestClient(app) as client:
+        with client.websocket_connect("/session") as websocket:
+            websocket.send_text(_frame(1, "sign", PAYLOAD))
+            reply = websocket.receive_json()
+
+    assert reply == {
+        "id": 1,
+        "result": None,
+        "error": "Server is overloaded, retry later",
+    }
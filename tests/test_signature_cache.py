@@ -0,0 +1,118 @@
+from src.services.hmac_signing import HMACSigningService
+from src.services.signature_cache import CachedSigningService
+
+EXTREMELY_SECRET_HMAC_SECRET = "extremely-secret-hmac-secret"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_cached_signature_matches_uncached():
+    """Test that the cache returns exactly what the wrapped algorithm computes."""
+    algorithm = HMACSigningService(EXTREMELY_SECRET_HMAC_SECRET)
+    service = CachedSigningService(algorithm)
+
+    data = {"message": "Hello World", "timestamp": 1616161616}
+    assert service.sign(data) == algorithm.sign(data)
+    assert service.sign(data) == algorithm.sign(data)
+    assert service.stats()["hits"] == 1
+    assert service.stats()["misses"] == 1
+
+
+def test_cache_is_order_independent():
+    """Test that reordered payloads share a single cache entry."""
+    service = CachedSigningService(HMACSigningService(EXTREMELY_SECRET_HMAC_SECRET))
+
+    service.sign({"message": "Hello World", "timestamp": 1616161616})
+    service.sign({"timestamp": 1616161616, "message": "Hello World"})
+
+    assert service.stats()["entries"] == 1
+    assert service.stats()["hits"] == 1
+
+
+def test_cached_verification():
+    """Test that verification uses the cache and still rejects bad signatures."""
+    service = CachedSigningService(HMACSigningService(EXTREMELY_SECRET_HMAC_SECRET))
+
+    data = {"message": "Hello World", "timestamp": 1616161616}
+    signature = service.sign(data)
+
+    assert service.verify(data, signature) is True
+    assert service.verify(data, "invalid-signature") is False
+    assert service.verify({"message": "Goodbye World"}, signature) is False
+    assert service.verify(data, "é") is False
+    assert service.stats()["hits"] >= 2
+
+
+def test_cache_ttl_expiry():
+    """Test that entries older than the TTL are recomputed."""
+    clock = FakeClock()
+    service = CachedSigningService(
+        HMACSigningService(EXTREMELY_SECRET_HMAC_SECRET), ttl_seconds=10, clock=clock
+    )
+
+    service.sign({"a": 1})
+    clock.now = 5
+    service.sign({"a": 1})
+    clock.now = 11
+    service.sign({"a": 1})
+
+    assert service.stats()["hits"] == 1
+    assert service.stats()["misses"] == 2
+
+
+def test_cache_lru_eviction_by_entries():
+    """Test that the least recently used entry is evicted past max_entries."""
+    service = CachedSigningService(
+        HMACSigningService(EXTREMELY_SECRET_HMAC_SECRET), max_entries=2
+    )
+
+    service.sign({"a": 1})
+    service.sign({"b": 2})
+    service.sign({"a": 1})  # refresh "a", "b" is now least recently used
+    service.sign({"c": 3})
+
+    stats = service.stats()
+    assert stats["entries"] == 2
+    assert stats["evictions"] == 1
+
+    service.sign({"a": 1})
+    assert service.stats()["hits"] == 2  # "a" survived
+
+
+def test_cache_memory_ceiling():
+    """Test that the approximate memory ceiling bounds the cache."""
+    service = CachedSigningService(
+        HMACSigningService(EXTREMELY_SECRET_HMAC_SECRET), max_bytes=1_000
+    )
+
+    for index in range(100):
+        service.sign({"index": index})
+
+    stats = service.stats()
+    assert 0 < stats["size_bytes"] <= 1_000
+    assert stats["entries"] < 100
+
+
+def test_cache_invalidated_on_key_rotation():
+    """Test that rotating the signing key flushes cached signatures."""
+    algorithm = HMACSigningService(
+        EXTREMELY_SECRET_HMAC_SECRET, keys={"2025": "new-secret"}
+    )
+    service = CachedSigningService(algorithm)
+
+    data = {"message": "Hello World"}
+    old_signature = service.sign(data)
+
+    algorithm.activate_key("2025")
+    new_signature = service.sign(data)
+
+    assert new_signature.startswith("2025:")
+    assert new_signature != old_signature
+    # signatures made with the previous key keep verifying
+    assert service.verify(data, old_signature) is True
@@ -0,0 +1,202 @@
+"""Tests for the hmac-tree signing algorithm and its endpoints."""
+
+import asyncio
+import pickle
+
+from fastapi.testclient import TestClient
+
+from src.core.offload import CPUOffloader
+from src.main import app
+from src.services.hmac_signing import HMACSigningService
+from src.services.hmac_tree_signing import HMACTreeSigningService
+
+EXTREMELY_SECRET_HMAC_SECRET = "extremely-secret-hmac-secret"
+
+client = TestClient(app)
+
+
+def _service(**kwargs) -> HMACTreeSigningService:
+    return HMACTreeSigningService(
+        HMACSigningService(EXTREMELY_SECRET_HMAC_SECRET),
+        EXTREMELY_SECRET_HMAC_SECRET,
+        **kwargs,
+    )
+
+
+def test_tree_signature_round_trip():
+    """Test that tree signatures verify, are order independent and detect edits."""
+    service = _service()
+
+    data = {"message": "Hello World", "timestamp": 1616161616, "nested": {"a": [1]}}
+    signature = service.sign(data)
+
+    assert service.verify(data, signature) is True
+    assert service.sign(dict(reversed(list(data.items())))) == signature
+    assert service.verify({**data, "timestamp": 1616161617}, signature) is False
+    assert service.verify({**data, "extra": None}, signature) is False
+    assert signature != HMACSigningService(EXTREMELY_SECRET_HMAC_SECRET).sign(data)
+
+
+def test_tree_signature_distinguishes_equal_values():
+    """Test that values comparing equal in Python (1, 1.0, True) sign differently."""
+    service = _service()
+
+    signatures = {service.sign({"value": value}) for value in (1, 1.0, True, "1")}
+    assert len(signatures) == 4
+
+
+def test_failing_keys():
+    """Test that verification against the leaves reports the changed keys."""
+    service = _service()
+
+    data = {"name": "John Doe", "age": 30, "contact": {"email": "john@example.com"}}
+    signature, leaves = service.sign_tree(data)
+
+    assert service.failing_keys(data, signature, leaves) == []
+    assert service.failing_keys({**data, "age": 31}, signature, leaves) == ["age"]
+    assert service.failing_keys(
+        {"name": "John Doe", "age": 30, "extra": 1}, signature, leaves
+    ) == ["contact", "extra"]
+
+
+def test_failing_keys_with_tampered_leaves():
+    """Test that leaves not matching the signature make every key fail."""
+    service = _service()
+
+    data = {"name": "John Doe", "age": 30}
+    signature, leaves = service.sign_tree(data)
+    tampered = {**leaves, "age": service.sign_tree({"age": 31})[1]["age"]}
+
+    assert service.failing_keys({**data, "age": 31}, signature, tampered) == [
+        "age",
+        "name",
+    ]
+
+
+def test_resigning_only_hashes_changed_keys():
+    """Test that leaf digests of unchanged values come from the cache."""
+    service = _service()
+
+    data = {f"key-{index}": "x" * 1000 for index in range(10)}
+    data["counter"] = 1
+    first = service.sign(data)
+    assert service.stats()["misses"] == 11
+
+    data["counter"] = 2
+    second = service.sign(data)
+    assert second != first
+    assert service.stats() | {"size_bytes": 0} == {
+        "hits": 10,
+        "misses": 12,
+        "entries": 12,
+        "size_bytes": 0,
+    }
+
+
+def test_leaf_cache_bounds():
+    """Test that the leaf cache evicts by entry count and memory."""
+    service = _service(max_entries=3)
+    service.sign({str(index): index for index in range(10)})
+    assert service.stats()["entries"] == 3
+
+    service = _service(max_bytes=10_000)
+    service.sign({str(index): "x" * 3000 for index in range(10)})
+    assert 0 < service.stats()["size_bytes"] <= 10_000
+
+
+def test_tree_signature_with_key_ids():
+    """Test that the root signature follows the wrapped algorithm's key rotation."""
+    algorithm = HMACSigningService(
+        EXTREMELY_SECRET_HMAC_SECRET, keys={"2025-01": "new-secret"}
+    )
+    service = HMACTreeSigningService(algorithm, EXTREMELY_SECRET_HMAC_SECRET)
+
+    data = {"message": "Hello World"}
+    old_signature = service.sign(data)
+    algorithm.activate_key("2025-01")
+    new_signature = service.sign(data)
+
+    assert new_signature.startswith("2025-01:")
+    assert service.verify(data, old_signature) is True
+    assert service.verify(data, new_signature) is True
+
+
+def test_tree_service_pickles():
+    """Test that the service can be handed over to worker processes."""
+    service = _service()
+    data = {"message": "Hello World"}
+
+    assert pickle.loads(pickle.dumps(service)).sign(data) == service.sign(data)
+
+
+def _sign_tree_with_stats(
+    service: HMACTreeSigningService, data: dict
+) -> tuple[str, dict[str, int]]:
+    return service.sign(data), service.stats()
+
+
+def test_leaf_cache_reused_in_worker_process():
+    """Test that calls offloaded to a worker process share its leaf cache."""
+    service = _service()
+    offloader = CPUOffloader(
+        mode="async", executor="process", threshold_bytes=0, max_workers=1
+    )
+    data = {"message": "Hello World", "timestamp": 1616161616}
+
+    async def sign_twice() -> list[tuple[str, dict[str, int]]]:
+        return [
+            await offloader.run(None, _sign_tree_with_stats, service, data)
+            for _ in range(2)
+        ]
+
+    try:
+        (first, first_stats), (second, second_stats) = asyncio.run(sign_twice())
+    finally:
+        offloader.shutdown()
+
+    assert first == second == service.sign(data)
+    assert second_stats["hits"] - first_stats["hits"] == 2
+    assert second_stats["misses"] == first_stats["misses"]
+
+
+def test_sign_tree_endpoint():
+    """Test that /sign/tree matches /sign with the hmac-tree algorithm header."""
+    data = {"message": "Hello World", "timestamp": 1616161616}
+
+    response = client.post("/sign/tree", json=data)
+    assert response.status_code == 200
+    body = response.json()
+    assert set(body["leaves"]) == set(data)
+
+    response = client.post(
+        "/sign", json=data, headers={"X-Signing-Algorithm": "hmac-tree"}
+    )
+    assert response.json()["signature"] == body["signature"]
+
+    response = client.post(
+        "/verify",
+        json={"signature": body["signature"], "data": data},
+        headers={"X-Signing-Algorithm": "hmac-tree"},
+    )
+    assert response.status_code == 204
+
+
+def test_verify_tree_endpoint():
+    """Test that /verify/tree reports the properties that were changed."""
+    data = {"message": "Hello World", "timestamp": 1616161616}
+    signed = client.post("/sign/tree", json=data).json()
+
+    response = client.post("/verify/tree", json={**signed, "data": data})
+    assert response.status_code == 204
+
+    response = client.post(
+        "/verify/tree",
+        json={**signed, "data": {**data, "message": "Goodbye World"}},
+    )
+    assert response.status_code == 400
+    assert response.json() == {
+        "detail": {"message": "Invalid signature", "failing_keys": ["message"]}
+    }
+
+    response = client.post("/verify/tree", json={"signature": "x", "data": data})
+    assert response.status_code == 422
@@ -1,5 +1,11 @@
+import hashlib
+import hmac
+
+import pytest
+
 from src.services.hmac_signing import HMACSigningService
 from src.services.signing_service import SigningService
+from src.utils import to_deterministic_json
 
 EXTREMELY_SECRET_HMAC_SECRET = "extremely-secret-hmac-secret"
 
@@ -90,3 +96,71 @@ def test_signing_service():
     signature = result["signature"]
     assert service.verify_payload(payload, signature) is True
     assert service.verify_payload(payload, "invalid") is False
+
+
+def test_signature_matches_plain_hmac():
+    """Test that the pre-keyed state produces the same digest as a fresh HMAC."""
+    service = HMACSigningService(EXTREMELY_SECRET_HMAC_SECRET)
+
+    data = {"message": "Hello World", "timestamp": 1616161616}
+    expected = hmac.new(
+        EXTREMELY_SECRET_HMAC_SECRET.encode("utf-8"),
+        b'{"message":"Hello World","timestamp":1616161616}',
+        hashlib.sha256,
+    ).hexdigest()
+
+    assert service.sign(data) == expected
+    assert service.sign(data) == expected  # state is copied, not consumed
+
+
+def test_large_payload_signature_matches_plain_hmac():
+    """Test that streamed signing of a large payload hashes the canonical form."""
+    service = HMACSigningService(EXTREMELY_SECRET_HMAC_SECRET)
+
+    data = {
+        "document": "lorem ipsum é漢🙂 " * 50_000,
+        "rows": [{"id": index, "name": f"row {index}"} for index in range(5_000)],
+    }
+    expected = hmac.new(
+        EXTREMELY_SECRET_HMAC_SECRET.encode("utf-8"),
+        to_deterministic_json(data).encode("utf-8"),
+        hashlib.sha256,
+    ).hexdigest()
+
+    assert service.sign(data) == expected
+    assert service.verify(data, expected) is True
+    assert service.verify({**data, "rows": []}, expected) is False
+
+
+def test_signature_with_key_ids():
+    """Test signing with a named key and verifying across key rotation."""
+    keys = {"2024": "old-secret", "2025": "new-secret"}
+    data = {"message": "Hello World", "timestamp": 1616161616}
+
+    legacy_signature = HMACSigningService(EXTREMELY_SECRET_HMAC_SECRET).sign(data)
+    old_signature = HMACSigningService(
+        EXTREMELY_SECRET_HMAC_SECRET, keys=keys, active_key_id="2024"
+    ).sign(data)
+    service = HMACSigningService(
+        EXTREMELY_SECRET_HMAC_SECRET, keys=keys, active_key_id="2025"
+    )
+    new_signature = service.sign(data)
+
+    assert old_signature.startswith("2024:")
+    assert new_signature.startswith("2025:")
+    assert old_signature != new_signature
+
+    # every key stays verifiable after rotation, including the unnamed one
+    assert service.verify(data, legacy_signature) is True
+    assert service.verify(data, old_signature) is True
+    assert service.verify(data, new_signature) is True
+
+    # unknown key IDs and swapped key IDs are rejected
+    assert service.verify(data, "2023:" + new_signature.split(":")[1]) is False
+    assert service.verify(data, "2024:" + new_signature.split(":")[1]) is False
+
+
+def test_unknown_active_key_id_rejected():
+    """Test that the active key ID must name a configured key."""
+    with pytest.raises(ValueError):
+        HMACSigningService(EXTREMELY_SECRET_HMAC_SECRET, active_key_id="missing")
@@ -0,0 +1,172 @@
+"""Tests for the NDJSON streaming endpoints."""
+
+import asyncio
+import json
+from typing import AsyncIterator
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.api import stream
+from src.api.stream import iter_ndjson_batches, iter_ndjson_lines
+from src.core.dependencies import container
+from src.core.offload import AdmissionGate, CPUOffloader
+from src.core.settings import settings
+from src.main import app
+
+client = TestClient(app)
+
+
+def _collect_lines(chunks: list[bytes], max_line_bytes: int) -> list[bytes | None]:
+    async def source() -> AsyncIterator[bytes]:
+        for chunk in chunks:
+            yield chunk
+
+    async def collect() -> list[bytes | None]:
+        return [line async for line in iter_ndjson_lines(source(), max_line_bytes)]
+
+    return asyncio.run(collect())
+
+
+def _ndjson(response_text: str) -> list[dict]:
+    return [json.loads(line) for line in response_text.splitlines()]
+
+
+@pytest.mark.parametrize(
+    "chunks",
+    [
+        [b'{"a":1}\n{"b":2}\n'],
+        [b'{"a":', b"1}\n", b'{"b":2}'],
+        [b'{"a":1}', b"\n", b'{"b"', b":2}\n"],
+    ],
+)
+def test_iter_ndjson_lines_across_chunk_boundaries(chunks: list[bytes]):
+    """Test that lines are reassembled regardless of how the body is chunked."""
+    assert _collect_lines(chunks, 1024) == [b'{"a":1}', b'{"b":2}']
+
+
+def test_iter_ndjson_lines_skips_oversized_lines():
+    """Test that oversized lines are reported as None without being buffered."""
+    chunks = [b'{"a":1}\n{"long":"', b"x" * 50, b"x" * 50, b'"}\n{"b":2}\n']
+    assert _collect_lines(chunks, 32) == [b'{"a":1}', None, b'{"b":2}']
+
+
+def test_iter_ndjson_batches_by_chunk():
+    """Test that lines are batched by the chunk that completes them."""
+
+    async def source() -> AsyncIterator[bytes]:
+        for chunk in [b'{"a":1}\n{"b":', b'2}\n{"c":3}\n', b'{"d":4}']:
+            yield chunk
+
+    async def collect() -> list[list[bytes | None]]:
+        return [batch async for batch in iter_ndjson_batches(source(), 1024)]
+
+    assert asyncio.run(collect()) == [
+        [b'{"a":1}'],
+        [b'{"b":2}', b'{"c":3}'],
+        [b'{"d":4}'],
+    ]
+
+
+def test_stream_encrypt_decrypt_round_trip():
+    """Test that /stream/encrypt followed by /stream/decrypt returns the originals."""
+    payloads = [
+        {"name": "John Doe", "age": 30},
+        {"contact": {"email": "john@example.com"}},
+    ]
+    body = "".join(json.dumps(payload) + "\n" for payload in payloads)
+
+    encrypt_response = client.post(
+        "/stream/encrypt",
+        content=body,
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+    assert encrypt_response.status_code == 200
+    assert encrypt_response.headers["content-type"] == "application/x-ndjson"
+    encrypted = _ndjson(encrypt_response.text)
+    assert encrypted[0] == {"name": "IkpvaG4gRG9lIg==", "age": "MzA="}
+
+    decrypt_response = client.post(
+        "/stream/decrypt",
+        content="".join(json.dumps(item) + "\n" for item in encrypted),
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+    assert decrypt_response.status_code == 200
+    assert _ndjson(decrypt_response.text) == payloads
+
+
+def test_stream_reports_invalid_lines_in_place():
+    """Test that malformed lines produce error lines without stopping the stream."""
+    body = '{"a":1}\nnot json\n[1,2]\n\n{"b":2}\n'
+
+    response = client.post("/stream/encrypt", content=body)
+    assert response.status_code == 200
+    assert _ndjson(response.text) == [
+        {"a": "MQ=="},
+        {"error": "Line is not valid JSON"},
+        {"error": "Line must be a JSON object"},
+        {"b": "Mg=="},
+    ]
+
+
+def test_stream_line_size_limit(monkeypatch: pytest.MonkeyPatch):
+    """Test that lines above STREAM_MAX_LINE_BYTES are reported as errors."""
+    monkeypatch.setattr(settings, "STREAM_MAX_LINE_BYTES", 16)
+
+    body = '{"a":1}\n{"long":"' + "x" * 32 + '"}\n'
+    response = client.post("/stream/encrypt", content=body)
+    assert _ndjson(response.text) == [
+        {"a": "MQ=="},
+        {"error": "Line exceeds the maximum of 16 bytes"},
+    ]
+
+
+def test_stream_work_runs_off_the_event_loop(monkeypatch: pytest.MonkeyPatch):
+    """Test that lines are transformed in the threadpool in the sync mode."""
+    on_event_loop = []
+    transform_lines = stream._transform_lines
+
+    def recording_transform_lines(*args):
+        try:
+            asyncio.get_running_loop()
+            on_event_loop.append(True)
+        except RuntimeError:
+            on_event_loop.append(False)
+        return transform_lines(*args)
+
+    monkeypatch.setattr(stream, "_transform_lines", recording_transform_lines)
+    response = client.post("/stream/encrypt", content='{"a":1}\n')
+
+    assert _ndjson(response.text) == [{"a": "MQ=="}]
+    assert on_event_loop == [False]
+
+
+def test_stream_in_process_pool(monkeypatch: pytest.MonkeyPatch):
+    """Test that streams can be transformed in a process pool."""
+    offloader = CPUOffloader(mode="async", threshold_bytes=0, max_workers=1)
+    monkeypatch.setattr(container, "offloader", offloader)
+    body = '{"a":1}\n{"a":1}\nnot json\n'
+
+    try:
+        response = client.post("/stream/encrypt", content=body)
+    finally:
+        offloader.shutdown()
+    assert _ndjson(response.text) == [
+        {"a": "MQ=="},
+        {"a": "MQ=="},
+        {"error": "Line is not valid JSON"},
+    ]
+
+
+def test_stream_shed_by_admission_gate(monkeypatch: pytest.MonkeyPatch):
+    """Test that lines shed by the admission gate are reported in place."""
+    gate = AdmissionGate(1, max_queued=0)
+    gate.in_flight = 1
+    monkeypatch.setattr(container, "offloader", CPUOffloader(gate=gate))
+
+    response = client.post("/stream/encrypt", content='{"a":1}\n\n{"b":2}\n')
+    assert response.status_code == 200
+    assert _ndjson(response.text) == [
+        {"error": "Server is overloaded, retry later"},
+        {"error": "Server is overloaded, retry later"},
+    ]
@@ -1,10 +1,23 @@
 """Tests for utility functions."""
 
+import json
 from typing import Any
 
 import pytest
 
-from src.utils import to_deterministic_json
+from src import utils
+from src.utils import (
+    STREAMING_MIN_SIZE,
+    JSONBackend,
+    OrjsonJSONBackend,
+    StdlibJSONBackend,
+    get_json_backend,
+    orjson,
+    render_json_object,
+    to_deterministic_json,
+    to_deterministic_json_bytes,
+    write_deterministic_json,
+)
 
 
 @pytest.mark.parametrize(
@@ -58,3 +71,188 @@ def test_to_deterministic_json_nested_objects():
         result1
         == '{"settings":{"lang":"en","theme":"dark"},"user":{"age":30,"name":"John"}}'
     )
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        {"name": "John", "age": 30, "contact": {"email": "john@example.com"}},
+        {f"key_{index:04d}": index for index in range(1000, 0, -1)},
+        {"text": 'long "quoted" é漢🙂\n' * 500, "short": "x", "number": 1.5},
+        {"nested": [{"b": "x" * 300, "a": [None, True, 2**70]}] * 20},
+        {"empty": {}, "list": [], "zero": 0},
+        {2: "non-string keys", 1: ["x" * 300] * 10},
+        [["deep"] * 50] * 50,
+        "just a string" * 100,
+    ],
+)
+@pytest.mark.parametrize("chunk_size", [1, 64, 64 * 1024])
+def test_write_deterministic_json_matches(data: Any, chunk_size: int):
+    """Test that the streamed chunks add up to the canonical form exactly."""
+    chunks: list[bytes] = []
+    write_deterministic_json(data, chunks.append, chunk_size, stream_min_size=0)
+
+    assert b"".join(chunks) == to_deterministic_json(data).encode("utf-8")
+
+
+def _nested(depth: int) -> dict:
+    node: dict = {"leaf": "value", "numbers": [1, 2, 3]}
+    for level in range(depth):
+        node = {f"level_{level}": node, "items": [level, "x" * level]}
+    return node
+
+
+@pytest.mark.parametrize(
+    "data, streamed",
+    [
+        (_nested(32), False),
+        ({f"key_{index}": {"value": index} for index in range(500)}, False),
+        ({"data": {"items": [{"id": i, "name": "x" * 20} for i in range(5000)]}}, True),
+        ({"a": {"b": ["x" * 100] * 1000}}, True),
+        ({"document": "x" * 100_000}, True),
+    ],
+    ids=["deep", "small-objects", "wrapped-records", "wrapped-strings", "string"],
+)
+def test_write_deterministic_json_streams_large_values(data: Any, streamed: bool):
+    """Test that only values measured over the threshold are streamed in chunks."""
+    chunks: list[bytes] = []
+    write_deterministic_json(data, chunks.append, 64 * 1024, 64 * 1024)
+
+    assert (len(chunks) > 1) is streamed
+    assert b"".join(chunks) == to_deterministic_json(data).encode("utf-8")
+
+
+def _records(count: int) -> dict:
+    return {
+        "items": [
+            {"id": index, "name": "x" * 20, "tags": ["a", "b"], "active": True}
+            for index in range(count)
+        ]
+    }
+
+
+@pytest.mark.parametrize("count", [1000, 4000, 9000])
+def test_write_deterministic_json_serializes_payloads_in_one_call(
+    monkeypatch: pytest.MonkeyPatch, count: int
+):
+    """Test that payloads under STREAMING_MIN_SIZE skip the streaming writer."""
+
+    def stream(*args: Any) -> None:
+        raise AssertionError("payload was streamed")
+
+    monkeypatch.setattr(utils, "_emit_large", stream)
+    data = _records(count)
+    chunks: list[bytes] = []
+    write_deterministic_json(data, chunks.append)
+
+    assert chunks == [to_deterministic_json_bytes(data)]
+    assert 50_000 < len(chunks[0]) < STREAMING_MIN_SIZE
+
+
+def test_write_deterministic_json_streams_from_threshold():
+    """Test that payloads over STREAMING_MIN_SIZE are streamed in chunks."""
+    data = {"pages": ["x" * 1000] * (STREAMING_MIN_SIZE // 800)}
+    chunks: list[bytes] = []
+    write_deterministic_json(data, chunks.append)
+
+    assert len(chunks) > 1
+    assert max(map(len, chunks)) < 2 * 64 * 1024
+    assert b"".join(chunks) == to_deterministic_json_bytes(data)
+
+
+JSON_BACKENDS = [
+    StdlibJSONBackend(),
+    pytest.param(
+        "orjson",
+        marks=pytest.mark.skipif(orjson is None, reason="orjson is not installed"),
+    ),
+]
+
+
+@pytest.fixture(params=JSON_BACKENDS, ids=["stdlib", "orjson"])
+def json_backend(request: pytest.FixtureRequest) -> JSONBackend:
+    if request.param == "orjson":
+        return OrjsonJSONBackend()
+    return request.param
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        {"name": "John", "age": 30, "contact": {"email": "john@example.com"}},
+        {"unicode": "é漢字🙂", "clé": "valeur"},
+        {"control": '\x00\x1f\x7f\n\t"\\/'},
+        {"floats": [0.1, 1.5, 30.0, -0.0, 1e-5, 1e-7, 1e16, 1.2345678901234568e17]},
+        {"special": [float("nan"), float("inf"), float("-inf"), None]},
+        {"integers": [0, -1, 2**63 - 1, 2**63, -(2**63), 2**64, 10**30]},
+        {2: "non-string keys", 1: True},
+        ["not", "a", "dict"],
+    ],
+)
+def test_json_backend_matches_stdlib(json_backend: JSONBackend, data: Any):
+    """Test that every backend produces byte-identical output to the stdlib."""
+    stdlib = StdlibJSONBackend()
+
+    for sort_keys in (True, False):
+        assert json_backend.dumps(data, sort_keys) == stdlib.dumps(data, sort_keys)
+
+
+def test_json_backend_dumps_bytes(json_backend: JSONBackend):
+    """Test that dumps_bytes is the ASCII encoding of dumps."""
+    data = {"name": "José", "emoji": "🔐", "values": [1.5, None, 10**20]}
+
+    for sort_keys in (True, False):
+        output = json_backend.dumps_bytes(data, sort_keys)
+        assert output.isascii()
+        assert output.decode() == json_backend.dumps(data, sort_keys)
+
+
+@pytest.mark.parametrize(
+    "mapping",
+    [
+        {},
+        {"name": "IkpvaG4gRG9lIg==", "age": "MzA="},
+        {"é漢🙂": "value", 'quote"key': "back\\slash"},
+        {"control": "line\nbreak\x01", "del": "\x7f", "raw": "naïve"},
+    ],
+)
+def test_render_json_object_matches_json_response(mapping: dict[str, str]):
+    """Test that rendering matches FastAPI's JSONResponse byte for byte."""
+    rendered = render_json_object(
+        mapping.keys(), [value.encode() for value in mapping.values()]
+    )
+
+    expected = json.dumps(mapping, ensure_ascii=False, separators=(",", ":"))
+    assert rendered == expected.encode()
+
+
+@pytest.mark.parametrize(
+    "document",
+    [
+        '{"age":30,"name":"John"}',
+        '{"big":123456789012345678901234567890,"neg":-9223372036854775809}',
+        '{"nan":NaN,"inf":Infinity}',
+        '"\\u00e9\\ud83d\\ude42"',
+    ],
+)
+def test_json_backend_loads_matches_stdlib(json_backend: JSONBackend, document: str):
+    """Test that every backend parses documents exactly like the stdlib."""
+    stdlib = StdlibJSONBackend()
+
+    expected = stdlib.dumps(stdlib.loads(document), sort_keys=True)
+    assert stdlib.dumps(json_backend.loads(document), sort_keys=True) == expected
+    assert (
+        stdlib.dumps(json_backend.loads(document.encode()), sort_keys=True) == expected
+    )
+
+
+def test_json_backend_loads_rejects_invalid(json_backend: JSONBackend):
+    """Test that invalid documents raise json.JSONDecodeError on every backend."""
+    with pytest.raises(json.JSONDecodeError):
+        json_backend.loads("{not valid json")
+
+
+def test_get_json_backend_unknown():
+    """Test that an unknown backend name is rejected."""
+    with pytest.raises(ValueError):
+        get_json_backend("simdjson")
@@ -0,0 +1,171 @@
+"""Tests for the deduplication of repeated values across a request."""
+
+import pickle
+from typing import Any, Iterable
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.main import app
+from src.services.base64_encryption import Base64EncryptionService
+from src.services.encryption_service import MEMO_MIN_VALUES, EncryptionService
+from src.services.protocols import EncryptionProtocol
+from src.services.value_memo import ValueMemo, value_key
+
+REPETITIVE = {f"key_{index}": ["ACTIVE", 0, {"a": 1}][index % 3] for index in range(60)}
+
+
+class CountingEncryption(Base64EncryptionService):
+    """Base64 recording every value it encrypts and decrypts."""
+
+    def __init__(self):
+        object.__setattr__(self, "seen", [])
+
+    def encrypt_many(self, values: Iterable[Any]) -> list[str]:
+        values = list(values)
+        self.seen.extend(values)
+        return super().encrypt_many(values)
+
+    def try_decrypt(self, encrypted_value: Any) -> Any:
+        self.seen.append(encrypted_value)
+        return super().try_decrypt(encrypted_value)
+
+
+@pytest.mark.parametrize(
+    "first, second",
+    [(True, 1), (False, 0), (0.0, -0.0), (1, 1.0), ("1", 1), (None, "null")],
+)
+def test_keys_follow_the_serialized_form(first: Any, second: Any):
+    """Test that values comparing equal but serializing apart get distinct keys."""
+    assert value_key(first) != value_key(second)
+
+
+def test_large_containers_are_not_keyed():
+    """Test that only small objects and arrays are keyed on their JSON."""
+    assert value_key({"b": 1, "a": [1, 2]}) == value_key({"b": 1, "a": [1, 2]})
+    assert value_key({"text": "x" * 1000}) is None
+
+
+def test_each_distinct_value_is_encrypted_once():
+    """Test that repeated values are encrypted once and the payload is unchanged."""
+    algorithm = CountingEncryption()
+    service = EncryptionService(algorithm, memo_max_entries=100)
+    plain = EncryptionService(Base64EncryptionService())
+
+    assert service.encrypt_payload(REPETITIVE) == plain.encrypt_payload(REPETITIVE)
+    assert algorithm.seen == ["ACTIVE", 0, {"a": 1}]
+
+
+def test_repeated_ciphertexts_are_decrypted_once():
+    """Test that decrypt_payload decrypts each distinct ciphertext once."""
+    algorithm = CountingEncryption()
+    service = EncryptionService(algorithm, memo_max_entries=100)
+    encrypted = service.encrypt_payload(REPETITIVE)
+    algorithm.seen.clear()
+
+    assert service.decrypt_payload(encrypted) == REPETITIVE
+    assert len(algorithm.seen) == 3
+
+
+def test_small_payloads_get_no_memo():
+    """Test that payloads below MEMO_MIN_VALUES are processed without a memo."""
+    algorithm = CountingEncryption()
+    service = EncryptionService(algorithm, memo_max_entries=100)
+    payload = {f"key_{index}": "same" for index in range(MEMO_MIN_VALUES - 1)}
+
+    service.encrypt_payload(payload)
+    assert len(algorithm.seen) == MEMO_MIN_VALUES - 1
+
+
+def test_shared_memo_spans_payloads():
+    """Test that a memo passed to several calls is shared between them."""
+    algorithm = CountingEncryption()
+    service = EncryptionService(algorithm, memo_max_entries=100)
+    memo = service.create_memo()
+
+    for _ in range(3):
+        service.encrypt_payload({"status": "ACTIVE", "count": 0}, memo=memo)
+    assert algorithm.seen == ["ACTIVE", 0]
+    assert memo.stats()["hits"] == 4
+
+
+def test_memo_disabled_by_default():
+    """Test that services without memo_max_entries have no memo."""
+    assert EncryptionService(Base64EncryptionService()).create_memo() is None
+
+
+def test_memo_bounds():
+    """Test that a full memo keeps processing values without storing them."""
+    memo = ValueMemo(max_entries=2)
+    assert memo.map("t", ["a", "b", "c", "c"], lambda values: values) == list("abcc")
+    assert memo.stats()["entries"] == 2
+
+    memo = ValueMemo(max_bytes=10)
+    assert memo.map("t", ["abcd", "efgh"], _upper) == ["ABCD", "EFGH"]
+    assert memo.stats()["entries"] == 1
+
+
+def test_memo_turns_off_without_repeats():
+    """Test that the memo stops looking values up when they do not repeat."""
+    memo = ValueMemo(probe_lookups=10, min_hit_ratio=0.5)
+    values = [str(index) for index in range(100)]
+
+    assert memo.map("t", values, _upper) == values
+    assert not memo.enabled
+    assert memo.stats() == {"hits": 0, "misses": 10, "entries": 10, "size_bytes": 20}
+
+
+def test_unkeyed_values_are_processed_in_order():
+    """Test that values without a key are processed but never stored."""
+    memo = ValueMemo()
+    calls: list[list[Any]] = []
+
+    def process(values: list[Any]) -> list[Any]:
+        calls.append(values)
+        return [f"<{value}>" for value in values]
+
+    key = lambda value: value if isinstance(value, str) else None  # noqa: E731
+    result = memo.map("t", ["a", 1, "a", 2, "b"], process, key)
+    assert result == ["<a>", "<1>", "<a>", "<2>", "<b>"]
+    assert calls == [["a", "b", 1, 2]]
+    assert memo.stats()["entries"] == 2
+
+
+def test_randomized_algorithms_are_not_deduplicated():
+    """Test that non-deterministic algorithms encrypt every occurrence."""
+
+    class RandomizedEncryption(CountingEncryption):
+        deterministic = False
+
+    algorithm = RandomizedEncryption()
+    service = EncryptionService(algorithm, memo_max_entries=100)
+
+    service.encrypt_payload(REPETITIVE)
+    assert len(algorithm.seen) == len(REPETITIVE)
+    assert not EncryptionProtocol.deterministic
+
+
+def test_pickle_keeps_memo_settings():
+    """Test that services sent to worker processes keep their memo settings."""
+    service = EncryptionService(
+        Base64EncryptionService(), memo_max_entries=10, memo_max_bytes=100
+    )
+    copy = pickle.loads(pickle.dumps(service))
+    assert (copy.memo_max_entries, copy.memo_max_bytes) == (10, 100)
+
+
+def test_batch_items_share_values():
+    """Test that batch items repeating values round-trip unchanged."""
+    items = [{"status": "ACTIVE", "flags": [1, 2]} for _ in range(50)]
+    with TestClient(app) as client:
+        encrypted = client.post("/batch/encrypt", json=items).json()["results"]
+        assert len({item["result"]["status"] for item in encrypted}) == 1
+
+        decrypted = client.post(
+            "/batch/decrypt", json=[item["result"] for item in encrypted]
+        ).json()["results"]
+    assert [item["result"] for item in decrypted] == items
+
+
+def _upper(values: list[str]) -> list[str]:
+    return [value.upper() for value in values]
@@ -0,0 +1,192 @@
+"""Tests for the msgpack wire format and response compression."""
+
+import zlib
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.core.middleware import zstandard
+from src.core.settings import settings
+from src.core.wire import msgpack
+from src.main import create_app
+from src.services.base64_encryption import Base64EncryptionService
+from src.services.encryption_service import EncryptionService
+from src.services.rot13_encryption import ROT13EncryptionService
+
+needs_msgpack = pytest.mark.skipif(msgpack is None, reason="msgpack is not installed")
+needs_zstd = pytest.mark.skipif(zstandard is None, reason="zstandard is not installed")
+
+MSGPACK = {"Content-Type": "application/msgpack"}
+
+PAYLOAD = {
+    "name": "John Doe",
+    "age": 30,
+    "contact": {"email": "john@example.com", "tags": ["a", "b"]},
+    "unicode": "漢字",
+}
+
+clients = {
+    "default": TestClient(create_app(raw_body=False)),
+    "raw": TestClient(create_app(raw_body=True)),
+}
+
+
+@pytest.fixture(params=list(clients))
+def client(request: pytest.FixtureRequest) -> TestClient:
+    return clients[request.param]
+
+
+@needs_msgpack
+@pytest.mark.parametrize("algorithm", ["base64", "rot13"])
+def test_msgpack_round_trip(client: TestClient, algorithm: str):
+    """Test encrypting and decrypting with msgpack bodies and binary values."""
+    headers = {**MSGPACK, "X-Encryption-Algorithm": algorithm}
+
+    response = client.post("/encrypt", content=msgpack.packb(PAYLOAD), headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/msgpack"
+    encrypted = msgpack.unpackb(response.content)
+    assert all(isinstance(value, bytes) for value in encrypted.values())
+
+    response = client.post(
+        "/decrypt", content=msgpack.packb(encrypted), headers=headers
+    )
+    assert response.status_code == 200
+    assert msgpack.unpackb(response.content) == PAYLOAD
+
+
+@needs_msgpack
+def test_binary_ciphertexts_are_smaller(client: TestClient):
+    """Test that Base64 ciphertexts travel as their raw bytes."""
+    json_body = client.post("/encrypt", json=PAYLOAD).content
+    response = client.post(
+        "/encrypt", json=PAYLOAD, headers={"Accept": "application/msgpack"}
+    )
+    assert msgpack.unpackb(response.content) == {
+        "name": b'"John Doe"',
+        "age": b"30",
+        "contact": b'{"email":"john@example.com","tags":["a","b"]}',
+        "unicode": '"\\u6f22\\u5b57"'.encode(),
+    }
+    assert len(response.content) < len(json_body) * 0.8
+
+
+@needs_msgpack
+def test_formats_mix(client: TestClient):
+    """Test that text ciphertexts decrypt from msgpack and JSON can be asked for."""
+    encrypted = client.post("/encrypt", json=PAYLOAD).json()
+
+    response = client.post(
+        "/decrypt",
+        content=msgpack.packb(encrypted),
+        headers={**MSGPACK, "Accept": "application/json"},
+    )
+    assert response.headers["content-type"] == "application/json"
+    assert response.json() == PAYLOAD
+
+
+@needs_msgpack
+def test_msgpack_signatures_match_json(client: TestClient):
+    """Test that signatures do not depend on the wire format."""
+    signature = client.post("/sign", json=PAYLOAD).json()["signature"]
+
+    response = client.post("/sign", content=msgpack.packb(PAYLOAD), headers=MSGPACK)
+    assert msgpack.unpackb(response.content) == {"signature": signature}
+
+    verification = msgpack.packb({"signature": signature, "data": PAYLOAD})
+    response = client.post("/verify", content=verification, headers=MSGPACK)
+    assert response.status_code == 204
+
+
+@needs_msgpack
+@pytest.mark.parametrize(
+    "endpoint,body,status_code",
+    [
+        ("/sign", {"a": b"binary"}, 400),
+        ("/encrypt", {"a": [b"binary"]}, 400),
+        # bytes are sent as they are
+        ("/encrypt", b"\xc1", 400),
+        ("/encrypt", [1, 2], 422),
+        ("/verify", {"signature": "x"}, 422),
+    ],
+)
+def test_invalid_msgpack_bodies(
+    client: TestClient, endpoint: str, body: object, status_code: int
+):
+    """Test that malformed msgpack bodies are rejected like JSON ones."""
+    content = body if isinstance(body, bytes) else msgpack.packb(body)
+    response = client.post(endpoint, content=content, headers=MSGPACK)
+    assert response.status_code == status_code
+
+
+def test_service_raw_ciphertexts():
+    """Test that binary ciphertexts are accepted back by `decrypt_payload`."""
+    for algorithm in (Base64EncryptionService(), ROT13EncryptionService()):
+        service = EncryptionService(algorithm)
+        encrypted = service.encrypt_payload_raw(PAYLOAD)
+        assert service.decrypt_payload(encrypted) == PAYLOAD
+        assert service.decrypt_payload({"a": b"\xff"}) == {"a": b"\xff"}
+
+
+@pytest.mark.parametrize(
+    "accept_encoding,encoding",
+    [
+        ("gzip", "gzip"),
+        pytest.param("gzip, zstd", "zstd", marks=needs_zstd),
+        ("zstd;q=0, gzip", "gzip"),
+        pytest.param("*", "zstd", marks=needs_zstd),
+        ("identity", None),
+        ("gzip;q=0", None),
+    ],
+)
+def test_response_compression(accept_encoding: str, encoding: str | None):
+    """Test the negotiation of the response encoding."""
+    client = clients["default"]
+    payload = {f"key{i}": "value" * 10 for i in range(100)}
+
+    response = client.post(
+        "/encrypt", json=payload, headers={"Accept-Encoding": accept_encoding}
+    )
+    assert response.headers.get("content-encoding") == encoding
+    assert response.json() == client.post("/encrypt", json=payload).json()
+    if encoding is not None:
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert int(response.headers["content-length"]) < len(response.content)
+
+
+def test_small_responses_are_not_compressed():
+    """Test that bodies below the threshold are sent as-is."""
+    response = clients["default"].post(
+        "/sign", json=PAYLOAD, headers={"Accept-Encoding": "gzip"}
+    )
+    assert "content-encoding" not in response.headers
+
+
+@pytest.mark.parametrize("encoding", ["gzip", pytest.param("zstd", marks=needs_zstd)])
+def test_streamed_responses_are_compressed(
+    monkeypatch: pytest.MonkeyPatch, encoding: str
+):
+    """Test that every streamed chunk can be decoded as soon as it arrives."""
+    monkeypatch.setattr(settings, "COMPRESSION_MIN_BYTES", 1)
+    body = b'{"a": 1}\n{"b": 2}\n'
+    if encoding == "zstd":
+        decompressor = zstandard.ZstdDecompressor().decompressobj()
+    else:
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+    with clients["default"].stream(
+        "POST",
+        "/stream/encrypt",
+        content=body,
+        headers={
+            "Content-Type": "application/x-ndjson",
+            "Accept-Encoding": encoding,
+        },
+    ) as response:
+        assert response.headers["content-encoding"] == encoding
+        assert "content-length" not in response.headers
+        lines = [decompressor.decompress(chunk) for chunk in response.iter_raw()]
+    assert b"".join(lines).splitlines() == [
+        b'{"a":"MQ=="}',
+        b'{"b":"Mg=="}',
+    ]